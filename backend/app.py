@@ -1,35 +1,149 @@
-from flask import Flask
+import click
+from flask import Flask, jsonify
 from flask_cors import CORS
 from config import config_by_name
 from config import config_by_name
 from extensions import db, migrate, jwt  # import extensions from extensions.py
 
-# In-memory blacklist for revoked tokens (can replace with Redis or DB later)
-jwt_blacklist = set()
-
-
 def create_app(config_name="development"):
     app = Flask(__name__)
     app.config.from_object(config_by_name[config_name])
 
+    # Stream multipart uploads to disk while hashing/sniffing them
+    from services.uploads import StreamingUploadRequest
+    app.request_class = StreamingUploadRequest
+
+    # JSON encoding for responses and request bodies (see schemas/encoding.py)
+    from schemas import init_json
+    init_json(app)
+
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
     CORS(app)
 
-    # JWT token revocation check
+    # JWT token revocation check (shared store + per-worker cache, see services/token_store.py)
+    from services.token_store import init_token_store, is_token_revoked
+    init_token_store(app)
+
     @jwt.token_in_blocklist_loader
     def check_if_token_revoked(jwt_header, jwt_payload):
-        return jwt_payload["jti"] in jwt_blacklist
+        return is_token_revoked(jwt_payload)
+
+    # Live chat fan-out for /<ticket_id>/events (see services/chat_events.py)
+    from services.chat_events import init_chat_events
+    init_chat_events(app)
+
+    # Runtime settings snapshot (see services/settings.py)
+    from services.settings import init_settings
+    init_settings(app)
 
     # Import all models so migrations detect them
     import models # This loads User, Ticket, etc., via models/__init__.py
 
+    # SLA deadlines and breach scheduler (see services/sla.py)
+    from services.sla import init_sla
+    init_sla(app)
+
+    # Load-aware ticket routing (see services/assignment.py)
+    from services.assignment import init_assignment
+    init_assignment(app)
+
+    # Background jobs for post-commit work (see services/jobs.py)
+    from services.jobs import init_job_queue
+    init_job_queue(app)
+
+    # Login/registration throttling (see services/rate_limit.py)
+    from services.rate_limit import init_rate_limiter
+    init_rate_limiter(app)
+
+    # Behind trusted proxies, request.remote_addr is the client they report
+    if app.config.get("TRUSTED_PROXY_HOPS", 0):
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["TRUSTED_PROXY_HOPS"])
+
+    # Password hashing on a process pool (see services/passwords.py)
+    from services.passwords import HashPoolBusy, init_passwords
+    init_passwords(app)
+
+    @app.errorhandler(HashPoolBusy)
+    def password_pool_busy(e):
+        return jsonify({"error": "Server busy, please retry shortly"}), 503, {"Retry-After": "1"}
+
+    # Buffered audit trail writer (see services/audit.py)
+    from services.audit import init_audit
+    init_audit(app)
+
     # Register blueprints
     from routes import register_routes
     register_routes(app)
 
+    # Backfill/repair the analytics rollups: `flask rebuild-ticket-rollups`
+    @app.cli.command("rebuild-ticket-rollups")
+    def rebuild_ticket_rollups_command():
+        from models.analytics import rebuild_ticket_rollups
+        rebuild_ticket_rollups()
+        db.session.commit()
+        print("Ticket rollups rebuilt")
+
+    # Backfill/repair the SQLite full-text index: `flask rebuild-search-index`
+    @app.cli.command("rebuild-search-index")
+    def rebuild_search_index_command():
+        from services.search import rebuild_search_index
+        rebuild_search_index()
+        db.session.commit()
+        print("Search index rebuilt")
+
+    # Give open tickets created before the SLA engine a deadline: `flask backfill-sla-due`
+    @app.cli.command("backfill-sla-due")
+    def backfill_sla_due_command():
+        from services.sla import backfill_sla_due
+        count = backfill_sla_due()
+        db.session.commit()
+        print(f"Set sla_due on {count} tickets")
+
+    # Provision users from a CSV or JSON Lines file: `flask import-users users.csv`
+    @app.cli.command("import-users")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]), help="Default: from the file extension")
+    @click.option("--role", default="agent", type=click.Choice(["admin", "agent", "customer"]),
+                  help="Role for rows without one")
+    @click.option("--created-by", help="Email of the superadmin recorded as creator")
+    def import_users_command(path, fmt, role, created_by):
+        from models.user import User, RoleEnum
+        from services.user_import import UserImporter, read_rows
+        actor = None
+        if created_by:
+            actor = User.query.filter_by(email=created_by, role=RoleEnum.super_admin).first()
+            if actor is None:
+                raise click.UsageError(f"No superadmin with email {created_by}")
+        fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            report = UserImporter(actor, RoleEnum(role)).run(read_rows(f, fmt))
+        for error in report["errors"]:
+            print(f"line {error['line']}: {error['email'] or '-'}: {error['error']}")
+        print(f"Created {report['created']} users, {report['failed']} rows failed")
+
+    @app.cli.command("gc-blobs")
+    def gc_blobs_command():
+        from services.blob_store import gc_blobs
+        print(f"Removed {gc_blobs()} unreferenced blobs")
+
+    @app.cli.command("import-legacy-attachments")
+    def import_legacy_attachments_command():
+        from services.blob_store import import_legacy_attachments
+        print(f"Moved {import_legacy_attachments()} attachments into the blob store")
+
+    # Dedicated worker for the persistent queue: `flask run-jobs`
+    @app.cli.command("run-jobs")
+    def run_jobs_command():
+        queue = app.extensions["jobs"]
+        if not hasattr(queue, "work"):
+            raise click.UsageError("run-jobs needs JOB_QUEUE=sqlite")
+        print("Processing jobs (Ctrl+C to stop)")
+        queue.work()
+
     return app
 
 
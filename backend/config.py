@@ -13,6 +13,87 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=60)   # Access token expiry time
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)     # Refresh token expiry time
 
+    # Token revocation store: "db" (app database, works across hosts) or
+    # "sqlite" (local file shared by the workers on one host)
+    JWT_REVOCATION_STORE = os.getenv("JWT_REVOCATION_STORE", "db")
+    JWT_REVOCATION_SQLITE_PATH = os.getenv("JWT_REVOCATION_SQLITE_PATH")
+    JWT_REVOCATION_SYNC_SECONDS = 1.0   # how stale another worker's view may be
+
+    # Let read-only views authorize from the role/department claims in the
+    # access token instead of loading the user (tokens are revoked when these change)
+    AUTH_TRUST_TOKEN_CLAIMS = True
+
+    # Uploads are streamed to disk; both limits are enforced while the body is read
+    UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", os.path.join(os.getcwd(), "uploads"))
+    MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", 250 * 1024 * 1024))      # per request
+    MAX_UPLOAD_FILE_SIZE = int(os.getenv("MAX_UPLOAD_FILE_SIZE", 100 * 1024 * 1024))  # per file
+
+    # Attachment downloads: "direct" (Flask streams, with Range/ETag),
+    # "x-accel" (nginx X-Accel-Redirect to ATTACHMENT_ACCEL_PREFIX, an internal
+    # location aliased to UPLOAD_FOLDER) or "x-sendfile" (Apache/lighttpd)
+    ATTACHMENT_DELIVERY = os.getenv("ATTACHMENT_DELIVERY", "direct")
+    ATTACHMENT_ACCEL_PREFIX = os.getenv("ATTACHMENT_ACCEL_PREFIX", "/protected-uploads/")
+    ATTACHMENT_URL_TTL = int(os.getenv("ATTACHMENT_URL_TTL", 24 * 3600))  # signed link lifetime window
+    # Mode of stored blobs/thumbnails (less the umask); the proxy must be able to read them
+    UPLOAD_FILE_MODE = int(os.getenv("UPLOAD_FILE_MODE", "644"), 8)
+
+    # Chat push fan-out: "memory" (one process) or "sqlite" (all workers on
+    # this host share an event log). Each open stream holds a worker thread.
+    CHAT_FANOUT = os.getenv("CHAT_FANOUT", "memory")
+    CHAT_FANOUT_SQLITE_PATH = os.getenv("CHAT_FANOUT_SQLITE_PATH")
+    CHAT_FANOUT_POLL_SECONDS = 0.25   # how often workers pick up each other's events
+    CHAT_EVENTS_URL_TTL = int(os.getenv("CHAT_EVENTS_URL_TTL", 300))  # signed stream link lifetime window
+    CHAT_EVENTS_RECHECK_SECONDS = 60  # open streams re-check the user's access this often
+
+    # Background jobs: "thread" (in-process pool) or "sqlite" (persistent,
+    # shared by this host's workers; `flask run-jobs` runs a dedicated worker)
+    JOB_QUEUE = os.getenv("JOB_QUEUE", "thread")
+    JOB_QUEUE_SQLITE_PATH = os.getenv("JOB_QUEUE_SQLITE_PATH")
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+
+    # Audit entries are buffered per worker and bulk-inserted
+    AUDIT_BATCH_SIZE = 100      # flush when this many are waiting
+    AUDIT_FLUSH_SECONDS = 1.0   # ...or after this long
+
+    # Rendered published KB articles kept per worker (LRU)
+    KB_RENDER_CACHE_SIZE = int(os.getenv("KB_RENDER_CACHE_SIZE", 256))
+
+    # How often each worker checks the settings table for changes (seconds)
+    SETTINGS_SYNC_SECONDS = 5.0
+
+    # How often each worker reloads per-agent open-ticket counts for auto-assignment
+    ASSIGNMENT_SYNC_SECONDS = 60.0
+
+    # Auth throttling: sliding-window counters kept per worker ("memory") or in
+    # a host-local SQLite file shared by the workers ("sqlite").
+    # RATE_LIMITS overrides rules as {name: (events, seconds)}; defaults are
+    # 20 failed logins per IP per minute, 5 per account per 5 minutes and
+    # 5 superadmin registrations per IP per hour
+    RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "memory")
+    RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH")
+    RATE_LIMITS = {}
+    # Proxies in front of the app that set X-Forwarded-For (e.g. 1 for nginx
+    # with ATTACHMENT_DELIVERY=x-accel): per-IP limits then key on the client
+    # address they forward, not the proxy's, which every client shares.
+    # Keep 0 when clients connect directly, since they could forge the header.
+    TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", 0))
+
+    # Bulk user import: rows per INSERT/commit
+    USER_IMPORT_BATCH_SIZE = 500
+
+    # Password hashing: Werkzeug method and cost (older hashes are upgraded at
+    # login), processes that hash (0 = on the request thread) and how many
+    # hashes may wait per worker before logins get 503
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+    PASSWORD_HASH_MAX_PENDING = 64
+
+    # Response/request JSON: "auto" (orjson when installed), "orjson" or "json"
+    JSON_ENCODER = os.getenv("JSON_ENCODER", "auto")
+
+    # Seconds to cache user rows for auth checks in each worker (0 = off)
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "0"))
+
 class DevelopmentConfig(Config):
     DEBUG = True
 
@@ -20,7 +101,16 @@ class ProductionConfig(Config):
     DEBUG = False
     # You might want to override DB URI and JWT_SECRET_KEY in production env variables
 
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.getenv("TEST_DATABASE_URI", "sqlite:///ticket_system_test.db")
+    # Cheap hashes on the request thread; revocations visible at once
+    PASSWORD_HASH_METHOD = "pbkdf2:sha256:1000"
+    PASSWORD_HASH_WORKERS = 0
+    JWT_REVOCATION_SYNC_SECONDS = 0.0
+
 config_by_name = {
     "development": DevelopmentConfig,
-    "production": ProductionConfig
+    "production": ProductionConfig,
+    "testing": TestingConfig
 }
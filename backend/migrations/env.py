@@ -24,6 +24,14 @@ config.set_main_option('sqlalchemy.url', app.config['SQLALCHEMY_DATABASE_URI'])
 target_metadata = app.extensions['migrate'].db.metadata
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    # The SQLite FTS5 search table and its shadow tables are managed by
+    # services/search.py, not by the models
+    if type_ == "table" and reflected and compare_to is None and name.startswith("search_index"):
+        return False
+    return True
+
+
 def run_migrations_offline():
     url = app.config['SQLALCHEMY_DATABASE_URI']
     context.configure(
@@ -31,6 +39,7 @@ def run_migrations_offline():
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
     with context.begin_transaction():
         context.run_migrations()
@@ -39,7 +48,7 @@ def run_migrations_offline():
 def run_migrations_online():
     connectable = app.extensions['migrate'].db.engine
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
         with context.begin_transaction():
             context.run_migrations()
 
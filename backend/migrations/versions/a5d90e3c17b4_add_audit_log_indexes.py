@@ -0,0 +1,26 @@
+"""Add time-range and per-user indexes on audit_logs
+
+Revision ID: a5d90e3c17b4
+Revises: f1c8a3d62b90
+Create Date: 2026-10-18 14:05:12.604113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5d90e3c17b4'
+down_revision = 'f1c8a3d62b90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_audit_logs_created', 'audit_logs', ['created_at', 'id'], unique=False)
+    op.create_index('ix_audit_logs_user_created', 'audit_logs', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_audit_logs_user_created', table_name='audit_logs')
+    op.drop_index('ix_audit_logs_created', table_name='audit_logs')
@@ -0,0 +1,24 @@
+"""Index revoked_tokens.revoked_at for the revocation cache sync
+
+Revision ID: a7d3e5f18c42
+Revises: e4a2c7b91f06
+Create Date: 2026-10-19 09:12:40.517093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3e5f18c42'
+down_revision = 'e4a2c7b91f06'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_revoked_tokens_revoked_at'), 'revoked_tokens', ['revoked_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_revoked_tokens_revoked_at'), table_name='revoked_tokens')
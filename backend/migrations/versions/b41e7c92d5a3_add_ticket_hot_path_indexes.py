@@ -0,0 +1,48 @@
+"""Add composite indexes for ticket hot-path queries
+
+Revision ID: b41e7c92d5a3
+Revises: 2c3c97603ee5
+Create Date: 2026-10-18 10:12:41.208317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b41e7c92d5a3'
+down_revision = '2c3c97603ee5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Ticket lists: filter column first, then the (created_at, id) keyset
+    op.create_index('ix_tickets_assigned_to_created', 'tickets', ['assigned_to_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_tickets_created_by_created', 'tickets', ['created_by_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_tickets_department_created', 'tickets', ['department_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_tickets_created', 'tickets', ['created_at', 'id'], unique=False)
+
+    # Unassigned queue: partial on SQLite/Postgres, a plain index elsewhere
+    op.create_index(
+        'ix_tickets_unassigned_created', 'tickets', ['created_at', 'id'], unique=False,
+        sqlite_where=sa.text('assigned_to_id IS NULL'),
+        postgresql_where=sa.text('assigned_to_id IS NULL'),
+    )
+
+    op.create_index('ix_comments_ticket_created', 'comments', ['ticket_id', 'created_at'], unique=False)
+    op.create_index('ix_attachments_ticket_id', 'attachments', ['ticket_id'], unique=False)
+    op.create_index('ix_attachments_comment_id', 'attachments', ['comment_id'], unique=False)
+    op.create_index('ix_users_role_department', 'users', ['role', 'department_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_users_role_department', table_name='users')
+    op.drop_index('ix_attachments_comment_id', table_name='attachments')
+    op.drop_index('ix_attachments_ticket_id', table_name='attachments')
+    op.drop_index('ix_comments_ticket_created', table_name='comments')
+    op.drop_index('ix_tickets_unassigned_created', table_name='tickets')
+    op.drop_index('ix_tickets_created', table_name='tickets')
+    op.drop_index('ix_tickets_department_created', table_name='tickets')
+    op.drop_index('ix_tickets_created_by_created', table_name='tickets')
+    op.drop_index('ix_tickets_assigned_to_created', table_name='tickets')
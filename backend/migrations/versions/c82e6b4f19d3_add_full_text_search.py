@@ -0,0 +1,57 @@
+"""Add full-text search over tickets, comments and KB articles
+
+Revision ID: c82e6b4f19d3
+Revises: a5d90e3c17b4
+Create Date: 2026-10-18 16:22:47.318205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c82e6b4f19d3'
+down_revision = 'a5d90e3c17b4'
+branch_labels = None
+depends_on = None
+
+# Copies of models/ticket.py and models/kb_article.py at this revision
+TICKET_SEARCH_VECTOR = "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, ''))"
+COMMENT_SEARCH_VECTOR = "to_tsvector('english', body)"
+KB_SEARCH_VECTOR = "to_tsvector('english', coalesce(title, '') || ' ' || body || ' ' || coalesce(tags, ''))"
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.create_index('ix_tickets_search', 'tickets', [sa.text(TICKET_SEARCH_VECTOR)], postgresql_using='gin')
+        op.create_index('ix_comments_search', 'comments', [sa.text(COMMENT_SEARCH_VECTOR)], postgresql_using='gin')
+        op.create_index('ix_kb_articles_search', 'kb_articles', [sa.text(KB_SEARCH_VECTOR)], postgresql_using='gin')
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+            "kind UNINDEXED, ref_id UNINDEXED, ticket_id UNINDEXED, title, body, tags, "
+            "tokenize='porter unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "INSERT INTO search_index (rowid, kind, ref_id, ticket_id, title, body, tags)"
+            " SELECT id * 4 + 1, 'ticket', id, id, title, coalesce(description, ''), '' FROM tickets"
+        )
+        op.execute(
+            "INSERT INTO search_index (rowid, kind, ref_id, ticket_id, title, body, tags)"
+            " SELECT id * 4 + 2, 'comment', id, ticket_id, '', body, '' FROM comments"
+        )
+        op.execute(
+            "INSERT INTO search_index (rowid, kind, ref_id, ticket_id, title, body, tags)"
+            " SELECT id * 4 + 3, 'kb', id, NULL, title, body, coalesce(tags, '') FROM kb_articles"
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.drop_index('ix_kb_articles_search', table_name='kb_articles')
+        op.drop_index('ix_comments_search', table_name='comments')
+        op.drop_index('ix_tickets_search', table_name='tickets')
+    elif dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS search_index")
@@ -0,0 +1,32 @@
+"""Track SLA breaches and index pending SLA deadlines
+
+Revision ID: d3f71a9c5e28
+Revises: c82e6b4f19d3
+Create Date: 2026-10-18 19:41:06.552871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3f71a9c5e28'
+down_revision = 'c82e6b4f19d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sla_breached_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(
+            'ix_tickets_sla_pending', ['sla_due'], unique=False,
+            sqlite_where=sa.text('sla_breached_at IS NULL AND sla_due IS NOT NULL'),
+            postgresql_where=sa.text('sla_breached_at IS NULL AND sla_due IS NOT NULL'),
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.drop_index('ix_tickets_sla_pending')
+        batch_op.drop_column('sla_breached_at')
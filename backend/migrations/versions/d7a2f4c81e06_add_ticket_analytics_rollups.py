@@ -0,0 +1,41 @@
+"""Add ticket analytics rollup tables
+
+Revision ID: d7a2f4c81e06
+Revises: b41e7c92d5a3
+Create Date: 2026-10-18 11:03:27.514092
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a2f4c81e06'
+down_revision = 'b41e7c92d5a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ticket_daily_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('dimension', sa.String(length=20), nullable=False),
+    sa.Column('bucket', sa.String(length=50), nullable=False),
+    sa.Column('created', sa.Integer(), nullable=False),
+    sa.Column('net_change', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'dimension', 'bucket')
+    )
+    op.create_table('ticket_daily_resolutions',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('resolved_count', sa.Integer(), nullable=False),
+    sa.Column('resolve_seconds', sa.BigInteger(), nullable=False),
+    sa.Column('rating_count', sa.Integer(), nullable=False),
+    sa.Column('rating_sum', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    # Existing tickets are backfilled with `flask rebuild-ticket-rollups`
+
+
+def downgrade():
+    op.drop_table('ticket_daily_resolutions')
+    op.drop_table('ticket_daily_stats')
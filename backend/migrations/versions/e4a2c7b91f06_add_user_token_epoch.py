@@ -0,0 +1,26 @@
+"""Add a per-user token epoch for revoking every token a user holds
+
+Revision ID: e4a2c7b91f06
+Revises: d3f71a9c5e28
+Create Date: 2026-10-18 23:05:12.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a2c7b91f06'
+down_revision = 'd3f71a9c5e28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('token_epoch', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('token_epoch')
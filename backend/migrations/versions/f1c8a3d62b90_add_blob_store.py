@@ -0,0 +1,44 @@
+"""Add content-addressed blob store for attachments
+
+Revision ID: f1c8a3d62b90
+Revises: e93b1d5f0a47
+Create Date: 2026-10-18 12:41:27.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c8a3d62b90'
+down_revision = 'e93b1d5f0a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('blobs',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('content_type', sa.String(length=255), nullable=True),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('last_used_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    op.create_index('ix_blobs_ref_count_last_used', 'blobs', ['ref_count', 'last_used_at'], unique=False)
+
+    with op.batch_alter_table('attachments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('blob_sha256', sa.String(length=64), nullable=True))
+        batch_op.create_foreign_key('fk_attachments_blob_sha256', 'blobs', ['blob_sha256'], ['sha256'])
+        batch_op.create_index('ix_attachments_blob_sha256', ['blob_sha256'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('attachments', schema=None) as batch_op:
+        batch_op.drop_index('ix_attachments_blob_sha256')
+        batch_op.drop_constraint('fk_attachments_blob_sha256', type_='foreignkey')
+        batch_op.drop_column('blob_sha256')
+
+    op.drop_index('ix_blobs_ref_count_last_used', table_name='blobs')
+    op.drop_table('blobs')
@@ -9,6 +9,8 @@ from .ticket import Ticket, Comment, Attachment, TicketStatusEnum, PriorityEnum
 from .kb_article import KBArticle
 from .audit_log import AuditLog
 from .settings import Setting
+from .revoked_token import RevokedToken
+from .blob import Blob
 
 # Optional modules (import only if you have these files)
 try:
@@ -28,5 +30,7 @@ __all__ = [
     "Ticket", "Comment", "Attachment", "TicketStatusEnum", "PriorityEnum",
     "KBArticle",
     "AuditLog",
-    "Setting"
+    "Setting",
+    "RevokedToken",
+    "Blob"
 ]
@@ -0,0 +1,272 @@
+from datetime import datetime, timedelta
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from utils.upsert import increment
+from . import db
+from .ticket import Ticket
+
+__all__ = ["TicketDailyStat", "TicketDailyResolution"]
+
+
+# Rollups are kept per day so the dashboard reads O(days) rows instead of
+# scanning the tickets table. They are maintained in the same transaction as
+# the ticket change (see the after_flush hook below).
+
+class TicketDailyStat(db.Model):
+    """
+    One row per (day, dimension, bucket), e.g. (2025-09-01, "status", "open").
+    created    - tickets created that day that landed in this bucket
+    net_change - tickets that entered minus tickets that left this bucket that day;
+                 summing it over all days gives the current count per bucket
+    """
+    __tablename__ = "ticket_daily_stats"
+    day = db.Column(db.Date, primary_key=True)
+    dimension = db.Column(db.String(20), primary_key=True)  # status | priority | department
+    bucket = db.Column(db.String(50), primary_key=True)
+    created = db.Column(db.Integer, nullable=False, default=0)
+    net_change = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<TicketDailyStat {self.day} {self.dimension}={self.bucket}>"
+
+
+class TicketDailyResolution(db.Model):
+    """
+    Resolution time and rating sums per day the ticket was resolved,
+    so means can be computed as sum / count over any range of days.
+    """
+    __tablename__ = "ticket_daily_resolutions"
+    day = db.Column(db.Date, primary_key=True)
+    resolved_count = db.Column(db.Integer, nullable=False, default=0)
+    resolve_seconds = db.Column(db.BigInteger, nullable=False, default=0)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<TicketDailyResolution {self.day}>"
+
+
+DIMENSIONS = {
+    "status": lambda value: value.value if value is not None else "none",
+    "priority": lambda value: value.value if value is not None else "none",
+    "department_id": lambda value: str(value) if value is not None else "none",
+}
+
+# Everything the rollups depend on
+TRACKED = list(DIMENSIONS) + ["resolved_at", "rating"]
+
+
+def _dimension_name(attr):
+    return "department" if attr == "department_id" else attr
+
+
+def _bump_stat(conn, day, attr, value, created=0, net_change=0):
+    increment(
+        conn, TicketDailyStat.__table__,
+        {"day": day, "dimension": _dimension_name(attr), "bucket": DIMENSIONS[attr](value)},
+        {"created": created, "net_change": net_change},
+    )
+
+
+def _bump_resolution(conn, day, resolved=0, seconds=0, ratings=0, rating_sum=0):
+    increment(
+        conn, TicketDailyResolution.__table__,
+        {"day": day},
+        {"resolved_count": resolved, "resolve_seconds": seconds,
+         "rating_count": ratings, "rating_sum": rating_sum},
+    )
+
+
+def _resolve_seconds(created_at, resolved_at):
+    return max(int((resolved_at - created_at).total_seconds()), 0)
+
+
+def _rating_day(created_at, resolved_at):
+    # Ratings are filed under the day the ticket was resolved
+    return (resolved_at or created_at).date()
+
+
+def _old_and_new(state, attr):
+    """
+    (old, new) for an attribute changed in this flush, or None if unchanged.
+    """
+    hist = state.attrs[attr].history
+    if not hist.has_changes():
+        return None
+    old = hist.deleted[0] if hist.deleted else None
+    new = hist.added[0] if hist.added else None
+    return old, new
+
+
+def _record_new(conn, ticket):
+    day = ticket.created_at.date()
+    for attr in DIMENSIONS:
+        _bump_stat(conn, day, attr, getattr(ticket, attr), created=1, net_change=1)
+    if ticket.resolved_at:
+        _bump_resolution(conn, ticket.resolved_at.date(), resolved=1,
+                         seconds=_resolve_seconds(ticket.created_at, ticket.resolved_at))
+    if ticket.rating:
+        _bump_resolution(conn, _rating_day(ticket.created_at, ticket.resolved_at), ratings=1, rating_sum=ticket.rating)
+
+
+def _change_bumps(created_at, old, new, today):
+    """
+    Rollup adjustments for one ticket going from `old` to `new` (dicts of
+    the TRACKED attributes), as ("stat", day, attr, value, net_change) and
+    ("resolution", day, resolved, seconds, ratings, rating_sum) tuples.
+    """
+    for attr in DIMENSIONS:
+        if old[attr] != new[attr]:
+            yield ("stat", today, attr, old[attr], -1)
+            yield ("stat", today, attr, new[attr], 1)
+
+    old_resolved, new_resolved = old["resolved_at"], new["resolved_at"]
+    old_rating, new_rating = old["rating"], new["rating"]
+
+    # Take the old rating out before the resolution it was filed under moves
+    if old_rating != new_rating or old_resolved != new_resolved:
+        if old_rating:
+            yield ("resolution", _rating_day(created_at, old_resolved), 0, 0, -1, -old_rating)
+        if new_rating:
+            yield ("resolution", _rating_day(created_at, new_resolved), 0, 0, 1, new_rating)
+
+    if old_resolved != new_resolved:
+        if old_resolved:
+            yield ("resolution", old_resolved.date(), -1, -_resolve_seconds(created_at, old_resolved), 0, 0)
+        if new_resolved:
+            yield ("resolution", new_resolved.date(), 1, _resolve_seconds(created_at, new_resolved), 0, 0)
+
+
+def _record_change(conn, ticket, state, today):
+    old, new = {}, {}
+    for attr in TRACKED:
+        change = _old_and_new(state, attr)
+        old[attr], new[attr] = change or (getattr(ticket, attr), getattr(ticket, attr))
+    for bump in _change_bumps(ticket.created_at, old, new, today):
+        if bump[0] == "stat":
+            _bump_stat(conn, bump[1], bump[2], bump[3], net_change=bump[4])
+        else:
+            _bump_resolution(conn, bump[1], *bump[2:])
+
+
+def record_bulk_changes(conn, changes):
+    """
+    Rollups for a set-based UPDATE that bypassed the flush hook.
+    `changes` is [(created_at, old, new)] with old/new dicts of the TRACKED
+    attributes; adjustments are summed so each bucket is written once.
+    """
+    today = datetime.utcnow().date()
+    stats, resolutions = {}, {}
+    for created_at, old, new in changes:
+        for bump in _change_bumps(created_at, old, new, today):
+            if bump[0] == "stat":
+                key = (bump[1], bump[2], bump[3])
+                stats[key] = stats.get(key, 0) + bump[4]
+            else:
+                totals = resolutions.setdefault(bump[1], [0, 0, 0, 0])
+                for i, amount in enumerate(bump[2:]):
+                    totals[i] += amount
+
+    for (day, attr, value), net_change in stats.items():
+        _bump_stat(conn, day, attr, value, net_change=net_change)
+    for day, totals in resolutions.items():
+        _bump_resolution(conn, day, *totals)
+
+
+def _record_deleted(conn, ticket, today):
+    for attr in DIMENSIONS:
+        _bump_stat(conn, today, attr, getattr(ticket, attr), net_change=-1)
+    if ticket.resolved_at:
+        _bump_resolution(conn, ticket.resolved_at.date(), resolved=-1,
+                         seconds=-_resolve_seconds(ticket.created_at, ticket.resolved_at))
+    if ticket.rating:
+        _bump_resolution(conn, _rating_day(ticket.created_at, ticket.resolved_at), ratings=-1, rating_sum=-ticket.rating)
+
+
+def _load_old_value(target, value, oldvalue, initiator):
+    return value
+
+
+# active_history makes the ORM load the previous value on assignment, so the
+# hook below always knows which bucket a ticket is leaving
+for _attr in TRACKED:
+    event.listen(getattr(Ticket, _attr), "set", _load_old_value, active_history=True, retval=True)
+
+
+@event.listens_for(Session, "after_flush")
+def _update_ticket_rollups(session, flush_context):
+    # History is still available in after_flush, and the rollup writes join
+    # the ticket change's transaction, so they commit or roll back together.
+    new = [o for o in session.new if isinstance(o, Ticket)]
+    dirty = [o for o in session.dirty if isinstance(o, Ticket)]
+    deleted = [o for o in session.deleted if isinstance(o, Ticket)]
+    if not (new or dirty or deleted):
+        return
+
+    conn = session.connection()
+    today = datetime.utcnow().date()
+    for ticket in new:
+        _record_new(conn, ticket)
+    for ticket in dirty:
+        _record_change(conn, ticket, inspect(ticket), today)
+    for ticket in deleted:
+        _record_deleted(conn, ticket, today)
+
+
+def rebuild_ticket_rollups():
+    """
+    Recompute every rollup from the tickets table (backfill or repair).
+    Current bucket membership is filed under each ticket's creation day.
+    Caller commits.
+    """
+    conn = db.session.connection()
+    conn.execute(TicketDailyStat.__table__.delete())
+    conn.execute(TicketDailyResolution.__table__.delete())
+
+    for ticket in Ticket.query.yield_per(1000):
+        _record_new(conn, ticket)
+
+
+def load_ticket_stats(days=30):
+    """
+    Dashboard numbers read straight from the rollups.
+    Returns current counts per status/priority/department, a per-day series
+    for the last `days` days, mean time-to-resolve and average rating.
+    """
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+
+    totals = {"status": {}, "priority": {}, "department": {}}
+    created_by_day = {}
+    for row in TicketDailyStat.query.all():
+        bucket_counts = totals[row.dimension]
+        bucket_counts[row.bucket] = bucket_counts.get(row.bucket, 0) + row.net_change
+        if row.dimension == "status" and row.day >= since:
+            created_by_day[row.day] = created_by_day.get(row.day, 0) + row.created
+
+    resolved_by_day = {}
+    resolved = seconds = ratings = rating_sum = 0
+    for row in TicketDailyResolution.query.all():
+        resolved += row.resolved_count
+        seconds += row.resolve_seconds
+        ratings += row.rating_count
+        rating_sum += row.rating_sum
+        if row.day >= since:
+            resolved_by_day[row.day] = row.resolved_count
+
+    daily = []
+    for offset in range(days):
+        day = since + timedelta(days=offset)
+        daily.append({
+            "day": day.isoformat(),
+            "created": created_by_day.get(day, 0),
+            "resolved": resolved_by_day.get(day, 0),
+        })
+
+    return {
+        "by_status": {k: v for k, v in totals["status"].items() if v},
+        "by_priority": {k: v for k, v in totals["priority"].items() if v},
+        "by_department": {k: v for k, v in totals["department"].items() if v},
+        "daily": daily,
+        "mean_time_to_resolve_hours": round(seconds / resolved / 3600, 2) if resolved else None,
+        "average_rating": round(rating_sum / ratings, 2) if ratings else None,
+    }
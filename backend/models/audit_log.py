@@ -11,5 +11,11 @@ class AuditLog(db.Model):
     details = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Time-range listing, and per-user history within a time range
+        db.Index("ix_audit_logs_created", "created_at", "id"),
+        db.Index("ix_audit_logs_user_created", "user_id", "created_at", "id"),
+    )
+
     def __repr__(self):
         return f"<AuditLog {self.action} by {self.user_id}>"
@@ -0,0 +1,51 @@
+from datetime import datetime
+from sqlalchemy import event, update
+from . import db
+from .ticket import Attachment
+
+
+class Blob(db.Model):
+    """
+    One stored file, addressed by the SHA-256 of its content.
+    ref_count is the number of attachments pointing at it; blobs at zero
+    are removed by `flask gc-blobs` once they have been unused for a while.
+    """
+    __tablename__ = "blobs"
+    sha256 = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    content_type = db.Column(db.String(255), nullable=True)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_blobs_ref_count_last_used", "ref_count", "last_used_at"),
+    )
+
+    def __repr__(self):
+        return f"<Blob {self.sha256[:12]} refs={self.ref_count}>"
+
+
+def _adjust_refs(conn, sha256, delta):
+    blobs = Blob.__table__
+    conn.execute(
+        update(blobs)
+        .where(blobs.c.sha256 == sha256)
+        .values(ref_count=blobs.c.ref_count + delta, last_used_at=datetime.utcnow())
+    )
+
+
+# Reference counts move with attachment rows in the same transaction.
+# Set-based deletes of attachments bypass these hooks and must adjust
+# ref_count themselves.
+
+@event.listens_for(Attachment, "after_insert")
+def _attachment_inserted(mapper, conn, target):
+    if target.blob_sha256:
+        _adjust_refs(conn, target.blob_sha256, 1)
+
+
+@event.listens_for(Attachment, "after_delete")
+def _attachment_deleted(mapper, conn, target):
+    if target.blob_sha256:
+        _adjust_refs(conn, target.blob_sha256, -1)
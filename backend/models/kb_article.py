@@ -2,6 +2,10 @@ from datetime import datetime
 from . import db
 from .user import User
 
+# See models/ticket.py: Postgres full-text index expression
+KB_SEARCH_VECTOR = "to_tsvector('english', coalesce(title, '') || ' ' || body || ' ' || coalesce(tags, ''))"
+
+
 class KBArticle(db.Model):
     __tablename__ = "kb_articles"
     id = db.Column(db.Integer, primary_key=True)
@@ -14,5 +18,9 @@ class KBArticle(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index("ix_kb_articles_search", db.text(KB_SEARCH_VECTOR), postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+
     def __repr__(self):
         return f"<KBArticle {self.title[:30]}>"
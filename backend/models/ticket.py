@@ -15,6 +15,13 @@ class PriorityEnum(enum.Enum):
     high = "high"
     urgent = "urgent"
 
+# Full-text search on Postgres uses GIN indexes on these expressions; the
+# search queries must use the exact same expressions (services/search.py).
+# SQLite uses an FTS5 table instead.
+TICKET_SEARCH_VECTOR = "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, ''))"
+COMMENT_SEARCH_VECTOR = "to_tsvector('english', body)"
+
+
 class Ticket(db.Model):
     __tablename__ = "tickets"
     id = db.Column(db.Integer, primary_key=True)
@@ -33,6 +40,7 @@ class Ticket(db.Model):
     department = db.relationship("Department", backref=db.backref("tickets", lazy="dynamic"))
 
     sla_due = db.Column(db.DateTime, nullable=True)
+    sla_breached_at = db.Column(db.DateTime, nullable=True)  # set once by the SLA engine (services/sla.py)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -42,6 +50,27 @@ class Ticket(db.Model):
     resolved_at = db.Column(db.DateTime, nullable=True)
     rating = db.Column(db.Integer, nullable=True)  # 1–5 stars
 
+    # Shaped to the list endpoints: equality column first, then the (created_at, id) page key
+    __table_args__ = (
+        db.Index("ix_tickets_assigned_to_created", "assigned_to_id", "created_at", "id"),
+        db.Index("ix_tickets_created_by_created", "created_by_id", "created_at", "id"),
+        db.Index("ix_tickets_department_created", "department_id", "created_at", "id"),
+        db.Index("ix_tickets_created", "created_at", "id"),
+        db.Index("ix_tickets_search", db.text(TICKET_SEARCH_VECTOR), postgresql_using="gin").ddl_if(dialect="postgresql"),
+        # Deadlines the SLA scheduler still has to watch (services/sla.py)
+        db.Index(
+            "ix_tickets_sla_pending", "sla_due",
+            sqlite_where=db.text("sla_breached_at IS NULL AND sla_due IS NOT NULL"),
+            postgresql_where=db.text("sla_breached_at IS NULL AND sla_due IS NOT NULL"),
+        ),
+        # Partial index for the unassigned queue (full index on backends without partial indexes)
+        db.Index(
+            "ix_tickets_unassigned_created", "created_at", "id",
+            sqlite_where=db.text("assigned_to_id IS NULL"),
+            postgresql_where=db.text("assigned_to_id IS NULL"),
+        ),
+    )
+
     def __repr__(self):
         return f"<Ticket {self.id} - {self.title[:30]}>"
 
@@ -57,6 +86,11 @@ class Comment(db.Model):
     # 🔗 Add this relationship
     attachments = db.relationship("Attachment", backref="comment", lazy=True)
 
+    __table_args__ = (
+        db.Index("ix_comments_ticket_created", "ticket_id", "created_at"),
+        db.Index("ix_comments_search", db.text(COMMENT_SEARCH_VECTOR), postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+
     def __repr__(self):
         return f"<Comment {self.id} on Ticket {self.ticket_id}>"
 
@@ -68,11 +102,19 @@ class Attachment(db.Model):
     comment_id = db.Column(db.Integer, db.ForeignKey("comments.id"), nullable=True)
     filename = db.Column(db.String(512), nullable=False)
     file_path = db.Column(db.String(1024), nullable=False)
+    # Content-addressed storage; NULL for files saved before the blob store
+    blob_sha256 = db.Column(db.String(64), db.ForeignKey("blobs.sha256"), nullable=True)
     content_type = db.Column(db.String(255), nullable=True)
     size = db.Column(db.Integer, nullable=True)
     uploaded_by_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
     uploaded_by = db.relationship("User")
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index("ix_attachments_ticket_id", "ticket_id"),
+        db.Index("ix_attachments_comment_id", "comment_id"),
+        db.Index("ix_attachments_blob_sha256", "blob_sha256"),
+    )
+
     def __repr__(self):
         return f"<Attachment {self.filename} for Ticket {self.ticket_id}>"
@@ -1,8 +1,8 @@
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 import enum
 
 from extensions import db  # import db from extensions.py
+from services.passwords import hash_password, verify_password
 
 class RoleEnum(enum.Enum):
     super_admin = "super_admin"
@@ -39,11 +39,19 @@ class User(db.Model):
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Carried in issued tokens; bumping it revokes them all (services/token_store.py)
+    token_epoch = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    # Role checks are almost always scoped to a department (admin/agent lookups)
+    __table_args__ = (
+        db.Index("ix_users_role_department", "role", "department_id"),
+    )
+
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)[0]
 
     def is_admin(self):
         return self.role in {RoleEnum.admin, RoleEnum.super_admin}
@@ -9,6 +9,11 @@ from .admin_routes import admin_bp
 from .customer_routes import customer_bp
 from .agent_routes import agent_bp
 from .ticket_routes import ticket_bp
+from .analytics_routes import analytics_bp
+from .audit_routes import audit_bp
+from .search_routes import search_bp
+from .kb_routes import kb_bp
+from .settings_routes import settings_bp
 
 
 
@@ -20,4 +25,9 @@ def register_routes(app):
     app.register_blueprint(admin_bp)
     app.register_blueprint(customer_bp)
     app.register_blueprint(agent_bp)
+    app.register_blueprint(analytics_bp)
+    app.register_blueprint(audit_bp)
+    app.register_blueprint(search_bp)
+    app.register_blueprint(kb_bp)
+    app.register_blueprint(settings_bp)
 
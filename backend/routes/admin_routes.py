@@ -1,13 +1,29 @@
 
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm import joinedload
 from extensions import db
 from models.ticket import Ticket
 from models.user import User, RoleEnum, Department
-from werkzeug.security import generate_password_hash
+from schemas import STREAM_QUERY_BATCH, TicketSchema, UserSchema, parse_fields, stream_array
+from services.passwords import hash_password
+from services.ticket_queries import paginate_tickets
+from utils.auth import claims_required, get_current_principal, get_current_user, role_required
+from services.audit import audit
+from services.assignment import auto_assign_backlog, pick_agent
+from services.ticket_bulk import (
+    bulk_assign, bulk_update, parse_status_and_priority, parse_ticket_ids, publish_bulk_states
+)
+from services.user_import import MAX_IMPORT_ROWS, UserImporter, request_rows
 
 admin_bp = Blueprint("admin_bp", __name__)
 
+agent_list_schema = UserSchema(only=(
+    "id", "name", "email", "role", "department", "is_active", "created_at", "created_by"
+))
+# Default columns of /admin/tickets; ?fields= picks any of TicketSchema's
+TICKET_LIST_FIELDS = ("id", "title", "description", "department", "assigned_to", "status", "created_at")
+
 
 
 # --------------------------------------
@@ -15,14 +31,9 @@ admin_bp = Blueprint("admin_bp", __name__)
 # --------------------------------------
  
 @admin_bp.route("/admin/create-agent", methods=["POST"])
-@jwt_required()
+@role_required(RoleEnum.admin, error="Only admins can create agents")
 def create_agent():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
- 
-    # Ensure only admins can create agents
-    if not user or user.role != RoleEnum.admin:
-        return jsonify({"error": "Only admins can create agents"}), 403
+    user = get_current_user()
  
     data = request.get_json()
     if not data:
@@ -43,7 +54,7 @@ def create_agent():
         return jsonify({"error": "Email already exists"}), 409
  
     # Hash password
-    hashed_password = generate_password_hash(data["password"])
+    hashed_password = hash_password(data["password"])
  
     # Create new agent
     new_agent = User(
@@ -52,11 +63,13 @@ def create_agent():
         password_hash=hashed_password,
         role=RoleEnum.agent,
         is_active=True,
-        created_by=current_user_id,
+        created_by=user.id,
         department_id=department_id  # agent tied to admin’s department
     )
  
     db.session.add(new_agent)
+    db.session.flush()
+    audit(user.id, "user.create", {"user_id": new_agent.id, "role": "agent"})
     db.session.commit()
  
     department = Department.query.get(department_id)
@@ -69,18 +82,34 @@ def create_agent():
  
  
  
+# --------------------------------------
+# Route: Import Agents in bulk (Only Admin)
+# Body: CSV (text/csv) or JSON Lines (application/x-ndjson) with
+# name,email,password per row, or {"users": [...]}; all join the
+# admin's department. Returns created users and per-row errors.
+# --------------------------------------
+@admin_bp.route("/admin/import-agents", methods=["POST"])
+@role_required(RoleEnum.admin, error="Only admins can create agents")
+def import_agents():
+    user = get_current_user()
+    if not user.department_id:
+        return jsonify({"error": "Admin is not assigned to any department"}), 400
+    try:
+        rows = request_rows(request)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    report = UserImporter(user, max_rows=MAX_IMPORT_ROWS).run(rows)
+    return jsonify(report), 200
+
+
 # -------------------------------
 # Route: Get Agents (Admin & Superadmin)
 # -------------------------------
 @admin_bp.route('/admin/agents', methods=['GET'])
-@jwt_required()
+@claims_required(RoleEnum.admin, RoleEnum.super_admin, error='Unauthorized')
 def get_agents():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
- 
-    # Allow only Admins and Superadmins
-    if not user or user.role not in [RoleEnum.admin, RoleEnum.super_admin]:
-        return jsonify({'error': 'Unauthorized'}), 403
+    user = get_current_principal()
  
     # Base query: only agents
     query = User.query.filter_by(role=RoleEnum.agent)
@@ -97,22 +126,9 @@ def get_agents():
     # ⚡ Removed manual department_id filter from query params
     # Because department is auto-tied to admin's department
  
-    agents = query.all()
- 
-    result = []
-    for agent in agents:
-        result.append({
-            'id': agent.id,
-            'name': agent.name,
-            'email': agent.email,
-            'role': agent.role.value,
-            'department': agent.department.name if agent.department else None,
-            'is_active': agent.is_active,
-            'created_at': agent.created_at.strftime('%Y-%m-%d %H:%M:%S') if agent.created_at else None,
-            'created_by': agent.created_by
-        })
- 
-    return jsonify({'agents': result}), 200
+    # Unpaged: streamed as the rows arrive
+    agents = query.options(joinedload(User.department)).order_by(User.id).yield_per(STREAM_QUERY_BATCH)
+    return stream_array('agents', agents, agent_list_schema)
  
  
 # --------------------------------------
@@ -120,20 +136,12 @@ def get_agents():
 # --------------------------------------
  
 @admin_bp.route("/admin/tickets/<int:ticket_id>/assign", methods=["PUT"])
-@jwt_required()
+@role_required(RoleEnum.admin, error="Only admins can assign tickets")
 def assign_ticket_to_agent(ticket_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-
-    # Only Admins can assign tickets
-    if not user or user.role != RoleEnum.admin:
-        return jsonify({"error": "Only admins can assign tickets"}), 403
+    user = get_current_user()
 
     data = request.get_json() or {}
-    agent_id = data.get("agent_id")
-
-    if not agent_id:
-        return jsonify({"error": "agent_id is required"}), 400
+    agent_id = data.get("agent_id")  # optional; least-loaded agent when omitted
 
     # Check if ticket exists
     ticket = Ticket.query.get(ticket_id)
@@ -152,6 +160,11 @@ def assign_ticket_to_agent(ticket_id):
         # If no department assigned yet, default to admin's department
         ticket.department_id = user.department_id
 
+    if not agent_id:
+        agent_id = pick_agent(user.department_id)
+        if agent_id is None:
+            return jsonify({"error": "No active agents in your department"}), 400
+
     # Validate agent
     agent = User.query.get(agent_id)
     if not agent or agent.role != RoleEnum.agent:
@@ -161,6 +174,9 @@ def assign_ticket_to_agent(ticket_id):
 
     # Assign ticket
     ticket.assigned_to_id = agent.id
+    audit(user.id, "ticket.assign", {
+        "ticket_id": ticket.id, "assigned_to_id": agent.id, "department_id": ticket.department_id
+    })
     db.session.commit()
 
     return jsonify({
@@ -176,46 +192,116 @@ def assign_ticket_to_agent(ticket_id):
 
  
 
+# --------------------------------------
+# Route: Auto-assign the unassigned backlog to the least-loaded agents (Admin only)
+# --------------------------------------
+
+MAX_AUTO_ASSIGN = 500
+
+@admin_bp.route("/admin/tickets/auto-assign", methods=["POST"])
+@role_required(RoleEnum.admin, error="Only admins can assign tickets")
+def auto_assign_tickets():
+    user = get_current_user()
+    data = request.get_json(silent=True) or {}
+    try:
+        limit = int(data.get("limit", 50))
+    except (TypeError, ValueError):
+        return jsonify({"error": "limit must be an integer"}), 400
+    if limit < 1:
+        return jsonify({"error": "limit must be at least 1"}), 400
+
+    assigned = auto_assign_backlog(user.department_id, min(limit, MAX_AUTO_ASSIGN))
+    for ticket, agent_id in assigned:
+        audit(user.id, "ticket.assign", {
+            "ticket_id": ticket.id, "assigned_to_id": agent_id,
+            "department_id": ticket.department_id, "auto": True
+        })
+    db.session.commit()
+
+    return jsonify({
+        "message": f"{len(assigned)} tickets assigned",
+        "assigned": [{"ticket_id": t.id, "assigned_to_id": agent_id} for t, agent_id in assigned]
+    }), 200
+
+
+# --------------------------------------
+# Route: Assign many tickets at once (Admin only)
+# Body: {"ticket_ids": [...], "agent_id": optional}; results per ticket
+# --------------------------------------
+
+@admin_bp.route("/admin/tickets/bulk-assign", methods=["POST"])
+@role_required(RoleEnum.admin, error="Only admins can assign tickets")
+def bulk_assign_tickets():
+    user = get_current_user()
+    data = request.get_json() or {}
+    try:
+        ticket_ids = parse_ticket_ids(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    results, error = bulk_assign(user, ticket_ids, user.department_id, data.get("agent_id"))
+    if error:
+        return jsonify({"error": error}), 400
+    db.session.commit()
+
+    return jsonify({"results": results, "updated": sum(r["ok"] for r in results)}), 200
+
+
+# --------------------------------------
+# Route: Change status/priority of many tickets at once (Admin only)
+# Body: {"ticket_ids": [...], "status": optional, "priority": optional}
+# --------------------------------------
+
+@admin_bp.route("/admin/tickets/bulk-update", methods=["POST"])
+@role_required(RoleEnum.admin, error="Only admins can update tickets")
+def bulk_update_tickets():
+    data = request.get_json() or {}
+    try:
+        ticket_ids = parse_ticket_ids(data)
+        status, priority = parse_status_and_priority(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    results = bulk_update(get_current_user(), ticket_ids, status, priority)
+    db.session.commit()
+    publish_bulk_states(results)
+
+    return jsonify({"results": results, "updated": sum(r.get("changed", False) for r in results)}), 200
+
+
 # --------------------------------------
 # Route: Get List Assigned and Unassigned  Ticket to  Admin only
 # --------------------------------------
 
 @admin_bp.route("/admin/tickets", methods=["GET"])
-@jwt_required()
+@claims_required(RoleEnum.admin, error="Only admins can view tickets")
 def get_tickets_for_admin():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-
-    # Only admins can access this
-    if not user or user.role != RoleEnum.admin:
-        return jsonify({"error": "Only admins can view tickets"}), 403
-
-    # Query unassigned tickets (with no assigned_to_id) in admin’s department
-    unassigned_tickets = Ticket.query.filter(
-        # Ticket.department_id == user.department_id,
-        Ticket.department_id.is_(None),
-        Ticket.assigned_to_id.is_(None)
-    ).all()
-
-    # Query assigned tickets (with assigned_to_id not null) in admin’s department
-    assigned_tickets = Ticket.query.filter(
-        Ticket.department_id == user.department_id,
-        Ticket.assigned_to_id.isnot(None)
-    ).all()
-
-    # Serialize both lists
-    def serialize_ticket(ticket):
-        return {
-            "id": ticket.id,
-            "title": ticket.title,
-            "description": ticket.description,
-            "department": ticket.department.name if ticket.department else None,
-            "assigned_to": ticket.assigned_to.name if ticket.assigned_to else None,
-            "status": ticket.status.value if ticket.status else None,
-            "created_at": ticket.created_at.strftime('%Y-%m-%d %H:%M:%S') if ticket.created_at else None
-        }
+    user = get_current_principal()
+
+    # Each list is paged on its own cursor (unassigned_cursor / assigned_cursor);
+    # status/priority filters and ?fields= from the query string apply to both
+    try:
+        fields = parse_fields(request.args, TICKET_LIST_FIELDS, TicketSchema.field_names)
+
+        # Query unassigned tickets (with no assigned_to_id) in admin’s department
+        unassigned_tickets, unassigned_next = paginate_tickets(Ticket.query.filter(
+            # Ticket.department_id == user.department_id,
+            Ticket.department_id.is_(None),
+            Ticket.assigned_to_id.is_(None)
+        ), request.args, cursor_param="unassigned_cursor", fields=fields)
+
+        # Query assigned tickets (with assigned_to_id not null) in admin’s department
+        assigned_tickets, assigned_next = paginate_tickets(Ticket.query.filter(
+            Ticket.department_id == user.department_id,
+            Ticket.assigned_to_id.isnot(None)
+        ), request.args, cursor_param="assigned_cursor", fields=fields)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
+    schema = TicketSchema.for_rows(fields)
     return jsonify({
-        "unassigned_tickets": [serialize_ticket(t) for t in unassigned_tickets],
-        "assigned_tickets": [serialize_ticket(t) for t in assigned_tickets]
+        "unassigned_tickets": schema.dump_many(unassigned_tickets),
+        "assigned_tickets": schema.dump_many(assigned_tickets),
+        "unassigned_next_cursor": unassigned_next,
+        "assigned_next_cursor": assigned_next
     }), 200
@@ -6,44 +6,40 @@ from werkzeug.utils import secure_filename
 from extensions import db
 from models.ticket import Ticket, PriorityEnum, Attachment
 from models.user import User, RoleEnum
+from schemas import AttachmentSchema, TicketSchema, parse_fields
+from services.ticket_queries import paginate_tickets, with_attachments
+from utils.auth import claims_required, get_current_principal
 
 
 agent_bp = Blueprint("agent_bp", __name__)
 
+# Default fields of /agent/tickets; ?fields= picks any of TicketSchema's and "attachments"
+TICKET_LIST_FIELDS = ("id", "title", "priority", "status", "created_by", "assigned_to", "attachments")
+TICKET_LIST_ALLOWED = (*TicketSchema.field_names, "attachments")
+attachment_schema = AttachmentSchema(only=("id", "filename", "content_type", "size", "uploaded_by"))
+
 # ========================
 # Agent: Get Assigned Tickets (with attachments)
 # ========================
 @agent_bp.route("/agent/tickets", methods=["GET"])
-@jwt_required()
+@claims_required(RoleEnum.agent, error="Only agents can view assigned tickets")
 def get_agent_tickets():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-
-    if not user or user.role != RoleEnum.agent:
-        return jsonify({"error": "Only agents can view assigned tickets"}), 403
+    user = get_current_principal()
 
-    tickets = Ticket.query.filter_by(assigned_to_id=user.id).all()
+    # One keyset page of the requested columns, plus attachments (one more query) if asked for
+    try:
+        fields = parse_fields(request.args, TICKET_LIST_FIELDS, TICKET_LIST_ALLOWED)
+        page, next_cursor = paginate_tickets(Ticket.query.filter_by(assigned_to_id=user.id), request.args, fields=fields)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    schema = TicketSchema.for_rows(tuple(f for f in fields if f != "attachments"))
 
+    if "attachments" not in fields:
+        return jsonify({"tickets": schema.dump_many(page), "next_cursor": next_cursor}), 200
     return jsonify({
         "tickets": [
-            {
-                "id": t.id,
-                "title": t.title,
-                "priority": t.priority.value,
-                "status": t.status.value,
-                "created_by": User.query.get(t.created_by_id).name if t.created_by_id else None,
-                "assigned_to": user.name,
-                "attachments": [
-                    {
-                        "id": a.id,
-                        "filename": a.filename,
-                        "content_type": a.content_type,
-                        "size": a.size,
-                        "uploaded_by": User.query.get(a.uploaded_by_id).name if a.uploaded_by_id else None
-                    }
-                    for a in t.attachments
-                ]
-            }
-            for t in tickets
-        ]
+            {**schema.dump(t), "attachments": attachment_schema.dump_many(attachments)}
+            for t, attachments in with_attachments(page)
+        ],
+        "next_cursor": next_cursor
     }), 200
\ No newline at end of file
@@ -0,0 +1,39 @@
+from flask import Blueprint, request, jsonify
+from models.user import RoleEnum, Department
+from models.analytics import load_ticket_stats
+from utils.auth import claims_required
+
+analytics_bp = Blueprint("analytics_bp", __name__)
+
+
+# --------------------------------------
+# Route: Ticket statistics for the analysis dashboard (Superadmin only)
+# --------------------------------------
+
+@analytics_bp.route("/api/tickets/stats", methods=["GET"])
+@claims_required(RoleEnum.super_admin, error="Access denied")
+def get_ticket_stats():
+    days = request.args.get("days", 30, type=int)
+    if days < 1 or days > 366:
+        return jsonify({"error": "days must be between 1 and 366"}), 400
+
+    # Reads the daily rollups only; never scans the tickets table
+    stats = load_ticket_stats(days)
+
+    # Rollups are keyed by department id; show names on the dashboard
+    dept_ids = [int(k) for k in stats["by_department"] if k != "none"]
+    names = {str(d.id): d.name for d in Department.query.filter(Department.id.in_(dept_ids))} if dept_ids else {}
+    stats["by_department"] = {
+        names.get(k, "Unassigned" if k == "none" else k): v
+        for k, v in stats["by_department"].items()
+    }
+
+    by_status = stats["by_status"]
+    return jsonify({
+        "total": sum(by_status.values()),
+        "open": by_status.get("open", 0),
+        "in_progress": by_status.get("in_progress", 0),
+        "resolved": by_status.get("resolved", 0),
+        "closed": by_status.get("closed", 0),
+        **stats
+    }), 200
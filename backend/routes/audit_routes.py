@@ -0,0 +1,34 @@
+from flask import Blueprint, request, jsonify
+from models.user import RoleEnum
+from schemas import format_datetime
+from services.audit import query_audit_logs
+from utils.auth import claims_required
+
+audit_bp = Blueprint("audit_bp", __name__)
+
+
+# --------------------------------------
+# Route: Browse the audit trail (Superadmin only)
+# --------------------------------------
+
+@audit_bp.route("/api/audit-logs", methods=["GET"])
+@claims_required(RoleEnum.super_admin, error="Access denied")
+def get_audit_logs():
+    try:
+        entries, next_cursor = query_audit_logs(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "audit_logs": [
+            {
+                "id": e.id,
+                "user_id": e.user_id,
+                "action": e.action,
+                "details": e.details,
+                "created_at": format_datetime(e.created_at)
+            }
+            for e in entries
+        ],
+        "next_cursor": next_cursor
+    }), 200
@@ -5,18 +5,54 @@ from flask_jwt_extended import (
     get_jwt_identity, get_jwt
 )
 from models.user import User, db, RoleEnum # Your User model
-from werkzeug.security import check_password_hash, generate_password_hash
+from services.passwords import HashPoolBusy, hash_password, verify_password
+from services.user_cache import invalidate_user
+from services import rate_limit
 from datetime import timedelta
+from services.token_store import revoke_token
+from services.settings import get_setting
 
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
+
+def _issue_tokens(user):
+    # Role, department and token epoch ride in both tokens so read-only views
+    # can authorize from the claims alone (utils/auth.claims_required)
+    additional_claims = {
+        "role": user.role.value,
+        "dept": user.department_id,
+        "epoch": user.token_epoch or 0,
+    }
+
+    # Convert user.id to string for JWT compatibility
+    access_token = create_access_token(
+        identity=str(user.id),
+        additional_claims=additional_claims,
+        expires_delta=timedelta(minutes=get_setting("auth.access_token_minutes"))
+    )
+    refresh_token = create_refresh_token(
+        identity=str(user.id),
+        additional_claims=additional_claims
+    )
+    return access_token, refresh_token
+
+
+def _too_many_attempts(retry_after):
+    return jsonify({"msg": "Too many attempts. Please try again later."}), 429, {"Retry-After": str(retry_after)}
+
+
 #===================================
 #==== Super admin Register=============
 #=====================================
 
 @auth_bp.route('/register-superadmin', methods=['POST'])
 def register_superadmin():
+    # Throttled per client before any DB or hashing work (services/rate_limit.py)
+    retry_after = rate_limit.acquire(("register_ip", request.remote_addr))
+    if retry_after:
+        return _too_many_attempts(retry_after)
+
     data = request.json
     name = data.get('name')
     email = data.get('email')
@@ -64,31 +100,71 @@ def login():
     if not email or not password:
         return jsonify({"msg": "Missing email or password"}), 400
 
+    # Attempts are counted per client and per account before any DB or
+    # hashing work, so parallel bursts are cut off too; a successful login
+    # takes its attempt back (services/rate_limit.py)
+    attempts = (("login_ip", request.remote_addr), ("login_email", str(email).strip().lower()))
+    retry_after = rate_limit.acquire(*attempts)
+    if retry_after:
+        return _too_many_attempts(retry_after)
+
     user = User.query.filter_by(email=email).first()
 
-    # Check email/password
-    if not user or not check_password_hash(user.password_hash, password):
+    # Check email/password (hashed on the password pool, see services/passwords.py)
+    try:
+        matches, needs_rehash = verify_password(user.password_hash, password) if user else (False, False)
+    except HashPoolBusy:
+        rate_limit.release(*attempts)  # 503: the password was never checked
+        raise
+    if not matches:
         return jsonify({"msg": "Bad email or password"}), 401
+    rate_limit.release(attempts[0])
+    rate_limit.reset(*attempts[1])
 
     # Check if user is active
     if not user.is_active:
         return jsonify({"msg": "User account is inactive. Please contact admin."}), 403
 
-    additional_claims = {
-        "role": user.role.value
-    }
+    # Hashed with an older method/cost: store one with the current settings
+    if needs_rehash:
+        try:
+            user.password_hash = hash_password(password)
+            db.session.commit()
+            invalidate_user(user.id)
+        except HashPoolBusy:
+            pass  # next login
 
-    # Convert user.id to string for JWT compatibility
-    access_token = create_access_token(
-        identity=str(user.id),
-        additional_claims=additional_claims,
-        expires_delta=timedelta(minutes=15)
-    )
-    refresh_token = create_refresh_token(
-        identity=str(user.id),
-        additional_claims=additional_claims
+    access_token, refresh_token = _issue_tokens(user)
+
+    return jsonify(
+        access_token=access_token,
+        refresh_token=refresh_token,
+        name=user.name,
+        role=user.role.value
     )
 
+
+
+
+#=======================
+#==== Refresh===========
+#=======================
+
+@auth_bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    # Claims are re-read from the user row, so a refresh picks up changes
+    user = db.session.get(User, int(get_jwt_identity()))
+    if not user or not user.is_active:
+        return jsonify({"msg": "User account is inactive. Please contact admin."}), 403
+
+    # Rotation: each refresh token is good for one refresh. Of two requests
+    # racing with the same token only the first gets new tokens.
+    if not revoke_token(get_jwt()):
+        return jsonify({"msg": "Token has been revoked"}), 401
+
+    access_token, refresh_token = _issue_tokens(user)
+
     return jsonify(
         access_token=access_token,
         refresh_token=refresh_token,
@@ -103,13 +179,9 @@ def login():
 #= LOgout---
 #============
 
-# In-memory blacklist (reset on app restart)
-jwt_blacklist = set()
-
-
 @auth_bp.route('/logout', methods=['POST'])
 @jwt_required()  # Requires valid access token
 def logout():
-    jti = get_jwt()['jti']  # JWT ID, unique identifier for token
-    jwt_blacklist.add(jti)
+    # Revoked for every worker until the token would have expired anyway
+    revoke_token(get_jwt())
     return jsonify({"msg": "Successfully logged out"}), 200
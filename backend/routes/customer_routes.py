@@ -1,21 +1,27 @@
 import os
-import time
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.utils import secure_filename
 from extensions import db
 from models.ticket import Ticket, PriorityEnum, Attachment
 from models.user import User, RoleEnum
+from schemas import AttachmentSchema, TicketSchema, parse_fields
+from services.ticket_queries import paginate_tickets, with_attachments
+from utils.auth import claims_required, get_current_principal, get_current_user, role_required
+from services.uploads import UploadRejected, allowed_file, disallowed_message
+from services.blob_store import store_blob
+from services.ticket_chat import publish_attachments
+from services.audit import audit
 
 customer_bp = Blueprint("customer_bp", __name__)
 
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'mp4', 'mov', 'avi', 'pdf'}
-
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+# Default fields of /customer/tickets; ?fields= picks any of TicketSchema's and "attachments"
+TICKET_LIST_FIELDS = ("id", "title", "priority", "status", "assigned_to", "attachments")
+TICKET_LIST_ALLOWED = (*TicketSchema.field_names, "attachments")
+attachment_schema = AttachmentSchema(only=("id", "filename", "content_type", "size", "uploaded_by"))
 
 @customer_bp.route("/customer_raise/tickets", methods=["POST"])
-@jwt_required()
+@role_required(RoleEnum.customer, error="Only customers can create tickets")
 def create_ticket():
     data = request.get_json() or {}
 
@@ -36,10 +42,7 @@ def create_ticket():
         }), 400
 
     # Identify customer from JWT
-    current_user_id = get_jwt_identity()
-    customer = User.query.get(current_user_id)
-    if not customer or customer.role != RoleEnum.customer:
-        return jsonify({"error": "Only customers can create tickets"}), 403
+    customer = get_current_user()
 
     # Create ticket
     ticket = Ticket(
@@ -51,6 +54,8 @@ def create_ticket():
     )
 
     db.session.add(ticket)
+    db.session.flush()
+    audit(customer.id, "ticket.create", {"ticket_id": ticket.id})
     db.session.commit()
 
     return jsonify({
@@ -68,8 +73,7 @@ def create_ticket():
 @customer_bp.route("/tickets/<int:ticket_id>/attachments", methods=["POST"])
 @jwt_required()
 def upload_attachments(ticket_id):
-    current_user_id = int(get_jwt_identity())
-    user = User.query.get(current_user_id)
+    user = get_current_user()
     if not user:
         return jsonify({"error": "User not found"}), 404
 
@@ -81,48 +85,38 @@ def upload_attachments(ticket_id):
     if ticket.created_by_id != user.id:
         return jsonify({"error": "You can only upload to your own tickets"}), 403
 
-    # Multiple files support
-    files = request.files.getlist("files")
+    # Multiple files support (parts are streamed to disk while the body is parsed)
+    try:
+        files = request.files.getlist("files")
+    except UploadRejected as e:
+        return jsonify({"error": str(e)}), e.status_code
     if not files or len(files) == 0:
         return jsonify({"error": "No files uploaded"}), 400
 
-    # Base upload folder
-    base_upload_folder = current_app.config.get("UPLOAD_FOLDER", "uploads")
-
-    # Ticket-specific subfolder
-    ticket_folder = os.path.join(base_upload_folder, f"ticket_{ticket.id}")
-    os.makedirs(ticket_folder, exist_ok=True)
-
     uploaded_attachments = []
+    new_attachments = []
     for file in files:
         if file.filename == '':
             continue
 
         if not allowed_file(file.filename):
-            return jsonify({
-                "error": f"File type not allowed for {file.filename}. "
-                         f"Allowed types: {ALLOWED_EXTENSIONS}"
-            }), 400
+            return jsonify({"error": disallowed_message(file.filename)}), 400
 
         filename = secure_filename(file.filename)
-        unique_filename = f"{int(time.time())}_{filename}"
-        filepath = os.path.join(ticket_folder, unique_filename)
-        file.save(filepath)
-
-        # safer size calculation
-        file.seek(0, os.SEEK_END)
-        size = file.tell()
-        file.seek(0)
+        # Stored once per distinct content; repeats only add a reference
+        stored = store_blob(file)
 
         attachment = Attachment(
             ticket_id=ticket.id,
             filename=filename,
-            file_path=filepath,
-            content_type=file.content_type,
-            size=size,
+            file_path=stored.path,
+            blob_sha256=stored.sha256,
+            content_type=stored.content_type,
+            size=stored.size,
             uploaded_by_id=user.id
         )
         db.session.add(attachment)
+        new_attachments.append(attachment)
         uploaded_attachments.append({
             "ticket_id": ticket.id,
             "filename": attachment.filename,
@@ -131,6 +125,7 @@ def upload_attachments(ticket_id):
         })
 
     db.session.commit()
+    publish_attachments(request.host_url.rstrip('/'), ticket.id, new_attachments)
 
     return jsonify({
         "message": "Files uploaded successfully",
@@ -141,35 +136,24 @@ def upload_attachments(ticket_id):
 # Customer: Get Own Tickets (with attachments)
 # ========================
 @customer_bp.route("/customer/tickets", methods=["GET"])
-@jwt_required()
+@claims_required(RoleEnum.customer, error="Only customers can view their tickets")
 def get_customer_tickets():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-
-    if not user or user.role != RoleEnum.customer:
-        return jsonify({"error": "Only customers can view their tickets"}), 403
-
-    tickets = Ticket.query.filter_by(created_by_id=user.id).all()
+    user = get_current_principal()
 
+    # One keyset page of the requested columns, plus attachments (one more query) if asked for
+    try:
+        fields = parse_fields(request.args, TICKET_LIST_FIELDS, TICKET_LIST_ALLOWED)
+        page, next_cursor = paginate_tickets(Ticket.query.filter_by(created_by_id=user.id), request.args, fields=fields)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    schema = TicketSchema.for_rows(tuple(f for f in fields if f != "attachments"))
+
+    if "attachments" not in fields:
+        return jsonify({"tickets": schema.dump_many(page), "next_cursor": next_cursor}), 200
     return jsonify({
         "tickets": [
-            {
-                "id": t.id,
-                "title": t.title,
-                "priority": t.priority.value,
-                "status": t.status.value,
-                "assigned_to": User.query.get(t.assigned_to_id).name if t.assigned_to_id else None,
-                "attachments": [
-                    {
-                        "id": a.id,
-                        "filename": a.filename,
-                        "content_type": a.content_type,
-                        "size": a.size,
-                        "uploaded_by": User.query.get(a.uploaded_by_id).name if a.uploaded_by_id else None
-                    }
-                    for a in t.attachments
-                ]
-            }
-            for t in tickets
-        ]
+            {**schema.dump(t), "attachments": attachment_schema.dump_many(attachments)}
+            for t, attachments in with_attachments(page)
+        ],
+        "next_cursor": next_cursor
     }), 200
\ No newline at end of file
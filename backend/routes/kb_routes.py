@@ -0,0 +1,166 @@
+from flask import Blueprint, request, jsonify
+from extensions import db
+from models.kb_article import KBArticle
+from models.user import RoleEnum
+from schemas import format_datetime
+from services.audit import audit
+from services.kb import DEFAULT_SUGGESTIONS, forget_rendered, rendered_html, suggest_articles
+from utils.auth import claims_required, get_current_principal, get_current_user, role_required
+from utils.pagination import keyset_paginate
+
+kb_bp = Blueprint("kb_bp", __name__)
+
+STAFF_ROLES = (RoleEnum.agent, RoleEnum.admin, RoleEnum.super_admin)
+
+
+def _article_summary(article):
+    return {
+        "id": article.id,
+        "title": article.title,
+        "tags": article.tags,
+        "is_published": article.is_published,
+        "created_at": format_datetime(article.created_at),
+        "updated_at": format_datetime(article.updated_at)
+    }
+
+
+def _visible_article(article_id):
+    # Drafts are staff-only; to everyone else they do not exist
+    article = db.session.get(KBArticle, article_id)
+    if article is None:
+        return None
+    if not article.is_published and get_current_principal().role not in STAFF_ROLES:
+        return None
+    return article
+
+
+# --------------------------------------
+# Route: List articles (customers see published ones only)
+# --------------------------------------
+
+@kb_bp.route("/api/kb", methods=["GET"])
+@claims_required()
+def list_articles():
+    query = KBArticle.query
+    if get_current_principal().role not in STAFF_ROLES:
+        query = query.filter(KBArticle.is_published.is_(True))
+
+    try:
+        articles, next_cursor = keyset_paginate(query, KBArticle.created_at, KBArticle.id, request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "articles": [_article_summary(a) for a in articles],
+        "next_cursor": next_cursor
+    }), 200
+
+
+# --------------------------------------
+# Route: Read one article, rendered
+# --------------------------------------
+
+@kb_bp.route("/api/kb/<int:article_id>", methods=["GET"])
+@claims_required()
+def get_article(article_id):
+    article = _visible_article(article_id)
+    if article is None:
+        return jsonify({"error": "Article not found"}), 404
+
+    return jsonify({
+        **_article_summary(article),
+        "body": article.body,
+        "html": rendered_html(article)
+    }), 200
+
+
+# --------------------------------------
+# Route: Suggest articles for a draft ticket (deflection)
+# --------------------------------------
+
+@kb_bp.route("/api/kb/suggest", methods=["GET"])
+@claims_required()
+def suggest():
+    text = " ".join(filter(None, (request.args.get("title"), request.args.get("description"), request.args.get("q"))))
+    try:
+        limit = int(request.args.get("limit", DEFAULT_SUGGESTIONS))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if limit < 1:
+        return jsonify({"error": "limit must be at least 1"}), 400
+
+    return jsonify({"suggestions": suggest_articles(text, limit)}), 200
+
+
+# --------------------------------------
+# Route: Create / update / delete (staff only)
+# --------------------------------------
+
+@kb_bp.route("/api/kb", methods=["POST"])
+@role_required(*STAFF_ROLES, error="Only staff can write articles")
+def create_article():
+    data = request.get_json() or {}
+    title = (data.get("title") or "").strip()
+    body = (data.get("body") or "").strip()
+    if not title or not body:
+        return jsonify({"error": "Title and body are required"}), 400
+
+    user = get_current_user()
+    article = KBArticle(
+        title=title,
+        body=body,
+        tags=(data.get("tags") or "").strip() or None,
+        is_published=bool(data.get("is_published", False)),
+        created_by_id=user.id
+    )
+    db.session.add(article)
+    db.session.flush()
+    audit(user.id, "kb.create", {"article_id": article.id})
+    db.session.commit()
+
+    return jsonify({"message": "Article created", "article": _article_summary(article)}), 201
+
+
+@kb_bp.route("/api/kb/<int:article_id>", methods=["PUT"])
+@role_required(*STAFF_ROLES, error="Only staff can write articles")
+def update_article(article_id):
+    article = db.session.get(KBArticle, article_id)
+    if article is None:
+        return jsonify({"error": "Article not found"}), 404
+
+    data = request.get_json() or {}
+    if "title" in data:
+        title = (data.get("title") or "").strip()
+        if not title:
+            return jsonify({"error": "Title cannot be empty"}), 400
+        article.title = title
+    if "body" in data:
+        body = (data.get("body") or "").strip()
+        if not body:
+            return jsonify({"error": "Body cannot be empty"}), 400
+        article.body = body
+    if "tags" in data:
+        article.tags = (data.get("tags") or "").strip() or None
+    if "is_published" in data:
+        article.is_published = bool(data["is_published"])
+
+    user = get_current_user()
+    audit(user.id, "kb.update", {"article_id": article.id, "fields": sorted(data)})
+    db.session.commit()
+
+    return jsonify({"message": "Article updated", "article": _article_summary(article)}), 200
+
+
+@kb_bp.route("/api/kb/<int:article_id>", methods=["DELETE"])
+@role_required(RoleEnum.admin, RoleEnum.super_admin, error="Only admins can delete articles")
+def delete_article(article_id):
+    article = db.session.get(KBArticle, article_id)
+    if article is None:
+        return jsonify({"error": "Article not found"}), 404
+
+    db.session.delete(article)
+    audit(get_current_user().id, "kb.delete", {"article_id": article_id})
+    db.session.commit()
+    forget_rendered(article_id)
+
+    return jsonify({"message": "Article deleted"}), 200
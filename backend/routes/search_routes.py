@@ -0,0 +1,21 @@
+from flask import Blueprint, request, jsonify
+from services.search import parse_search_args, search
+from utils.auth import claims_required, get_current_principal
+
+search_bp = Blueprint("search_bp", __name__)
+
+
+# --------------------------------------
+# Route: Full-text search over tickets, comments and KB articles
+# --------------------------------------
+
+@search_bp.route("/api/search", methods=["GET"])
+@claims_required()
+def search_everything():
+    try:
+        query, kinds, limit, offset = parse_search_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    hits, next_offset = search(get_current_principal(), query, kinds, limit, offset)
+    return jsonify({"results": hits, "next_offset": next_offset}), 200
@@ -0,0 +1,41 @@
+from flask import Blueprint, request, jsonify
+from extensions import db
+from models.user import RoleEnum
+from services.audit import audit
+from services.settings import describe_settings, update_settings
+from utils.auth import claims_required, get_current_user, role_required
+
+settings_bp = Blueprint("settings_bp", __name__)
+
+
+# --------------------------------------
+# Route: View runtime settings (Superadmin only)
+# --------------------------------------
+
+@settings_bp.route("/api/settings", methods=["GET"])
+@claims_required(RoleEnum.super_admin, error="Access denied")
+def get_settings():
+    return jsonify({"settings": describe_settings()}), 200
+
+
+# --------------------------------------
+# Route: Change runtime settings (Superadmin only)
+# Body: {"<key>": "<value>", ...}; workers pick the change up without a restart
+# --------------------------------------
+
+@settings_bp.route("/api/settings", methods=["PUT"])
+@role_required(RoleEnum.super_admin, error="Access denied")
+def put_settings():
+    data = request.get_json() or {}
+    if not isinstance(data, dict) or not data:
+        return jsonify({"error": "Provide at least one setting"}), 400
+
+    try:
+        update_settings(data)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+
+    audit(get_current_user().id, "settings.update", data)
+    db.session.commit()
+    return jsonify({"message": "Settings updated", "settings": describe_settings()}), 200
@@ -4,19 +4,21 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import db
 from models.ticket import Ticket
 from models.user import User, RoleEnum, Department
+from services.ticket_queries import paginate_tickets
+from utils.auth import get_current_user, role_required
 
 superadmin_bp = Blueprint("superadmin_bp", __name__)
 
 # Route: List all unassigned tickets (for super_admin only)
 @superadmin_bp.route("/tickets/unassigned", methods=["GET"])
-@jwt_required()
+@role_required(RoleEnum.super_admin, error="Access denied")
 def get_unassigned_tickets():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    if not user or user.role != RoleEnum.super_admin:
-        return jsonify({"error": "Access denied"}), 403
+    user = get_current_user()
 
-    tickets = Ticket.query.filter(Ticket.assigned_to_id == None).all()
+    try:
+        tickets, next_cursor = paginate_tickets(Ticket.query.filter(Ticket.assigned_to_id == None), request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     result = []
     for t in tickets:
@@ -29,13 +31,12 @@ def get_unassigned_tickets():
             "department_id": t.department_id
         })
 
-    return jsonify(result)
+    return jsonify({"tickets": result, "next_cursor": next_cursor})
 
 
 # Route: Assign department, admin (default), optionally agent to ticket (super_admin only)
 def assign_ticket(ticket_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_current_user()
     if not user or user.role != RoleEnum.super_admin:
         return jsonify({"error": "Access denied"}), 403
 
@@ -80,8 +81,8 @@ def assign_ticket(ticket_id):
         "ticket": {
             "id": ticket.id,
             "title": ticket.title,
-            "assigned_to": User.query.get(ticket.assigned_to_id).name,
-            "assigned_to_role": User.query.get(ticket.assigned_to_id).role.value,
+            "assigned_to": (agent_user or admin_user).name,
+            "assigned_to_role": (agent_user or admin_user).role.value,
             "department": department.name
         }
     })
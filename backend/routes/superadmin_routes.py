@@ -1,12 +1,33 @@
 # superadmin_route.py
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm import joinedload
 from extensions import db
 from models.ticket import Ticket
 from models.user import User, RoleEnum, Department
-from werkzeug.security import generate_password_hash
+from schemas import STREAM_QUERY_BATCH, DepartmentSchema, TicketSchema, UserSchema, parse_fields, stream_array
+from services.passwords import hash_password
+from services.ticket_queries import paginate_tickets
+from utils.auth import claims_required, get_current_user, role_required
+from services.user_cache import invalidate_user
+from services.token_store import revoke_user_tokens
+from services.audit import audit
+from services.assignment import pick_agent
+from services.ticket_bulk import (
+    bulk_assign, bulk_update, parse_status_and_priority, parse_ticket_ids, publish_bulk_states
+)
+from services.user_import import MAX_IMPORT_ROWS, UserImporter, request_rows
  
 superadmin_bp = Blueprint("superadmin_bp", __name__)
+
+department_schema = DepartmentSchema()
+# Default columns of /tickets; ?fields= picks any of TicketSchema's
+TICKET_LIST_FIELDS = ("id", "title", "priority", "status", "created_by", "assigned_to", "department", "created_at")
+admin_list_schema = UserSchema(only=(
+    "id", "name", "email", "role", "department", "is_active", "created_at", "created_by"
+))
+agent_list_schema = UserSchema(only=("id", "name", "email", "role", "department", "is_active"))
+customer_list_schema = UserSchema(only=("id", "name", "email", "role", "is_active", "created_at", "created_by"))
  
  
  
@@ -15,16 +36,8 @@ superadmin_bp = Blueprint("superadmin_bp", __name__)
 #--------------------------------------------
  
 @superadmin_bp.route("/departments", methods=["POST"])
-@jwt_required()
+@role_required(RoleEnum.super_admin, error="Only superadmins can add departments")
 def add_department():
-    # Get current logged-in user
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
- 
-    # Ensure only superadmins can access
-    if not user or user.role != RoleEnum.super_admin:
-        return jsonify({"error": "Only superadmins can add departments"}), 403
- 
     data = request.get_json()
     if not data:
         return jsonify({"error": "Invalid or missing JSON body"}), 400
@@ -44,16 +57,13 @@ def add_department():
     )
  
     db.session.add(new_department)
+    db.session.flush()
+    audit(get_current_user().id, "department.create", {"department_id": new_department.id, "name": new_department.name})
     db.session.commit()
  
     return jsonify({
         "message": "Department created successfully",
-        "department": {
-            "id": new_department.id,
-            "name": new_department.name,
-            "description": new_department.description,
-            "created_at": new_department.created_at
-        }
+        "department": department_schema.dump(new_department)
     }), 201
  
  
@@ -64,28 +74,11 @@ def add_department():
 #------------------------------------------------
  
 @superadmin_bp.route("/departments", methods=["GET"])
-@jwt_required()
+@claims_required(RoleEnum.super_admin, error="Access denied, superadmin only")
 def get_departments():
-    # Get current logged-in user
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
- 
-    if not user or user.role != RoleEnum.super_admin:  #  use enum instead of string if you already have RoleEnum
-        return jsonify({"error": "Access denied, superadmin only"}), 403
- 
     # Fetch all departments
     departments = Department.query.all()
-    department_list = [
-        {
-            "id": dept.id,
-            "name": dept.name,
-            "description": dept.description,
-            "created_at": dept.created_at
-        }
-        for dept in departments
-    ]
- 
-    return jsonify({"departments": department_list}), 200
+    return jsonify({"departments": department_schema.dump_many(departments)}), 200
  
  
  
@@ -94,31 +87,17 @@ def get_departments():
 #----------------------------------------------------------    
  
 @superadmin_bp.route("/tickets", methods=["GET"])
-@jwt_required()
+@claims_required(RoleEnum.super_admin, error="Access denied")
 def get_all_tickets():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
- 
-    # Only superadmins can access this
-    if not user or user.role != RoleEnum.super_admin:
-        return jsonify({"error": "Access denied"}), 403
+    # Filters (status, priority, department, assignee) and paging run in SQL;
+    # only the requested columns are selected
+    try:
+        fields = parse_fields(request.args, TICKET_LIST_FIELDS, TicketSchema.field_names)
+        tickets, next_cursor = paginate_tickets(Ticket.query, request.args, fields=fields)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
  
-    tickets = Ticket.query.all()
- 
-    result = []
-    for t in tickets:
-        result.append({
-            "id": t.id,
-            "title": t.title,
-            "priority": t.priority.value if hasattr(t.priority, "value") else t.priority,
-            "status": t.status.value if hasattr(t.status, "value") else t.status,
-            "created_by": t.created_by.name if t.created_by else None,
-            "assigned_to": t.assigned_to.name if t.assigned_to else None,
-            "department": t.department.name if t.department else None,
-            "created_at": t.created_at.strftime('%Y-%m-%d %H:%M:%S') if t.created_at else None
-        })
- 
-    return jsonify({"tickets": result}), 200
+    return jsonify({"tickets": TicketSchema.for_rows(fields).dump_many(tickets), "next_cursor": next_cursor}), 200
  
  
  
@@ -128,13 +107,8 @@ def get_all_tickets():
 #-----------------------------------------------------------------------------------------
  
 @superadmin_bp.route("/tickets/<int:ticket_id>/assign", methods=["PUT"])
-@jwt_required()
+@role_required(RoleEnum.super_admin, error="Access denied")
 def assign_ticket(ticket_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    if not user or user.role != RoleEnum.super_admin:
-        return jsonify({"error": "Access denied"}), 403
- 
     data = request.get_json() or {}
     department_id = data.get("department_id")
     agent_id = data.get("agent_id")  # optional
@@ -163,15 +137,21 @@ def assign_ticket(ticket_id):
     if not ticket:
         return jsonify({"error": "Ticket not found"}), 404
  
+    if agent_user is None:
+        # Least-loaded agent in the department; the admin only if it has none
+        picked_id = pick_agent(department_id)
+        agent_user = User.query.get(picked_id) if picked_id else None
+
     ticket.department_id = department_id
-    ticket.assigned_to_id = admin_user.id  # default assign admin
- 
-    if agent_user:
-        ticket.assigned_to_id = agent_user.id  # override with agent if provided
+    ticket.assigned_to_id = agent_user.id if agent_user else admin_user.id
  
+    audit(get_current_user().id, "ticket.assign", {
+        "ticket_id": ticket.id, "assigned_to_id": ticket.assigned_to_id, "department_id": department_id
+    })
     db.session.commit()
  
-    assigned_user = User.query.get(ticket.assigned_to_id)
+    # Already loaded above; no need to fetch the assignee again
+    assigned_user = agent_user or admin_user
  
     return jsonify({
         "message": "Ticket assigned successfully",
@@ -187,19 +167,65 @@ def assign_ticket(ticket_id):
  
  
  
+#-----------------------------------------------------------------------------------------
+# Route: Assign many tickets to a department (and agent) at once (super_admin only)
+# Body: {"ticket_ids": [...], "department_id": ..., "agent_id": optional}
+#-----------------------------------------------------------------------------------------
+
+@superadmin_bp.route("/tickets/bulk-assign", methods=["POST"])
+@role_required(RoleEnum.super_admin, error="Access denied")
+def bulk_assign_tickets():
+    data = request.get_json() or {}
+    try:
+        ticket_ids = parse_ticket_ids(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    department_id = data.get("department_id")
+    if not department_id:
+        return jsonify({"error": "department_id is required"}), 400
+    if not db.session.get(Department, department_id):
+        return jsonify({"error": "Department not found"}), 404
+
+    results, error = bulk_assign(get_current_user(), ticket_ids, department_id, data.get("agent_id"))
+    if error:
+        return jsonify({"error": error}), 400
+    db.session.commit()
+
+    return jsonify({"results": results, "updated": sum(r["ok"] for r in results)}), 200
+
+
+#-----------------------------------------------------------------------------------------
+# Route: Change status/priority of many tickets at once (super_admin only)
+#-----------------------------------------------------------------------------------------
+
+@superadmin_bp.route("/tickets/bulk-update", methods=["POST"])
+@role_required(RoleEnum.super_admin, error="Access denied")
+def bulk_update_tickets():
+    data = request.get_json() or {}
+    try:
+        ticket_ids = parse_ticket_ids(data)
+        status, priority = parse_status_and_priority(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    results = bulk_update(get_current_user(), ticket_ids, status, priority)
+    db.session.commit()
+    publish_bulk_states(results)
+
+    return jsonify({"results": results, "updated": sum(r.get("changed", False) for r in results)}), 200
+
+
+
+
 #--------------------------------------
 # Route: Create Admin (Only Superadmin)
 #---------------------------------------
  
 @superadmin_bp.route('/superadmin/create-admin', methods=['POST'])
-@jwt_required()
+@role_required(RoleEnum.super_admin, error='Only superadmins can create admins')
 def create_admin():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
- 
-    # Ensure only superadmins can create admins
-    if not user or user.role != RoleEnum.super_admin:
-        return jsonify({'error': 'Only superadmins can create admins'}), 403
+    user = get_current_user()
  
     data = request.get_json()
     if not data:
@@ -226,7 +252,7 @@ def create_admin():
         return jsonify({'error': 'Email already exists'}), 409
  
     # Hash password
-    hashed_password = generate_password_hash(data['password'])
+    hashed_password = hash_password(data['password'])
  
     # Create new admin
     new_admin = User(
@@ -236,10 +262,12 @@ def create_admin():
         role=RoleEnum.admin,
         is_active=True,
         department_id=department.id,   #  Department assigned here
-        created_by=current_user_id
+        created_by=user.id
     )
  
     db.session.add(new_admin)
+    db.session.flush()
+    audit(user.id, "user.create", {"user_id": new_admin.id, "role": "admin"})
     db.session.commit()
  
     return jsonify({
@@ -256,32 +284,16 @@ def create_admin():
 # --------------------------
  
 @superadmin_bp.route('/superadmin/admins', methods=['GET'])
-@jwt_required()
+@claims_required(RoleEnum.super_admin, error='Only superadmins can view admins')
 def get_all_admins():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
- 
-    # Ensure only superadmins can access
-    if not user or user.role != RoleEnum.super_admin:
-        return jsonify({'error': 'Only superadmins can view admins'}), 403
- 
-    # Fetch all admins
-    admins = User.query.filter_by(role=RoleEnum.admin).all()
- 
-    result = []
-    for a in admins:
-        result.append({
-            'id': a.id,
-            'name': a.name,
-            'email': a.email,
-            'role': a.role.value,  
-            'department': a.department.name ,
-            'is_active': a.is_active,
-            'created_at': a.created_at,
-            'created_by': a.created_by
-        })
- 
-    return jsonify({'admins': result}), 200
+    # Unpaged: streamed as the rows arrive
+    admins = (
+        User.query.filter_by(role=RoleEnum.admin)
+        .options(joinedload(User.department))
+        .order_by(User.id)
+        .yield_per(STREAM_QUERY_BATCH)
+    )
+    return stream_array('admins', admins, admin_list_schema)
  
  
  
@@ -290,15 +302,8 @@ def get_all_admins():
 # --------------------------
  
 @superadmin_bp.route('/superadmin/admin/<int:admin_id>', methods=['PUT', 'DELETE'])
-@jwt_required()
+@role_required(RoleEnum.super_admin, error='Only superadmins can manage admins')
 def update_or_delete_admin(admin_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
- 
-    # Ensure only superadmins can access
-    if not user or user.role != RoleEnum.super_admin:
-        return jsonify({'error': 'Only superadmins can manage admins'}), 403
- 
     admin = User.query.get_or_404(admin_id)
  
     # Ensure we are only updating/deleting admins
@@ -323,14 +328,19 @@ def update_or_delete_admin(admin_id):
         # Update password if provided
         new_password = data.get('password')
         if new_password:
-            admin.password_hash = generate_password_hash(new_password)
+            admin.password_hash = hash_password(new_password)
+            revoke_user_tokens(admin)
  
+        audit(get_current_user().id, "user.update", {"user_id": admin.id, "fields": sorted(data)})
         db.session.commit()
+        invalidate_user(admin.id)
         return jsonify({'message': 'Admin updated successfully'}), 200
  
     elif request.method == 'DELETE':
         db.session.delete(admin)
+        audit(get_current_user().id, "user.delete", {"user_id": admin_id, "role": "admin"})
         db.session.commit()
+        invalidate_user(admin_id)
         return jsonify({'message': 'Admin deleted successfully'}), 200
  
  
@@ -339,32 +349,16 @@ def update_or_delete_admin(admin_id):
 # --------------------------
  
 @superadmin_bp.route('/superadmin/agents', methods=['GET'])
-@jwt_required()
+@claims_required(RoleEnum.super_admin, error='Only superadmins can view agents')
 def get_all_agents():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
- 
-    # Ensure only superadmins can access
-    if not user or user.role != RoleEnum.super_admin:
-        return jsonify({'error': 'Only superadmins can view agents'}), 403
- 
-    # Fetch all agents
-    agents = User.query.filter_by(role=RoleEnum.agent).all()
- 
-    result = []
-    for agent in agents:
-        result.append({
-            'id': agent.id,
-            'name': agent.name,
-            'email': agent.email,
-            'role': agent.role.value,   # enum → string
-            'department': agent.department.name,
-            'is_active': agent.is_active,
-            # 'created_at': agent.created_at,
-            # 'created_by': agent.created_by
-        })
- 
-    return jsonify({'agents': result}), 200
+    # Unpaged: streamed as the rows arrive
+    agents = (
+        User.query.filter_by(role=RoleEnum.agent)
+        .options(joinedload(User.department))
+        .order_by(User.id)
+        .yield_per(STREAM_QUERY_BATCH)
+    )
+    return stream_array('agents', agents, agent_list_schema)
  
  
 # #--------------------------------------
@@ -372,14 +366,9 @@ def get_all_agents():
 # #---------------------------------------
  
 @superadmin_bp.route('/superadmin/create-agent', methods=['POST'])
-@jwt_required()
+@role_required(RoleEnum.super_admin, error='Only superadmins can create admins')
 def create_agent():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
- 
-    # Ensure only superadmins can create admins
-    if not user or user.role != RoleEnum.super_admin:
-        return jsonify({'error': 'Only superadmins can create admins'}), 403
+    user = get_current_user()
  
     data = request.get_json()
     if not data:
@@ -406,7 +395,7 @@ def create_agent():
         return jsonify({'error': 'Email already exists'}), 409
  
     # Hash password
-    hashed_password = generate_password_hash(data['password'])
+    hashed_password = hash_password(data['password'])
  
     # Create new admin
     new_agent = User(
@@ -416,10 +405,12 @@ def create_agent():
         role=RoleEnum.agent,
         is_active=True,
         department_id=department.id,   #  Department assigned here
-        created_by=current_user_id
+        created_by=user.id
     )
  
     db.session.add(new_agent)
+    db.session.flush()
+    audit(user.id, "user.create", {"user_id": new_agent.id, "role": "agent"})
     db.session.commit()
  
     return jsonify({
@@ -430,20 +421,33 @@ def create_agent():
     }), 201
 
  
+# --------------------------
+# Import Users in bulk (Superadmin only)
+# Body: CSV (text/csv) or JSON Lines (application/x-ndjson) with
+# name,email,password,role,department per row, or {"users": [...]}.
+# ?role= sets the role for rows without one (default agent).
+# --------------------------
+
+@superadmin_bp.route('/superadmin/import-users', methods=['POST'])
+@role_required(RoleEnum.super_admin, error='Only superadmins can create users')
+def import_users():
+    try:
+        default_role = RoleEnum(request.args.get('role', 'agent'))
+        rows = request_rows(request)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    report = UserImporter(get_current_user(), default_role, max_rows=MAX_IMPORT_ROWS).run(rows)
+    return jsonify(report), 200
+
+
 # --------------------------
 # Update or Delete Agent (Superadmin only)
 # --------------------------
  
 @superadmin_bp.route('/superadmin/agent/<int:agent_id>', methods=['PUT', 'DELETE'])
-@jwt_required()
+@role_required(RoleEnum.super_admin, error='Only superadmins can manage agents')
 def update_or_delete_agent(agent_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
- 
-    # Ensure only superadmins can access
-    if not user or user.role != RoleEnum.super_admin:
-        return jsonify({'error': 'Only superadmins can manage agents'}), 403
- 
     agent = User.query.get_or_404(agent_id)
  
     # Ensure we are only updating/deleting agents
@@ -468,14 +472,19 @@ def update_or_delete_agent(agent_id):
         # Update password if provided
         new_password = data.get('password')
         if new_password:
-            agent.password_hash = generate_password_hash(new_password)
+            agent.password_hash = hash_password(new_password)
+            revoke_user_tokens(agent)
  
+        audit(get_current_user().id, "user.update", {"user_id": agent.id, "fields": sorted(data)})
         db.session.commit()
+        invalidate_user(agent.id)
         return jsonify({'message': 'Agent updated successfully'}), 200
  
     elif request.method == 'DELETE':
         db.session.delete(agent)
+        audit(get_current_user().id, "user.delete", {"user_id": agent_id, "role": "agent"})
         db.session.commit()
+        invalidate_user(agent_id)
         return jsonify({'message': 'Agent deleted successfully'}), 200
  
  
@@ -485,31 +494,11 @@ def update_or_delete_agent(agent_id):
 # Route: Get All Customers (Superadmin only)
 # --------------------------
 @superadmin_bp.route('/superadmin/customers', methods=['GET'])
-@jwt_required()
+@claims_required(RoleEnum.super_admin, error='Only superadmins can view customers')
 def get_all_customers():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
- 
-    # Ensure only superadmins can access
-    if not user or user.role != RoleEnum.super_admin:
-        return jsonify({'error': 'Only superadmins can view customers'}), 403
- 
-    # Fetch all customers
-    customers = User.query.filter_by(role=RoleEnum.customer).all()
- 
-    result = []
-    for customer in customers:
-        result.append({
-            'id': customer.id,
-            'name': customer.name,
-            'email': customer.email,
-            'role': customer.role.value,   # enum → string
-            'is_active': customer.is_active,
-            'created_at': customer.created_at,
-            'created_by': customer.created_by
-        })
- 
-    return jsonify({'customers': result}), 200
+    # Unpaged: streamed as the rows arrive
+    customers = User.query.filter_by(role=RoleEnum.customer).order_by(User.id).yield_per(STREAM_QUERY_BATCH)
+    return stream_array('customers', customers, customer_list_schema)
  
  
  
@@ -518,15 +507,8 @@ def get_all_customers():
 # --------------------------
  
 @superadmin_bp.route('/superadmin/customer/<int:customer_id>', methods=['PUT', 'DELETE'])
-@jwt_required()
+@role_required(RoleEnum.super_admin, error='Only superadmins can manage customers')
 def update_or_delete_customer(customer_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
- 
-    # Ensure only superadmins can access
-    if not user or user.role != RoleEnum.super_admin:
-        return jsonify({'error': 'Only superadmins can manage customers'}), 403
- 
     customer = User.query.get_or_404(customer_id)
  
     # Ensure we are only updating/deleting customers
@@ -546,14 +528,19 @@ def update_or_delete_customer(customer_id):
         # Update password if provided
         new_password = data.get('password')
         if new_password:
-            customer.password_hash = generate_password_hash(new_password)
+            customer.password_hash = hash_password(new_password)
+            revoke_user_tokens(customer)
  
+        audit(get_current_user().id, "user.update", {"user_id": customer.id, "fields": sorted(data)})
         db.session.commit()
+        invalidate_user(customer.id)
         return jsonify({'message': 'Customer updated successfully'}), 200
  
     elif request.method == 'DELETE':
         db.session.delete(customer)
+        audit(get_current_user().id, "user.delete", {"user_id": customer_id, "role": "customer"})
         db.session.commit()
+        invalidate_user(customer_id)
         return jsonify({'message': 'Customer deleted successfully'}), 200
  
  
@@ -564,15 +551,8 @@ def update_or_delete_customer(customer_id):
 # --------------------------
  
 @superadmin_bp.route('/superadmin/admin/<int:admin_id>/toggle-status', methods=['PUT'])
-@jwt_required()
+@role_required(RoleEnum.super_admin, error='Only superadmins can perform this action')
 def toggle_admin_status(admin_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
- 
-    # Ensure only superadmins can perform this action
-    if not user or user.role != RoleEnum.super_admin:
-        return jsonify({'error': 'Only superadmins can perform this action'}), 403
- 
     admin = User.query.get_or_404(admin_id)
  
     # Ensure the target user is an admin
@@ -581,7 +561,9 @@ def toggle_admin_status(admin_id):
  
     # Toggle status
     admin.is_active = not admin.is_active
+    audit(get_current_user().id, "user.toggle_status", {"user_id": admin.id, "is_active": admin.is_active})
     db.session.commit()
+    invalidate_user(admin.id)
  
     return jsonify({
         'message': f"Admin {'activated' if admin.is_active else 'deactivated'} successfully.",
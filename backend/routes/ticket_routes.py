@@ -1,38 +1,56 @@
 import os
-import time
 import datetime
 from flask import Blueprint, request, jsonify, current_app, abort
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity, verify_jwt_in_request
 from werkzeug.utils import secure_filename
-from routes.customer_routes import allowed_file
+from services.uploads import UploadRejected, allowed_file, disallowed_message
+from services.blob_store import store_blob
+from services.ticket_chat import (
+    can_stream, chat_etag, chat_messages, events_link_name, events_url, parse_since, publish_attachments,
+    publish_message, publish_ticket_state, stream_access_check, ticket_chat_header, ticket_state
+)
+from services.chat_events import format_sse, stream_chat_events, subscribe_chat
+from services.user_cache import get_user
+from services.audit import audit
+from services.attachment_delivery import (
+    attachment_url, can_view_ticket, has_valid_signature, send_attachment, send_legacy_file
+)
+from utils.auth import get_current_user, role_required
 from extensions import db
 from models.ticket import Ticket, PriorityEnum, Attachment, Comment, TicketStatusEnum
+from schemas import CommentSchema
 from models.user import User, RoleEnum
  
-UPLOAD_FOLDER = os.path.join(os.getcwd(), "uploads")  
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)  # create folder if not exists
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'mp4', 'mov', 'avi', 'pdf'}
 ticket_bp = Blueprint("ticket_bp", __name__)
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+comment_schema = CommentSchema(only=("id", "ticket_id", "text", "created_at"))
  
  
-from flask import send_from_directory
- 
-# serve uploaded files
+# serve uploaded files (signed link or JWT of someone who can see the ticket)
 @ticket_bp.route("/uploads/<int:ticket_id>/<filename>", methods=["GET"])
 def serve_file(ticket_id, filename):
-    ticket_folder = os.path.join(UPLOAD_FOLDER, f"ticket_{ticket_id}")
-    if not os.path.exists(ticket_folder):
-        abort(404)
-    return send_from_directory(ticket_folder, filename)
+    if not has_valid_signature(ticket_id, filename, request.args):
+        verify_jwt_in_request(optional=True)
+        user = get_current_user() if get_jwt_identity() is not None else None
+        if not user:
+            return jsonify({"error": "Authentication required"}), 401
+        ticket = db.session.get(Ticket, ticket_id)
+        if not ticket:
+            return jsonify({"error": "Ticket not found"}), 404
+        if not can_view_ticket(user, ticket):
+            return jsonify({"error": "Access denied"}), 403
+
+    # Blob-backed attachments are addressed by hash, scoped to their ticket
+    attachment = Attachment.query.filter_by(ticket_id=ticket_id, blob_sha256=filename).first()
+    if attachment:
+        return send_attachment(attachment, request.args.get("variant"))
+    return send_legacy_file(ticket_id, filename)
  
  
 @ticket_bp.route("/<int:ticket_id>/chat", methods=["GET"])
-@jwt_required()
+@role_required()
 def get_ticket_chat(ticket_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_current_user()
  
     ticket = Ticket.query.get(ticket_id)
     if not ticket:
@@ -41,60 +59,88 @@ def get_ticket_chat(ticket_id):
     if user.id != ticket.created_by_id and user.id != ticket.assigned_to_id:
         return jsonify({"error": "Access denied"}), 403
  
+    try:
+        since = parse_since(request.args)
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    # Unchanged chat: 304 without loading any comments
+    etag = chat_etag(ticket, since, user.id)
+    if etag in request.if_none_match:
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
     BASE_URL = request.host_url.rstrip("/")
- 
-    # Ticket details
-    ticket_data = {
-        "id": ticket.id,
-        "title": ticket.title,
-        "description": ticket.description,
-        "priority": ticket.priority.value if ticket.priority else None,
-        "status": ticket.status.value if ticket.status else None,
-        "created_at": ticket.created_at.isoformat(),
-        "attachments": [
-            {
-                "id": att.id,
-                "filename": att.filename,
-                "url": f"{BASE_URL}/uploads/{ticket.id}/{os.path.basename(att.file_path)}",
-                "content_type": att.content_type,
-                "size": att.size
-            }
-            for att in ticket.attachments if att.comment_id is None
-        ]
-    }
- 
-    # Comments
-    comments = Comment.query.filter_by(ticket_id=ticket.id).order_by(Comment.created_at.asc()).all()
-    comments_data = []
-    for c in comments:
-        comments_data.append({
-            "id": c.id,
-            "user": c.user.name,
-            "body": c.body,
-            "created_at": c.created_at.isoformat(),
-            "attachments": [
-                {
-                    "id": a.id,
-                    "filename": a.filename,
-                    "url": f"{BASE_URL}/uploads/{ticket.id}/{os.path.basename(a.file_path)}",
-                    "content_type": a.content_type,
-                    "size": a.size
-                }
-                for a in c.attachments
-            ]
-        })
- 
-    return jsonify({
-        "ticket": ticket_data,
-        "messages": comments_data
-    }), 200
+    messages, cursor = chat_messages(BASE_URL, ticket, since)
+
+    response = jsonify({
+        "ticket": ticket_chat_header(BASE_URL, ticket),
+        "messages": messages,
+        "cursor": cursor,
+        "events_url": events_url(BASE_URL, ticket, user)
+    })
+    response.set_etag(etag)
+    # Browsers revalidate with If-None-Match and reuse the cached body on 304
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response, 200
+ 
+ 
+# live chat events (Server-Sent Events); signed events_url or JWT
+@ticket_bp.route("/<int:ticket_id>/events", methods=["GET"])
+def ticket_events(ticket_id):
+    user_id = request.args.get("user", type=int)
+    user = get_user(user_id) if user_id else None
+    if user and has_valid_signature(ticket_id, events_link_name(user.id, user.token_epoch or 0), request.args):
+        epoch = user.token_epoch or 0
+    else:
+        verify_jwt_in_request(optional=True)
+        user = get_current_user() if get_jwt_identity() is not None else None
+        epoch = get_jwt().get("epoch", user.token_epoch or 0) if user else None
+    if not user:
+        return jsonify({"error": "Authentication required"}), 401
+
+    ticket = db.session.get(Ticket, ticket_id)
+    if not ticket:
+        return jsonify({"error": "Ticket not found"}), 404
+
+    # Deactivated users and revoked tokens/links are refused here, and open
+    # streams end once the same check fails
+    if not can_stream(user, ticket, epoch):
+        return jsonify({"error": "Access denied"}), 403
+
+    # Resume point: Last-Event-ID on reconnect, else the client's cursor
+    try:
+        since = parse_since({"since": request.headers.get("Last-Event-ID") or request.args.get("since")})
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    subscription = subscribe_chat(ticket.id)
+    initial = []
+    cursor = since
+    if since:
+        messages, cursor = chat_messages(request.host_url.rstrip("/"), ticket, since)
+        initial = [format_sse({"type": "message", "message": m}, m["id"]) for m in messages]
+    initial.append(format_sse({"type": "ticket", "ticket": ticket_state(ticket)}))
+
+    response = current_app.response_class(
+        stream_chat_events(
+            subscription, initial, cursor,
+            access_check=stream_access_check(ticket.id, user.id, epoch),
+            check_every=current_app.config.get("CHAT_EVENTS_RECHECK_SECONDS", 60),
+        ),
+        mimetype="text/event-stream",
+    )
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # nginx: flush events as they come
+    return response
  
  
 @ticket_bp.route("/<int:ticket_id>/messages", methods=["POST"])
-@jwt_required()
+@role_required()
 def add_message(ticket_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_current_user()
  
     ticket = Ticket.query.get(ticket_id)
     if not ticket:
@@ -103,8 +149,12 @@ def add_message(ticket_id):
     if user.id != ticket.created_by_id and user.id != ticket.assigned_to_id:
         return jsonify({"error": "Access denied"}), 403
  
-    text = request.form.get("text", "").strip()
-    files = request.files.getlist("files")
+    # File parts are streamed to disk (size/hash/type checked) while the body is parsed
+    try:
+        text = request.form.get("text", "").strip()
+        files = request.files.getlist("files")
+    except UploadRejected as e:
+        return jsonify({"error": str(e)}), e.status_code
  
     if not text and not files:
         return jsonify({"error": "Message cannot be empty"}), 400
@@ -114,77 +164,64 @@ def add_message(ticket_id):
     db.session.add(comment)
     db.session.flush()
  
-    ticket_folder = os.path.join(UPLOAD_FOLDER, f"ticket_{ticket.id}")
-    os.makedirs(ticket_folder, exist_ok=True)
- 
     saved_attachments = []
+    new_attachments = []
     for file in files:
         if file.filename == "":
             continue
  
         if not allowed_file(file.filename):
-            return jsonify({
-                "error": f"File type not allowed for {file.filename}. Allowed types: {ALLOWED_EXTENSIONS}"
-            }), 400
+            return jsonify({"error": disallowed_message(file.filename)}), 400
  
         filename = secure_filename(file.filename)
-        unique_filename = f"{int(time.time())}_{filename}"
-        filepath = os.path.join(ticket_folder, unique_filename)
-        file.save(filepath)
- 
-        file.seek(0, os.SEEK_END)
-        size = file.tell()
-        file.seek(0)
+        # Stored once per distinct content; repeats only add a reference
+        stored = store_blob(file)
  
         attachment = Attachment(
             ticket_id=ticket.id,
             comment_id=comment.id,
             filename=filename,
-            file_path=filepath,
-            content_type=file.content_type,
-            size=size,
+            file_path=stored.path,
+            blob_sha256=stored.sha256,
+            content_type=stored.content_type,
+            size=stored.size,
             uploaded_by_id=user.id
         )
         db.session.add(attachment)
+        new_attachments.append(attachment)
  
         saved_attachments.append({
             "filename": attachment.filename,
             "content_type": attachment.content_type,
             "size": attachment.size,
-            "url": f"{request.host_url.rstrip('/')}/uploads/{ticket.id}/{unique_filename}"
+            "url": attachment_url(request.host_url.rstrip('/'), attachment)
         })
  
     db.session.commit()
+    publish_message(request.host_url.rstrip('/'), comment, new_attachments)
  
     return jsonify({
-        "id": comment.id,
-        "ticket_id": ticket.id,
+        **comment_schema.dump(comment),
         "user": user.name,
-        "text": comment.body,
-        "attachments": saved_attachments,
-        "created_at": comment.created_at.isoformat()
+        "attachments": saved_attachments
     }), 201
  
  
  
  
 @ticket_bp.route("/tickets/<int:ticket_id>/resolve", methods=["POST"])
-@jwt_required()
+@role_required(RoleEnum.agent, error="Only agents can resolve tickets")
 def resolve_ticket(ticket_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
- 
     ticket = Ticket.query.get(ticket_id)
     if not ticket:
         return jsonify({"error": "Ticket not found"}), 404
  
-    # Only agent can resolve
-    if user.role != RoleEnum.agent:
-        return jsonify({"error": "Only agents can resolve tickets"}), 403
  
     ticket.status = TicketStatusEnum.resolved
     ticket.resolved_at = datetime.datetime.utcnow()
+    audit(get_current_user().id, "ticket.resolve", {"ticket_id": ticket.id})
     db.session.commit()
+    publish_ticket_state(ticket)
  
     return jsonify({
         "message": "Ticket marked as resolved. Waiting for customer confirmation.",
@@ -194,19 +231,12 @@ def resolve_ticket(ticket_id):
  
  
 @ticket_bp.route("/tickets/<int:ticket_id>/confirm", methods=["POST"])
-@jwt_required()
+@role_required(RoleEnum.customer, error="Only customers can confirm resolution")
 def confirm_resolved(ticket_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
- 
     ticket = Ticket.query.get(ticket_id)
     if not ticket:
         return jsonify({"error": "Ticket not found"}), 404
  
-    # Only customer can confirm
-   
-    if user.role != RoleEnum.customer:    
-        return jsonify({"error": "Only customers can confirm resolution"}), 403
  
     data = request.get_json()
     rating = data.get("rating")
@@ -216,7 +246,9 @@ def confirm_resolved(ticket_id):
  
     ticket.status = TicketStatusEnum.closed
     ticket.rating = rating
+    audit(get_current_user().id, "ticket.close", {"ticket_id": ticket.id, "rating": rating})
     db.session.commit()
+    publish_ticket_state(ticket)
  
     return jsonify({
         "message": "Ticket confirmed and closed",
@@ -227,22 +259,19 @@ def confirm_resolved(ticket_id):
  
  
 @ticket_bp.route("/tickets/<int:ticket_id>/reopen", methods=["POST"])
-@jwt_required()
+@role_required(RoleEnum.customer, error="Only customers can reopen tickets")
 def reopen_ticket(ticket_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
- 
     ticket = Ticket.query.get(ticket_id)
     if not ticket:
         return jsonify({"error": "Ticket not found"}), 404
  
-    if user.role != RoleEnum.customer:
-        return jsonify({"error": "Only customers can reopen tickets"}), 403
  
     ticket.status = TicketStatusEnum.in_progress
     ticket.rating = None  # reset rating
     ticket.resolved_at = None
+    audit(get_current_user().id, "ticket.reopen", {"ticket_id": ticket.id})
     db.session.commit()
+    publish_ticket_state(ticket)
  
     return jsonify({
         "message": "Ticket reopened by customer",
@@ -0,0 +1,4 @@
+from schemas.base import DateTime, EnumValue, Field, Nested, Schema, format_datetime, parse_fields
+from schemas.encoding import STREAM_QUERY_BATCH, init_json, stream_array
+from schemas.ticket import AttachmentSchema, CommentSchema, TicketSchema
+from schemas.user import DepartmentSchema, UserSchema
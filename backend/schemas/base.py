@@ -0,0 +1,156 @@
+import enum
+from functools import lru_cache
+from operator import attrgetter
+
+# Declarative response serializers.
+#
+# A schema lists its fields once; constructing it with only=(...) compiles
+# the chosen fields into a flat list of (key, getter) pairs, so dumping an
+# object is one dict comprehension over plain callables: no per-call
+# introspection, hasattr checks or format decisions. Build a schema once at
+# module level and reuse it for every request.
+#
+# Schemas also dump projected rows (select(...) results whose columns are
+# labelled with the field names, see services/ticket_queries.py): then every
+# field reads its own label and only the enum/datetime conversion remains.
+
+
+class Field:
+    """
+    Reads `attr` (default: the field's own name) off the object as is.
+    A dotted attr ("department.name") follows relationships and gives None
+    when any step is None.
+    """
+
+    def __init__(self, attr=None):
+        self.attr = attr
+
+    def getter(self, name, rows=False):
+        path = [name] if rows else (self.attr or name).split(".")
+        if len(path) == 1:
+            return attrgetter(path[0])
+
+        def get(obj):
+            for step in path:
+                obj = getattr(obj, step)
+                if obj is None:
+                    return None
+            return obj
+        return get
+
+    def compile(self, name, rows=False):
+        return self.getter(name, rows)
+
+
+class EnumValue(Field):
+    """
+    An enum member as its value.
+    """
+
+    def compile(self, name, rows=False):
+        get = self.getter(name, rows)
+
+        def value(obj):
+            member = get(obj)
+            return member.value if isinstance(member, enum.Enum) else member
+        return value
+
+
+def format_datetime(value):
+    """
+    ISO 8601 to the second ("2025-01-31T09:30:00"), or None. The one
+    timestamp format of every API payload, schema-built or not.
+    """
+    return value.isoformat(timespec="seconds") if value is not None else None
+
+
+class DateTime(Field):
+    """
+    A datetime through format_datetime().
+    """
+
+    def compile(self, name, rows=False):
+        get = self.getter(name, rows)
+
+        def iso(obj):
+            return format_datetime(get(obj))
+        return iso
+
+
+class Nested(Field):
+    """
+    A related object or collection dumped with another schema.
+    """
+
+    def __init__(self, schema, attr=None, many=False):
+        super().__init__(attr)
+        self.schema = schema
+        self.many = many
+
+    def compile(self, name, rows=False):
+        if rows:
+            raise ValueError(f"Nested field '{name}' cannot be read from a row")
+        get = self.getter(name)
+        dump = self.schema.dump_many if self.many else self.schema.dump
+
+        def nested(obj):
+            value = get(obj)
+            return dump(value) if value is not None else None
+        return nested
+
+
+class Schema:
+    """
+    Subclasses declare Field attributes; dumps keep the declaration order
+    (or the order given in `only`).
+    """
+
+    _fields = {}
+    field_names = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        fields = {}
+        for klass in reversed(cls.__mro__):
+            fields.update((k, v) for k, v in vars(klass).items() if isinstance(v, Field))
+        cls._fields = fields
+        cls.field_names = tuple(fields)
+
+    def __init__(self, only=None, rows=False):
+        names = list(only) if only is not None else list(self._fields)
+        unknown = [n for n in names if n not in self._fields]
+        if unknown:
+            raise ValueError(f"{type(self).__name__} has no fields {unknown}")
+        self.fields = tuple(names)
+        self._getters = tuple((n, self._fields[n].compile(n, rows)) for n in names)
+
+    @classmethod
+    @lru_cache(maxsize=64)
+    def for_rows(cls, only):
+        """
+        Schema for projected rows with `only` (a tuple) as column labels,
+        compiled once per field list.
+        """
+        return cls(only, rows=True)
+
+    def dump(self, obj):
+        return {name: get(obj) for name, get in self._getters}
+
+    def dump_many(self, objs):
+        getters = self._getters
+        return [{name: get(obj) for name, get in getters} for obj in objs]
+
+
+def parse_fields(args, default, allowed):
+    """
+    Field list from ?fields=a,b,c (else `default`), always starting with
+    "id". Raises ValueError on names not in `allowed`.
+    """
+    raw = args.get("fields")
+    if not raw:
+        return tuple(default)
+    fields = [f.strip() for f in raw.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields {unknown}. Allowed values: {list(allowed)}")
+    return tuple(dict.fromkeys(["id", *fields]))
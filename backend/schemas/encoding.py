@@ -0,0 +1,101 @@
+from flask import current_app, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder is used instead
+    orjson = None
+
+# JSON encoding for every jsonify()/request.get_json() in the app.
+#
+# JSON_ENCODER: "auto" (orjson when installed, else the stdlib), "orjson" or
+# "json". Both encoders give the same documents: keys in insertion order
+# (schemas emit them in a fixed order), UTF-8 instead of \u escapes, and
+# anything JSON has no type for (raw datetimes, UUIDs, dataclasses) goes
+# through Flask's default conversion.
+
+# Items encoded per chunk of a streamed array
+STREAM_CHUNK_SIZE = 200
+# Rows per fetch for queries fed to stream_array (Query.yield_per)
+STREAM_QUERY_BATCH = 500
+
+
+class JSONProvider(DefaultJSONProvider):
+    sort_keys = False
+    ensure_ascii = False
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumpb(obj, pretty) + b"\n", mimetype=self.mimetype)
+
+    def dumpb(self, obj, pretty=False):
+        if pretty:
+            return self.dumps(obj, indent=2).encode()
+        return self.dumps(obj, separators=(",", ":")).encode()
+
+
+class OrjsonProvider(JSONProvider):
+    # datetimes and dataclasses are handed to Flask's default() so they come
+    # out as they would from the stdlib encoder
+    OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+               if orjson else 0)
+
+    def dumpb(self, obj, pretty=False):
+        options = self.OPTIONS | (orjson.OPT_INDENT_2 if pretty else 0)
+        try:
+            return orjson.dumps(obj, default=self.default, option=options)
+        except orjson.JSONEncodeError:
+            # e.g. integers past 64 bits, which the stdlib encoder handles
+            return super().dumpb(obj, pretty)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumpb(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
+def init_json(app):
+    backend = app.config.get("JSON_ENCODER", "auto")
+    if backend == "auto":
+        backend = "orjson" if orjson else "json"
+    if backend == "orjson":
+        if orjson is None:
+            raise RuntimeError("JSON_ENCODER=orjson but orjson is not installed")
+        app.json = OrjsonProvider(app)
+    elif backend == "json":
+        app.json = JSONProvider(app)
+    else:
+        raise ValueError(f"Unknown JSON_ENCODER: {backend}")
+
+
+def stream_array(key, items, schema, status=200, **extra):
+    """
+    Response {**extra, "<key>": [schema.dump(item), ...]} written while
+    `items` (e.g. a query with yield_per) is iterated, so the full list is
+    never held as dicts or as one JSON string. A failure mid-stream truncates
+    the body, so use it for reads only.
+    """
+    encode = current_app.json.dumpb
+    head = encode({**extra, key: []})[:-2]  # up to the open "["
+
+    def generate():
+        yield head
+        chunk, first = [], True
+        for item in items:
+            chunk.append(schema.dump(item))
+            if len(chunk) >= STREAM_CHUNK_SIZE:
+                yield (b"" if first else b",") + encode(chunk)[1:-1]
+                chunk, first = [], False
+        if chunk:
+            yield (b"" if first else b",") + encode(chunk)[1:-1]
+        yield b"]}\n"
+
+    return current_app.response_class(
+        stream_with_context(generate()), status=status, mimetype=current_app.json.mimetype
+    )
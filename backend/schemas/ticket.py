@@ -0,0 +1,33 @@
+from schemas.base import DateTime, EnumValue, Field, Schema
+
+
+class AttachmentSchema(Schema):
+    id = Field()
+    ticket_id = Field()
+    filename = Field()
+    content_type = Field()
+    size = Field()
+    uploaded_by = Field("uploaded_by.name")
+
+
+class CommentSchema(Schema):
+    id = Field()
+    ticket_id = Field()
+    user = Field("user.name")
+    text = Field("body")
+    created_at = DateTime()
+
+
+class TicketSchema(Schema):
+    id = Field()
+    title = Field()
+    description = Field()
+    priority = EnumValue()
+    status = EnumValue()
+    created_by = Field("created_by.name")
+    assigned_to = Field("assigned_to.name")
+    department = Field("department.name")
+    created_at = DateTime()
+    sla_due = DateTime()
+    resolved_at = DateTime()
+    rating = Field()
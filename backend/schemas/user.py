@@ -0,0 +1,19 @@
+from schemas.base import DateTime, EnumValue, Field, Schema
+
+
+class DepartmentSchema(Schema):
+    id = Field()
+    name = Field()
+    description = Field()
+    created_at = DateTime()
+
+
+class UserSchema(Schema):
+    id = Field()
+    name = Field()
+    email = Field()
+    role = EnumValue()
+    department = Field("department.name")
+    is_active = Field()
+    created_at = DateTime()
+    created_by = Field()  # id of the creating user
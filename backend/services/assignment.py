@@ -0,0 +1,318 @@
+import heapq
+import itertools
+import threading
+import time
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+from extensions import db
+from models.ticket import Ticket, TicketStatusEnum
+from models.user import User, RoleEnum
+
+# Load-aware ticket routing.
+#
+# Each worker keeps, per department, the number of open tickets assigned to
+# every active agent and a min-heap ordered by (load, last pick), so picking
+# the least-loaded agent (round-robin among equals) is O(log n). Counts are
+# loaded from the DB on first use and re-synced every ASSIGNMENT_SYNC_SECONDS
+# to fold in other workers' changes; this worker's own assignments, resolves,
+# closes and reopens adjust them as they commit (after_flush hook below).
+# A pick reserves a slot straight away so a bulk run spreads tickets within
+# one transaction; the reservation is replaced by the committed change, or
+# released when the transaction ends any other way (rollback, or a session
+# closed at request teardown without either). The engine also counts
+# outstanding reservations per agent and adds them to reloaded counts, so a
+# resync between pick and commit does not lose them.
+
+DEFAULT_SYNC_SECONDS = 60.0
+OPEN_STATUSES = (TicketStatusEnum.open, TicketStatusEnum.in_progress)
+
+_sequence = itertools.count()
+
+
+class DepartmentPool:
+    def __init__(self, loads, loaded_at):
+        self.loaded_at = loaded_at
+        # agent_id -> (load, last pick); the heap holds copies, stale ones
+        # are dropped when they surface
+        self.state = {agent_id: (load, next(_sequence)) for agent_id, load in loads.items()}
+        self.heap = [(load, seq, agent_id) for agent_id, (load, seq) in self.state.items()]
+        heapq.heapify(self.heap)
+
+    def pick(self):
+        while self.heap:
+            load, seq, agent_id = self.heap[0]
+            if self.state.get(agent_id) == (load, seq):
+                self._set(agent_id, load + 1, next(_sequence))
+                return agent_id
+            heapq.heappop(self.heap)
+        return None
+
+    def adjust(self, agent_id, delta):
+        if agent_id in self.state:
+            load, seq = self.state[agent_id]
+            self._set(agent_id, max(load + delta, 0), seq)
+
+    def _set(self, agent_id, load, seq):
+        self.state[agent_id] = (load, seq)
+        heapq.heappush(self.heap, (load, seq, agent_id))
+        if len(self.heap) > 4 * len(self.state) + 16:
+            # Too many stale entries: rebuild
+            self.heap = [(l, s, a) for a, (l, s) in self.state.items()]
+            heapq.heapify(self.heap)
+
+    def loads(self):
+        return {agent_id: load for agent_id, (load, _) in self.state.items()}
+
+
+class AssignmentEngine:
+    def __init__(self, sync_interval=DEFAULT_SYNC_SECONDS):
+        self.sync_interval = sync_interval
+        self._pools = {}  # department_id -> DepartmentPool
+        self._agent_department = {}
+        self._reserved = {}  # agent_id -> picks whose transaction has not ended yet
+        self._lock = threading.Lock()
+
+    def _pool(self, department_id):
+        now = time.monotonic()
+        pool = self._pools.get(department_id)
+        if pool is None or now - pool.loaded_at >= self.sync_interval:
+            loads = _load_department(department_id)
+            for agent_id in loads:
+                loads[agent_id] += self._reserved.get(agent_id, 0)
+            pool = DepartmentPool(loads, now)
+            self._pools[department_id] = pool
+            for agent_id in loads:
+                self._agent_department[agent_id] = department_id
+        return pool
+
+    def pick(self, department_id):
+        """
+        Least-loaded active agent in the department (None if it has none),
+        counted as assigned from now on.
+        """
+        with self._lock:
+            agent_id = self._pool(department_id).pick()
+            if agent_id is not None:
+                self._reserved[agent_id] = self._reserved.get(agent_id, 0) + 1
+            return agent_id
+
+    def adjust(self, deltas, settled=None):
+        """
+        Apply count changes; `settled` ({agent_id: picks}) are reservations
+        whose transaction has ended.
+        """
+        with self._lock:
+            for agent_id, count in (settled or {}).items():
+                left = self._reserved.get(agent_id, 0) - count
+                if left > 0:
+                    self._reserved[agent_id] = left
+                else:
+                    self._reserved.pop(agent_id, None)
+            for agent_id, delta in deltas.items():
+                pool = self._pools.get(self._agent_department.get(agent_id))
+                if pool is not None:
+                    pool.adjust(agent_id, delta)
+
+    def forget(self, department_id=None):
+        """
+        Drop cached counts (one department or all); reloaded on next use.
+        """
+        with self._lock:
+            if department_id is None:
+                self._pools.clear()
+            else:
+                self._pools.pop(department_id, None)
+
+    def loads(self, department_id):
+        with self._lock:
+            return self._pool(department_id).loads()
+
+
+def _load_department(department_id):
+    agents = db.session.execute(
+        select(User.id).where(
+            User.role == RoleEnum.agent,
+            User.department_id == department_id,
+            User.is_active.is_(True),
+        )
+    ).scalars().all()
+    loads = dict.fromkeys(agents, 0)
+    if agents:
+        rows = db.session.execute(
+            select(Ticket.assigned_to_id, func.count())
+            .where(Ticket.assigned_to_id.in_(agents), Ticket.status.in_(OPEN_STATUSES))
+            .group_by(Ticket.assigned_to_id)
+        ).all()
+        loads.update(dict(rows))
+    return loads
+
+
+def init_assignment(app):
+    app.extensions["assignment"] = AssignmentEngine(
+        sync_interval=app.config.get("ASSIGNMENT_SYNC_SECONDS", DEFAULT_SYNC_SECONDS)
+    )
+
+
+def _engine():
+    return current_app.extensions["assignment"]
+
+
+def pick_agent(department_id):
+    """
+    Choose the agent for a ticket entering `department_id`. Call inside the
+    transaction that assigns it; returns None if the department has no
+    active agents.
+    """
+    session = db.session()
+    # Start the transaction now, so its end always settles the reservation
+    session.connection()
+    agent_id = _engine().pick(department_id)
+    if agent_id is not None:
+        reserved = session.info.setdefault("assignment_reserved", {})
+        reserved[agent_id] = reserved.get(agent_id, 0) + 1
+    return agent_id
+
+
+def auto_assign_backlog(department_id, limit, include_unrouted=True):
+    """
+    Assign up to `limit` unassigned tickets, oldest first, to the
+    department's agents. Unrouted tickets (no department yet) are taken
+    into the department when include_unrouted is set.
+    Returns [(ticket, agent_id)]; caller audits and commits.
+    """
+    condition = Ticket.department_id == department_id
+    if include_unrouted:
+        condition = condition | Ticket.department_id.is_(None)
+    tickets = (
+        Ticket.query
+        .filter(Ticket.assigned_to_id.is_(None), Ticket.status.in_(OPEN_STATUSES), condition)
+        .order_by(Ticket.created_at, Ticket.id)  # ix_tickets_unassigned_created
+        .limit(limit)
+        .all()
+    )
+    assigned = []
+    for ticket in tickets:
+        agent_id = pick_agent(department_id)
+        if agent_id is None:
+            break
+        ticket.department_id = department_id
+        ticket.assigned_to_id = agent_id
+        assigned.append((ticket, agent_id))
+    return assigned
+
+
+def record_bulk_loads(changes):
+    """
+    Count changes made by a set-based UPDATE, which the flush hook below
+    never sees: [(old_agent_id, old_status, new_agent_id, new_status)].
+    Applied when the transaction commits, like the hook's own deltas.
+    """
+    deltas = db.session().info.setdefault("assignment_deltas", {})
+    for old_agent, old_status, new_agent, new_status in changes:
+        if _counted(old_agent, old_status):
+            deltas[old_agent] = deltas.get(old_agent, 0) - 1
+        if _counted(new_agent, new_status):
+            deltas[new_agent] = deltas.get(new_agent, 0) + 1
+
+
+def record_new_agents(department_ids):
+    """
+    Reload these departments' pools once the current transaction commits;
+    for agents created by a bulk INSERT, which the flush hook below never sees.
+    """
+    db.session().info.setdefault("assignment_stale", set()).update(department_ids)
+
+
+# -------------------------------
+# Keeping counts current
+# -------------------------------
+
+def _load_old_value(target, value, oldvalue, initiator):
+    return value
+
+
+# Make the ORM load the previous assignee on assignment so the hook knows
+# whose count to lower (status already does this for the analytics rollups)
+event.listen(Ticket.assigned_to_id, "set", _load_old_value, active_history=True, retval=True)
+
+
+def _counted(agent_id, status):
+    return agent_id is not None and status in OPEN_STATUSES
+
+
+def _old_and_new(state, attr, current):
+    hist = state.attrs[attr].history
+    if not hist.has_changes():
+        return current, current
+    return (hist.deleted[0] if hist.deleted else None), (hist.added[0] if hist.added else None)
+
+
+def _active():
+    return has_app_context() and "assignment" in current_app.extensions
+
+
+@event.listens_for(Session, "after_flush")
+def _track_ticket_loads(session, flush_context):
+    deltas = session.info.setdefault("assignment_deltas", {})
+
+    def bump(agent_id, delta):
+        deltas[agent_id] = deltas.get(agent_id, 0) + delta
+
+    for obj in session.new:
+        if isinstance(obj, Ticket) and _counted(obj.assigned_to_id, obj.status):
+            bump(obj.assigned_to_id, 1)
+    for obj in session.dirty:
+        if not isinstance(obj, Ticket):
+            continue
+        state = inspect(obj)
+        old_agent, new_agent = _old_and_new(state, "assigned_to_id", obj.assigned_to_id)
+        old_status, new_status = _old_and_new(state, "status", obj.status)
+        if _counted(old_agent, old_status):
+            bump(old_agent, -1)
+        if _counted(new_agent, new_status):
+            bump(new_agent, 1)
+    for obj in session.deleted:
+        if isinstance(obj, Ticket) and _counted(obj.assigned_to_id, obj.status):
+            bump(obj.assigned_to_id, -1)
+
+    # Agents joining, leaving or changing department: reload those pools
+    stale = session.info.setdefault("assignment_stale", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, User):
+            continue
+        state = inspect(obj)
+        if obj in session.dirty and not any(
+            state.attrs[attr].history.has_changes() for attr in ("role", "department_id", "is_active")
+        ):
+            continue
+        stale.add(obj.department_id)
+        stale.update(d for d in state.attrs["department_id"].history.deleted if d is not None)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_ticket_loads(session):
+    deltas = session.info.pop("assignment_deltas", {})
+    reserved = session.info.pop("assignment_reserved", {})
+    for agent_id, count in reserved.items():
+        deltas[agent_id] = deltas.get(agent_id, 0) - count  # now part of the committed change
+    deltas = {agent_id: d for agent_id, d in deltas.items() if agent_id is not None and d}
+    if not _active():
+        return
+    if deltas or reserved:
+        _engine().adjust(deltas, settled=reserved)
+    for department_id in session.info.pop("assignment_stale", ()):
+        _engine().forget(department_id)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _release_reservations(session, transaction):
+    # Runs after after_commit has taken a committed transaction's state, so
+    # anything left belongs to one that was rolled back or just closed
+    if transaction.parent is not None:
+        return  # a savepoint; the outer transaction decides
+    session.info.pop("assignment_deltas", None)
+    session.info.pop("assignment_stale", None)
+    reserved = session.info.pop("assignment_reserved", {})
+    if reserved and _active():
+        _engine().adjust({agent_id: -count for agent_id, count in reserved.items()}, settled=reserved)
@@ -0,0 +1,170 @@
+import hashlib
+import hmac
+import os
+import time
+from flask import Response, abort, current_app, request, send_file
+from werkzeug.security import safe_join
+from models.user import RoleEnum
+from services.blob_store import blob_path
+from services.thumbnails import thumbnail_path
+from services.uploads import MIME_TYPES, file_extension, upload_root
+
+# Attachment delivery.
+#
+# Attachment links are signed (ticket, file, expiry; see sign_link) so <img>/<video> tags can
+# load them without an Authorization header; API clients may send their JWT
+# instead. Blob-backed files never change, so the SHA-256 is a strong ETag
+# and responses are cacheable for a year. Bytes are either streamed by
+# Werkzeug (conditional GET and Range for video seeking included) or handed
+# to the front proxy with X-Accel-Redirect / X-Sendfile.
+
+DEFAULT_URL_TTL = 24 * 3600
+BLOB_MAX_AGE = 365 * 24 * 3600
+LEGACY_MAX_AGE = 3600
+
+DELIVERY_MODES = ("direct", "x-accel", "x-sendfile")
+
+
+def _sign(ticket_id, name, expires):
+    key = current_app.config["SECRET_KEY"].encode()
+    msg = f"{ticket_id}:{name}:{expires}".encode()
+    return hmac.new(key, msg, hashlib.sha256).hexdigest()[:32]
+
+
+def _url_ttl():
+    return current_app.config.get("ATTACHMENT_URL_TTL", DEFAULT_URL_TTL)
+
+
+def link_window(ttl=None):
+    """
+    Index of the current signing window (of `ttl` seconds, default the
+    attachment link TTL); links change when it does.
+    """
+    ttl = ttl or _url_ttl()
+    return int(time.time()) // ttl
+
+
+def attachment_url(base_url, attachment):
+    """
+    Signed download URL for an attachment. Expiry is rounded up to the next
+    TTL window so the URL, and with it the browser cache entry, stays the
+    same across chat reloads within a window.
+    """
+    name = attachment.blob_sha256 or os.path.basename(attachment.file_path)
+    return f"{base_url}/uploads/{attachment.ticket_id}/{name}?{sign_link(attachment.ticket_id, name)}"
+
+
+def sign_link(ticket_id, name, ttl=None):
+    """
+    Query string (expires, sig) authorizing `name` under a ticket, valid
+    for one to two `ttl` windows.
+    """
+    ttl = ttl or _url_ttl()
+    expires = (link_window(ttl) + 2) * ttl
+    return f"expires={expires}&sig={_sign(ticket_id, name, expires)}"
+
+
+def has_valid_signature(ticket_id, name, args):
+    expires = args.get("expires", type=int)
+    sig = args.get("sig", "")
+    if not expires or expires < time.time():
+        return False
+    return hmac.compare_digest(sig, _sign(ticket_id, name, expires))
+
+
+def can_view_ticket(user, ticket):
+    if user.role in (RoleEnum.super_admin, RoleEnum.admin):
+        return True
+    return user.id in (ticket.created_by_id, ticket.assigned_to_id)
+
+
+def _offload(path, mimetype, etag, max_age, immutable, download_name):
+    mode = current_app.config.get("ATTACHMENT_DELIVERY", "direct")
+    if mode == "direct":
+        return None
+    if mode not in DELIVERY_MODES:
+        raise ValueError(f"Unknown ATTACHMENT_DELIVERY: {mode}")
+
+    response = Response(status=200, mimetype=mimetype or "application/octet-stream")
+    if etag:
+        response.set_etag(etag)
+        # Answer revalidations here; the proxy is only involved for bytes
+        if etag in request.if_none_match:
+            response.status_code = 304
+            response.headers.pop("Content-Type", None)
+            _cache_headers(response, max_age, immutable)
+            return response
+
+    if mode == "x-accel":
+        # nginx: an `internal` location aliased to UPLOAD_FOLDER
+        prefix = current_app.config.get("ATTACHMENT_ACCEL_PREFIX", "/protected-uploads/")
+        relative = os.path.relpath(path, upload_root()).replace(os.sep, "/")
+        response.headers["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + relative
+    else:
+        response.headers["X-Sendfile"] = os.path.abspath(path)
+
+    response.headers.set("Content-Disposition", "inline", filename=download_name)
+    _cache_headers(response, max_age, immutable)
+    return response
+
+
+def _cache_headers(response, max_age, immutable):
+    # Private: every download is access-checked
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.max_age = max_age
+    if immutable:
+        response.cache_control.immutable = True
+
+
+def _deliver(path, mimetype, download_name, etag=None, max_age=LEGACY_MAX_AGE, immutable=False):
+    response = _offload(path, mimetype, etag, max_age, immutable, download_name)
+    if response is not None:
+        return response
+
+    try:
+        response = send_file(
+            path,
+            mimetype=mimetype,
+            download_name=download_name,
+            etag=etag if etag else True,
+            conditional=True,  # If-None-Match -> 304, Range/If-Range -> 206
+            max_age=max_age,
+        )
+    except FileNotFoundError:
+        abort(404)
+    response.accept_ranges = "bytes"  # advertise seeking on full responses too
+    _cache_headers(response, max_age, immutable)
+    return response
+
+
+def send_attachment(attachment, variant=None):
+    """
+    Response for a blob-backed attachment (strong ETag, immutable).
+    variant="thumb" serves the thumbnail once the background job made it.
+    """
+    if variant == "thumb":
+        path = thumbnail_path(attachment.blob_sha256)
+        if os.path.exists(path):
+            return _deliver(
+                path, "image/png", attachment.filename,
+                etag=f"{attachment.blob_sha256}-thumb", max_age=BLOB_MAX_AGE, immutable=True,
+            )
+    return _deliver(
+        blob_path(attachment.blob_sha256),
+        attachment.content_type,
+        attachment.filename,
+        etag=attachment.blob_sha256,
+        max_age=BLOB_MAX_AGE,
+        immutable=True,
+    )
+
+
+def send_legacy_file(ticket_id, filename):
+    """
+    Response for a file saved under ticket_<id>/ before the blob store.
+    """
+    path = safe_join(os.path.join(upload_root(), f"ticket_{ticket_id}"), filename)
+    if path is None:
+        abort(404)
+    return _deliver(path, MIME_TYPES.get(file_extension(filename)), filename)
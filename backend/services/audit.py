@@ -0,0 +1,161 @@
+import atexit
+import json
+import logging
+import threading
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import insert, select
+from extensions import db
+from models.audit_log import AuditLog
+from services.jobs import call_after_commit
+from utils.pagination import keyset_paginate
+
+# Audit trail.
+#
+# Mutating endpoints call audit(); once their transaction commits the entry
+# is appended to a per-process buffer, which is all the request pays for.
+# A flusher thread writes the buffer to audit_logs with one bulk INSERT when
+# it reaches AUDIT_BATCH_SIZE entries or AUDIT_FLUSH_SECONDS have passed.
+# The timestamp is taken when the change happens, not when it is written.
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_FLUSH_SECONDS = 1.0
+# Past this many unwritten entries (e.g. the DB is down) callers flush
+# inline, and a failed flush keeps at most this many for the retry
+MAX_BUFFERED = 10000
+
+
+class AuditBuffer:
+    def __init__(self, app, batch_size=DEFAULT_BATCH_SIZE, flush_seconds=DEFAULT_FLUSH_SECONDS):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._rows = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def add(self, row):
+        with self._lock:
+            self._rows.append(row)
+            pending = len(self._rows)
+        self._ensure_thread()
+        if pending >= MAX_BUFFERED:
+            self.flush()
+        elif pending >= self.batch_size:
+            self._wakeup.set()
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="audit-flusher", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """
+        Write everything buffered so far. Returns the number of rows written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+            if not rows:
+                return 0
+            with self.app.app_context():
+                try:
+                    with db.engine.begin() as conn:
+                        conn.execute(insert(AuditLog.__table__), rows)
+                    return len(rows)
+                except Exception:
+                    log.exception("Writing %d audit entries failed", len(rows))
+                    return self._write_one_by_one(rows)
+
+    def _write_one_by_one(self, rows):
+        # Isolate rows the DB rejects (e.g. the actor was deleted meanwhile);
+        # if the DB itself is unreachable, keep the rest for the next flush
+        written = 0
+        for i, row in enumerate(rows):
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(insert(AuditLog.__table__), [row])
+                written += 1
+            except Exception:
+                if not _db_reachable():
+                    with self._lock:
+                        self._rows = (rows[i:] + self._rows)[-MAX_BUFFERED:]
+                    return written
+                log.error("Dropping audit entry %r", row)
+        return written
+
+
+def _db_reachable():
+    try:
+        with db.engine.connect() as conn:
+            conn.execute(select(1))
+        return True
+    except Exception:
+        return False
+
+
+def init_audit(app):
+    buffer = AuditBuffer(
+        app,
+        batch_size=app.config.get("AUDIT_BATCH_SIZE", DEFAULT_BATCH_SIZE),
+        flush_seconds=app.config.get("AUDIT_FLUSH_SECONDS", DEFAULT_FLUSH_SECONDS),
+    )
+    app.extensions["audit"] = buffer
+    atexit.register(buffer.flush)
+
+
+def audit(user_id, action, details=None):
+    """
+    Record `action` by `user_id` once the current transaction commits.
+    `details` may be a dict (stored as JSON) or a string.
+    """
+    if isinstance(details, dict):
+        details = json.dumps(details, default=str)
+    row = {"user_id": user_id, "action": action, "details": details, "created_at": datetime.utcnow()}
+    call_after_commit(current_app.extensions["audit"].add, row)
+
+
+def flush_audit():
+    return current_app.extensions["audit"].flush()
+
+
+def query_audit_logs(args):
+    """
+    One newest-first page of audit entries: (entries, next_cursor).
+    Filters: user_id, action (exact, or a prefix ending in '.', e.g. "user."),
+    since / until (ISO timestamps, since inclusive, until exclusive).
+    Raises ValueError for malformed filters.
+    """
+    query = AuditLog.query
+
+    user_id = args.get("user_id")
+    if user_id:
+        query = query.filter(AuditLog.user_id == int(user_id))
+
+    action = args.get("action")
+    if action:
+        if action.endswith("."):
+            query = query.filter(AuditLog.action.startswith(action, autoescape=True))
+        else:
+            query = query.filter(AuditLog.action == action)
+
+    since = args.get("since")
+    if since:
+        query = query.filter(AuditLog.created_at >= datetime.fromisoformat(since))
+    until = args.get("until")
+    if until:
+        query = query.filter(AuditLog.created_at < datetime.fromisoformat(until))
+
+    return keyset_paginate(query, AuditLog.created_at, AuditLog.id, args)
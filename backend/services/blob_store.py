@@ -0,0 +1,180 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from werkzeug.datastructures import FileStorage
+from extensions import db
+from models.blob import Blob
+from models.ticket import Attachment
+from utils.upsert import upsert
+from services.uploads import StoredUpload, UploadStream, incoming_dir, publish_file, save_upload, upload_root
+from services.jobs import enqueue_after_commit
+
+# Content-addressed attachment storage.
+#
+# Every file lives once under blobs/<aa>/<sha256>, whatever ticket or comment
+# it was attached to. Uploading content that is already stored only drops
+# the incoming temp file and bumps a reference count, so repeated screenshots
+# and PDFs cost no extra disk space and no durable write.
+
+DEFAULT_GC_GRACE = timedelta(hours=1)
+
+# Image types that get a thumbnail (see services/thumbnails.py)
+THUMBNAIL_TYPES = {"image/png", "image/jpeg", "image/gif"}
+
+
+def blob_path(sha256):
+    return os.path.join(upload_root(), "blobs", sha256[:2], sha256)
+
+
+def _place(sha256, stream=None, temp_path=None):
+    """
+    Move the finished upload into the store, or drop it if the content is
+    already there. Identical content makes a concurrent replace harmless.
+    """
+    dest = blob_path(sha256)
+    if os.path.exists(dest):
+        if stream is not None:
+            stream.discard()
+        else:
+            os.remove(temp_path)
+        return dest
+
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    if stream is not None:
+        stream.commit(dest)
+    else:
+        publish_file(temp_path)
+        os.replace(temp_path, dest)
+    return dest
+
+
+def store_blob(file):
+    """
+    Store an uploaded FileStorage by content and make sure its blobs row
+    exists. Returns a StoredUpload for the blob; the Attachment that
+    references it (blob_sha256) takes the reference when it is inserted.
+    """
+    stream = file.stream
+    if isinstance(stream, UploadStream):
+        sha256, size = stream.sha256, stream.size
+        content_type = stream.content_type or file.content_type
+        temp = {"stream": stream}
+    else:
+        spooled = save_upload(file, incoming_dir(), f"{uuid.uuid4().hex}.part")
+        sha256, size, content_type = spooled.sha256, spooled.size, spooled.content_type
+        temp = {"temp_path": spooled.path}
+
+    # Claim the row before looking at the file. The upsert waits for a
+    # gc_blobs delete of this blob in progress (which has moved the file
+    # away by then, so _place puts ours in); once it holds the row, the
+    # fresh last_used_at keeps gc_blobs off it until the attachment commits
+    now = datetime.utcnow()
+    upsert(db.session.connection(), Blob.__table__, {
+        "sha256": sha256, "size": size, "content_type": content_type,
+        "ref_count": 0, "created_at": now, "last_used_at": now,
+    }, ["sha256"], {"last_used_at": now})
+    path = _place(sha256, **temp)
+
+    if content_type in THUMBNAIL_TYPES:
+        enqueue_after_commit("attachments.thumbnail", sha256=sha256)
+
+    return StoredUpload(path, size, sha256, content_type)
+
+
+def attachment_file(attachment):
+    """
+    Path of an attachment's content on disk.
+    """
+    if attachment.blob_sha256:
+        return blob_path(attachment.blob_sha256)
+    return attachment.file_path
+
+
+def gc_blobs(grace=DEFAULT_GC_GRACE):
+    """
+    Delete blobs nobody has referenced for `grace`. Each row is removed
+    (re-checking ref_count and last_used_at) and its file moved aside
+    before the delete commits, so a store_blob of the same content that
+    was waiting on the row finds no file and places its own. The file is
+    moved back if the commit fails, so a row never points at a missing file.
+    Returns the number of blobs removed.
+    """
+    cutoff = datetime.utcnow() - grace
+    candidates = [
+        sha for (sha,) in db.session.query(Blob.sha256)
+        .filter(Blob.ref_count <= 0, Blob.last_used_at < cutoff)
+        .all()
+    ]
+
+    removed = 0
+    for sha256 in candidates:
+        result = db.session.execute(
+            Blob.__table__.delete().where(
+                Blob.sha256 == sha256, Blob.ref_count <= 0, Blob.last_used_at < cutoff
+            )
+        )
+        if not result.rowcount:
+            db.session.commit()
+            continue
+
+        path = blob_path(sha256)
+        doomed = f"{path}.{uuid.uuid4().hex}.gc"
+        try:
+            os.replace(path, doomed)
+        except FileNotFoundError:
+            doomed = None
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            if doomed:
+                os.replace(doomed, path)
+            raise
+        if doomed:
+            os.remove(doomed)
+        removed += 1
+    return removed
+
+
+def import_legacy_attachments(batch_size=200):
+    """
+    Move attachments saved before the blob store (blob_sha256 IS NULL) into
+    it, deduplicating as they go. Old files are removed once their batch
+    has committed. Returns the number of attachments migrated.
+    """
+    migrated = 0
+    last_id = 0
+    while True:
+        batch = (
+            Attachment.query.filter(Attachment.blob_sha256.is_(None), Attachment.id > last_id)
+            .order_by(Attachment.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            return migrated
+        last_id = batch[-1].id
+
+        moved = []
+        for attachment in batch:
+            if not os.path.exists(attachment.file_path):
+                continue
+            with open(attachment.file_path, "rb") as fh:
+                stored = store_blob(FileStorage(fh, attachment.filename, content_type=attachment.content_type))
+
+            moved.append(attachment.file_path)
+            attachment.blob_sha256 = stored.sha256
+            attachment.file_path = stored.path
+            attachment.size = stored.size
+            # Updates do not go through the insert hook
+            db.session.execute(
+                update(Blob.__table__)
+                .where(Blob.sha256 == stored.sha256)
+                .values(ref_count=Blob.ref_count + 1)
+            )
+        db.session.commit()
+
+        for path in moved:
+            os.remove(path)
+        migrated += len(moved)
@@ -0,0 +1,234 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from flask import current_app
+
+# Push channel for ticket chat (Server-Sent Events).
+#
+# Views publish small events (new message, new attachments, status change)
+# after their commit; every open /<ticket_id>/events stream for that ticket
+# gets them from an in-memory queue. The fan-out backend decides how events
+# reach streams held by other workers:
+#   "memory" - this process only (single worker / dev server)
+#   "sqlite" - a host-local SQLite event log that each worker tails on a
+#              background thread, same idea as the JWT revocation store
+
+SUBSCRIBER_QUEUE_SIZE = 100
+HEARTBEAT_SECONDS = 15
+
+
+class Subscription:
+    """
+    One open stream. `closed` is set when the stream fell too far behind;
+    the client reconnects and catches up from its cursor.
+    """
+
+    def __init__(self, ticket_id):
+        self.ticket_id = ticket_id
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.closed = False
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class InProcessFanout:
+    """
+    Delivers events to subscriptions held by this process.
+    """
+
+    def __init__(self):
+        self._subscribers = {}  # ticket_id -> set of Subscription
+        self._lock = threading.Lock()
+
+    def subscribe(self, ticket_id):
+        sub = Subscription(ticket_id)
+        with self._lock:
+            self._subscribers.setdefault(ticket_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.ticket_id)
+            if subs:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.ticket_id]
+
+    def publish(self, ticket_id, event):
+        self._deliver(ticket_id, event)
+
+    def _deliver(self, ticket_id, event):
+        with self._lock:
+            subs = list(self._subscribers.get(ticket_id, ()))
+        for sub in subs:
+            try:
+                sub.queue.put_nowait(event)
+            except queue.Full:
+                # Slow consumer: end its stream rather than block publishers
+                sub.closed = True
+                self.unsubscribe(sub)
+
+
+class SQLiteFanout(InProcessFanout):
+    """
+    Shares events between the workers on one host through a SQLite file
+    (WAL mode). Local subscribers get events immediately; a pump thread
+    tails the log for events published by other workers.
+    """
+
+    RETENTION_SECONDS = 300
+
+    def __init__(self, path, poll_interval=0.25):
+        super().__init__()
+        self.path = path
+        self.poll_interval = poll_interval
+        self.origin = uuid.uuid4().hex
+        self._local = threading.local()
+        self._pump = None
+        self._pump_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chat_events ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " origin TEXT NOT NULL,"
+                " ticket_id INTEGER NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_chat_events_created_at ON chat_events (created_at)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def subscribe(self, ticket_id):
+        self._ensure_pump()
+        return super().subscribe(ticket_id)
+
+    def publish(self, ticket_id, event):
+        self._deliver(ticket_id, event)
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO chat_events (origin, ticket_id, payload, created_at) VALUES (?, ?, ?, ?)",
+                (self.origin, ticket_id, json.dumps(event), now),
+            )
+            conn.execute("DELETE FROM chat_events WHERE created_at < ?", (now - self.RETENTION_SECONDS,))
+
+    def _ensure_pump(self):
+        with self._pump_lock:
+            if self._pump is None:
+                self._pump = threading.Thread(target=self._run_pump, name="chat-events-pump", daemon=True)
+                self._pump.start()
+
+    def _run_pump(self):
+        conn = self._conn()
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM chat_events").fetchone()[0]
+        while True:
+            time.sleep(self.poll_interval)
+            rows = conn.execute(
+                "SELECT id, origin, ticket_id, payload FROM chat_events WHERE id > ? ORDER BY id",
+                (last_id,),
+            ).fetchall()
+            for row_id, origin, ticket_id, payload in rows:
+                last_id = row_id
+                if origin != self.origin:
+                    self._deliver(ticket_id, json.loads(payload))
+
+
+def init_chat_events(app):
+    """
+    Build the configured fan-out backend and attach it to the app.
+    CHAT_FANOUT: "memory" (default) or "sqlite".
+    """
+    backend = app.config.get("CHAT_FANOUT", "memory")
+    if backend == "sqlite":
+        path = app.config.get("CHAT_FANOUT_SQLITE_PATH") or os.path.join(app.instance_path, "chat_events.sqlite")
+        fanout = SQLiteFanout(path, poll_interval=app.config.get("CHAT_FANOUT_POLL_SECONDS", 0.25))
+    elif backend == "memory":
+        fanout = InProcessFanout()
+    else:
+        raise ValueError(f"Unknown CHAT_FANOUT: {backend}")
+    app.extensions["chat_events"] = fanout
+
+
+def _fanout():
+    return current_app.extensions["chat_events"]
+
+
+def publish_chat_event(ticket_id, event):
+    """
+    Send an event to everyone streaming this ticket. Call after commit.
+    """
+    _fanout().publish(ticket_id, event)
+
+
+def format_sse(event, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {json.dumps(event)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def subscribe_chat(ticket_id):
+    """
+    Start buffering events for a ticket. Subscribe before loading the
+    catch-up messages so nothing published in between is lost.
+    """
+    fanout = _fanout()
+    return fanout, fanout.subscribe(ticket_id)
+
+
+def stream_chat_events(subscription, initial=(), cursor=0, access_check=None, check_every=60):
+    """
+    Generator for a text/event-stream response: the catch-up events first,
+    then live events until the client disconnects. Message events carry the
+    comment id as SSE id, so a reconnect resumes from Last-Event-ID; live
+    messages already covered by the catch-up (id <= cursor) are skipped.
+    Runs outside the app context, so it only touches the subscription and
+    `access_check`, which is called every `check_every` seconds and ends the
+    stream once it returns False.
+    """
+    fanout, sub = subscription
+
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            for event in initial:
+                yield event
+            next_check = time.monotonic() + check_every
+            while not sub.closed:
+                event = sub.get(timeout=min(HEARTBEAT_SECONDS, check_every))
+                if access_check is not None and time.monotonic() >= next_check:
+                    if not access_check():
+                        return
+                    next_check = time.monotonic() + check_every
+                if event is None:
+                    yield ": ping\n\n"  # keeps proxies from timing out idle streams
+                    continue
+                if event["type"] == "message":
+                    if event["message"]["id"] <= cursor:
+                        continue
+                    yield format_sse(event, event["message"]["id"])
+                else:
+                    yield format_sse(event)
+        finally:
+            fanout.unsubscribe(sub)
+
+    return generate()
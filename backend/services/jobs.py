@@ -0,0 +1,267 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from extensions import db
+
+# Background jobs for post-commit side work.
+#
+# Handlers register with @job("name") and take JSON-serializable keyword
+# arguments. Views call enqueue_after_commit(); the job is handed to the
+# queue only if the request's transaction commits, so request latency
+# covers the transactional core and a rolled-back request leaves no work
+# behind. Queues:
+#   "thread" - in-process worker pool; jobs are lost if the process dies
+#   "sqlite" - persistent queue in a host-local SQLite file, shared by all
+#              workers on the host, with retries and backoff
+
+log = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 2
+MAX_ATTEMPTS = 5
+
+_handlers = {}
+
+
+def job(name):
+    """
+    Register a function as the handler for jobs called `name`.
+    """
+    def decorator(fn):
+        _handlers[name] = fn
+        return fn
+    return decorator
+
+
+def run_job(name, payload):
+    handler = _handlers.get(name)
+    if handler is None:
+        raise LookupError(f"No handler registered for job {name}")
+    handler(**payload)
+
+
+class ThreadPoolJobQueue:
+    """
+    Runs jobs on a local thread pool inside an app context.
+    Failures are logged; nothing is retried or persisted.
+    """
+
+    def __init__(self, app, workers=DEFAULT_WORKERS):
+        self.app = app
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jobs")
+
+    def enqueue(self, name, payload):
+        self._executor.submit(self._run, name, payload)
+
+    def _run(self, name, payload):
+        with self.app.app_context():
+            try:
+                run_job(name, payload)
+            except Exception:
+                log.exception("Job %s failed", name)
+
+
+class SQLiteJobQueue:
+    """
+    Persistent queue in a SQLite file (WAL mode). Workers claim a job by
+    leasing it; a job whose lease runs out (worker died) is picked up again.
+    Failed jobs are retried with exponential backoff up to MAX_ATTEMPTS,
+    then kept with status 'failed' for inspection.
+    """
+
+    LEASE_SECONDS = 300
+
+    def __init__(self, app, path, workers=DEFAULT_WORKERS, poll_interval=1.0):
+        self.app = app
+        self.path = path
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.worker_id = uuid.uuid4().hex
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._threads = []
+        self._start_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " name TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'queued',"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " run_after REAL NOT NULL,"
+            " locked_by TEXT,"
+            " locked_until REAL,"
+            " last_error TEXT,"
+            " created_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status_run_after ON jobs (status, run_after)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit; claims open their own IMMEDIATE transaction
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, name, payload):
+        now = time.time()
+        self._conn().execute(
+            "INSERT INTO jobs (name, payload, run_after, created_at) VALUES (?, ?, ?, ?)",
+            (name, json.dumps(payload), now, now),
+        )
+        self.start()
+        self._wakeup.set()
+
+    def start(self):
+        """
+        Start this process's worker threads (once).
+        """
+        with self._start_lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self.work, name=f"jobs-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _claim(self):
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, name, payload, attempts FROM jobs"
+                " WHERE status = 'queued' AND run_after <= ?"
+                " AND (locked_until IS NULL OR locked_until < ?)"
+                " ORDER BY id LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE jobs SET locked_by = ?, locked_until = ?, attempts = attempts + 1 WHERE id = ?",
+                    (self.worker_id, now + self.LEASE_SECONDS, row[0]),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row
+
+    def _finish(self, job_id):
+        self._conn().execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def _fail(self, job_id, attempts, error):
+        if attempts + 1 >= MAX_ATTEMPTS:
+            self._conn().execute(
+                "UPDATE jobs SET status = 'failed', locked_by = NULL, locked_until = NULL, last_error = ?"
+                " WHERE id = ?",
+                (error, job_id),
+            )
+        else:
+            self._conn().execute(
+                "UPDATE jobs SET run_after = ?, locked_by = NULL, locked_until = NULL, last_error = ?"
+                " WHERE id = ?",
+                (time.time() + 2 ** attempts, error, job_id),
+            )
+
+    def run_pending(self):
+        """
+        Run queued jobs until none is ready. Returns the number run.
+        """
+        count = 0
+        while True:
+            row = self._claim()
+            if row is None:
+                return count
+            job_id, name, payload, attempts = row
+            with self.app.app_context():
+                try:
+                    run_job(name, json.loads(payload))
+                except Exception as e:
+                    log.exception("Job %s (%s) failed", name, job_id)
+                    self._fail(job_id, attempts, repr(e))
+                else:
+                    self._finish(job_id)
+            count += 1
+
+    def work(self):
+        while True:
+            try:
+                self.run_pending()
+            except sqlite3.Error:
+                log.exception("Job queue error")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+
+def init_job_queue(app):
+    """
+    Build the configured job queue and attach it to the app.
+    JOB_QUEUE: "thread" (default) or "sqlite".
+    """
+    backend = app.config.get("JOB_QUEUE", "thread")
+    workers = app.config.get("JOB_WORKERS", DEFAULT_WORKERS)
+    if backend == "sqlite":
+        path = app.config.get("JOB_QUEUE_SQLITE_PATH") or os.path.join(app.instance_path, "jobs.sqlite")
+        queue = SQLiteJobQueue(app, path, workers=workers)
+    elif backend == "thread":
+        queue = ThreadPoolJobQueue(app, workers=workers)
+    else:
+        raise ValueError(f"Unknown JOB_QUEUE: {backend}")
+    app.extensions["jobs"] = queue
+
+    # Register the handlers
+    import services.thumbnails  # noqa: F401
+
+
+def enqueue(name, **payload):
+    """
+    Queue a job now, regardless of the current transaction.
+    """
+    json.dumps(payload)  # fail in the caller, not in the worker
+    current_app.extensions["jobs"].enqueue(name, payload)
+
+
+def call_after_commit(fn, *args):
+    """
+    Call fn(*args) once the current db.session transaction commits.
+    Dropped if it rolls back; errors it raises are logged, not propagated.
+    """
+    db.session().info.setdefault("after_commit", []).append((fn, args))
+
+
+def enqueue_after_commit(name, **payload):
+    """
+    Queue a job once the current db.session transaction commits.
+    Dropped if it rolls back.
+    """
+    json.dumps(payload)
+    call_after_commit(current_app.extensions["jobs"].enqueue, name, payload)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session):
+    # The data is committed by now: a failing callback is logged and the
+    # rest still run, rather than turning the request into a 500
+    for fn, args in session.info.pop("after_commit", ()):
+        try:
+            fn(*args)
+        except Exception:
+            log.exception("After-commit callback %r failed", fn)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_after_commit(session):
+    session.info.pop("after_commit", None)
@@ -0,0 +1,215 @@
+import heapq
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from html import escape
+from flask import current_app
+from sqlalchemy import func
+from extensions import db
+from models.kb_article import KBArticle
+
+# Knowledge base: article rendering and ticket-deflection suggestions.
+#
+# Rendered HTML of published articles is kept in a per-process LRU keyed by
+# article id and stamped with the article's updated_at, so an edit (in any
+# worker) makes the next read re-render it.
+# Suggestions come from an in-memory term index over published articles
+# (TF-IDF, cosine-normalized). It is rebuilt when the published set's
+# stamp (count, latest updated_at) changes, so a lookup is one aggregate
+# query plus dictionary work.
+
+DEFAULT_RENDER_CACHE_SIZE = 256
+DEFAULT_SUGGESTIONS = 5
+MAX_SUGGESTIONS = 20
+
+# Title and tag words say more about an article than body words
+TITLE_WEIGHT = 3
+TAG_WEIGHT = 2
+
+STOPWORDS = frozenset("""
+    a an and are as at be but by can cannot do does for from has have how i if in is it its
+    me my no not of on or our so that the their then there this to was we what when where
+    which why will with you your
+""".split())
+
+
+# -------------------------------
+# Rendering
+# -------------------------------
+
+_HEADING = re.compile(r"^(#{1,3})\s+(.*)$")
+_BULLET = re.compile(r"^[-*]\s+(.*)$")
+_CODE = re.compile(r"`([^`]+)`")
+_BOLD = re.compile(r"\*\*([^*]+)\*\*")
+_LINK = re.compile(r"\[([^\]]+)\]\((https?://[^\s)]+)\)")
+
+
+def _inline(line):
+    # Escape first; the patterns only add markup around escaped text
+    html = escape(line)
+    html = _CODE.sub(r"<code>\1</code>", html)
+    html = _BOLD.sub(r"<strong>\1</strong>", html)
+    return _LINK.sub(r'<a href="\2" rel="noopener noreferrer">\1</a>', html)
+
+
+def _text_block(lines):
+    if all(_BULLET.match(l) for l in lines):
+        items = "".join(f"<li>{_inline(_BULLET.match(l).group(1))}</li>" for l in lines)
+        return f"<ul>{items}</ul>"
+    return "<p>" + "<br>".join(_inline(l) for l in lines) + "</p>"
+
+
+def render_body(body):
+    """
+    Article body (a small Markdown subset: "#" to "###" headings as <h1> to
+    <h3>, "-" lists, `code`, **bold**, [links](https://...)) to HTML.
+    Everything else is escaped. A heading line ends the paragraph or list
+    before it, blank line or not.
+    """
+    blocks = []
+    for block in re.split(r"\n\s*\n", (body or "").strip()):
+        run = []
+        for line in (l.rstrip() for l in block.splitlines() if l.strip()):
+            heading = _HEADING.match(line)
+            if not heading:
+                run.append(line)
+                continue
+            if run:
+                blocks.append(_text_block(run))
+                run = []
+            level = len(heading.group(1))
+            blocks.append(f"<h{level}>{_inline(heading.group(2))}</h{level}>")
+        if run:
+            blocks.append(_text_block(run))
+    return "\n".join(blocks)
+
+
+_rendered = OrderedDict()  # article_id -> (updated_at, html)
+_rendered_lock = threading.Lock()
+
+
+def rendered_html(article):
+    """
+    HTML for an article; published articles are served from the LRU while
+    their updated_at is unchanged.
+    """
+    if not article.is_published:
+        return render_body(article.body)
+
+    with _rendered_lock:
+        entry = _rendered.get(article.id)
+        if entry and entry[0] == article.updated_at:
+            _rendered.move_to_end(article.id)
+            return entry[1]
+
+    html = render_body(article.body)
+    size = current_app.config.get("KB_RENDER_CACHE_SIZE", DEFAULT_RENDER_CACHE_SIZE)
+    with _rendered_lock:
+        _rendered[article.id] = (article.updated_at, html)
+        _rendered.move_to_end(article.id)
+        while len(_rendered) > size:
+            _rendered.popitem(last=False)
+    return html
+
+
+def forget_rendered(article_id):
+    with _rendered_lock:
+        _rendered.pop(article_id, None)
+
+
+# -------------------------------
+# Suggestions
+# -------------------------------
+
+def _stem(word):
+    # Just enough folding for "printers"/"printing"/"printed" to meet
+    for suffix in ("ing", "ed", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3 and not word.endswith("ss"):
+            return word[:-len(suffix)]
+    return word
+
+
+def terms(text):
+    return [_stem(w) for w in re.findall(r"\w+", (text or "").lower()) if len(w) > 1 and w not in STOPWORDS]
+
+
+class TermIndex:
+    """
+    Inverted index over published articles: term -> [(article_id, weight)],
+    weights being TF-IDF normalized per article, so a query's score is the
+    cosine similarity of its terms with the article.
+    """
+
+    def __init__(self, articles):
+        doc_terms = {}
+        for article in articles:
+            counts = Counter(terms(article.body))
+            for term in terms(article.title):
+                counts[term] += TITLE_WEIGHT
+            for term in terms(article.tags):
+                counts[term] += TAG_WEIGHT
+            doc_terms[article.id] = counts
+
+        doc_freq = Counter(term for counts in doc_terms.values() for term in counts)
+        total = len(doc_terms)
+        self.idf = {term: math.log(1 + total / df) for term, df in doc_freq.items()}
+
+        self.postings = {}
+        for article_id, counts in doc_terms.items():
+            weights = {term: (1 + math.log(tf)) * self.idf[term] for term, tf in counts.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            for term, weight in weights.items():
+                self.postings.setdefault(term, []).append((article_id, weight / norm))
+        self.titles = {a.id: a.title for a in articles}
+
+    def top(self, text, k):
+        query = Counter(terms(text))
+        scores = Counter()
+        for term, tf in query.items():
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            q_weight = (1 + math.log(tf)) * self.idf[term]
+            for article_id, weight in postings:
+                scores[article_id] += q_weight * weight
+        return heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+
+
+_index = None
+_index_stamp = None
+_index_lock = threading.Lock()
+
+
+def _published_stamp():
+    count, latest = db.session.query(func.count(KBArticle.id), func.max(KBArticle.updated_at)).filter(
+        KBArticle.is_published.is_(True)
+    ).one()
+    return count, latest
+
+
+def _term_index():
+    global _index, _index_stamp
+    stamp = _published_stamp()
+    with _index_lock:
+        if _index is not None and _index_stamp == stamp:
+            return _index
+    articles = KBArticle.query.filter(KBArticle.is_published.is_(True)).all()
+    index = TermIndex(articles)
+    with _index_lock:
+        _index, _index_stamp = index, stamp
+    return index
+
+
+def suggest_articles(text, limit=DEFAULT_SUGGESTIONS):
+    """
+    Published articles most similar to `text` (e.g. a draft ticket's title
+    and description), best first: [{"id", "title", "score"}].
+    """
+    if not terms(text):
+        return []
+    index = _term_index()
+    return [
+        {"id": article_id, "title": index.titles[article_id], "score": round(score, 4)}
+        for article_id, score in index.top(text, min(limit, MAX_SUGGESTIONS))
+    ]
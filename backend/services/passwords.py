@@ -0,0 +1,152 @@
+import atexit
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Password hashing service.
+#
+# PASSWORD_HASH_METHOD picks the Werkzeug algorithm and cost, e.g.
+# "scrypt:32768:8:1" or "pbkdf2:sha256:1000000". Hashes made with other
+# parameters still verify; verify_password() reports them so login can
+# replace them, and a new cost reaches every account as its user signs in.
+#
+# Hashing is deliberately CPU-bound, so it runs on a small process pool,
+# started lazily from a forkserver/spawn context (never a fork of a worker
+# holding DB connections and threads). Request threads wait on a future
+# instead of holding the GIL, and a login storm queues for
+# PASSWORD_HASH_WORKERS cores instead of saturating every web worker.
+# At most PASSWORD_HASH_MAX_PENDING hashes wait per process; past that
+# callers get HashPoolBusy instead of piling up. With 0 workers everything
+# runs inline.
+
+DEFAULT_METHOD = "scrypt"
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+DEFAULT_MAX_PENDING = 64
+# How long a caller waits for a queue slot before giving up
+QUEUE_TIMEOUT_SECONDS = 5.0
+# Below this many passwords a bulk hash is not worth the round trip
+INLINE_MAX = 4
+
+
+class HashPoolBusy(Exception):
+    """
+    Too many hashes queued; the caller should ask the client to retry.
+    """
+
+
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class PasswordHasher:
+    def __init__(self, method=DEFAULT_METHOD, workers=DEFAULT_WORKERS, max_pending=DEFAULT_MAX_PENDING):
+        self.method = method
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._prefix = None
+
+    def _pool(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_context())
+                    atexit.register(self.shutdown)
+        return self._executor
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+        if not self._slots.acquire(timeout=QUEUE_TIMEOUT_SECONDS):
+            raise HashPoolBusy("Password hashing is saturated")
+        try:
+            return self._pool().submit(fn, *args).result()
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory): this call runs inline,
+            # the next one gets a fresh pool
+            self.shutdown()
+            return fn(*args)
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(_hash, password, self.method)
+
+    def hash_many(self, passwords):
+        if self.workers <= 0 or len(passwords) < INLINE_MAX:
+            return [_hash(p, self.method) for p in passwords]
+        chunksize = max(1, len(passwords) // (self.workers * 4))
+        return list(self._pool().map(_hash, passwords, itertools.repeat(self.method), chunksize=chunksize))
+
+    def verify(self, password_hash, password):
+        """
+        (matches, needs_rehash); needs_rehash only when it matches.
+        """
+        matches = self._run(check_password_hash, password_hash, password)
+        return matches, matches and self.needs_rehash(password_hash)
+
+    def needs_rehash(self, password_hash):
+        return password_hash.split("$", 1)[0] != self._method_prefix()
+
+    def _method_prefix(self):
+        # Werkzeug fills in default parameters ("scrypt" -> "scrypt:32768:8:1");
+        # read them off one real hash
+        if self._prefix is None:
+            self._prefix = _hash("", self.method).split("$", 1)[0]
+        return self._prefix
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+# Used outside an app (scripts, shells): Werkzeug defaults, inline
+_inline = PasswordHasher(workers=0)
+
+
+def init_passwords(app):
+    app.extensions["passwords"] = PasswordHasher(
+        method=app.config.get("PASSWORD_HASH_METHOD", DEFAULT_METHOD),
+        workers=app.config.get("PASSWORD_HASH_WORKERS", DEFAULT_WORKERS),
+        max_pending=app.config.get("PASSWORD_HASH_MAX_PENDING", DEFAULT_MAX_PENDING),
+    )
+
+
+def _hasher():
+    if has_app_context() and "passwords" in current_app.extensions:
+        return current_app.extensions["passwords"]
+    return _inline
+
+
+def hash_password(password):
+    """
+    Hash with the configured method. Raises HashPoolBusy when saturated.
+    """
+    return _hasher().hash(password)
+
+
+def hash_passwords(passwords):
+    """
+    Hashes for `passwords`, in order.
+    """
+    return _hasher().hash_many(list(passwords))
+
+
+def verify_password(password_hash, password):
+    """
+    (matches, needs_rehash). Raises HashPoolBusy when saturated.
+    """
+    return _hasher().verify(password_hash, password)
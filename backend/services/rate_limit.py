@@ -0,0 +1,272 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from flask import current_app
+
+# Sliding-window rate limiting for the auth endpoints.
+#
+# Each rule allows `limit` events per `seconds`. Counts are kept per fixed
+# window and the sliding estimate is
+#     previous window's count * (share of it still inside the sliding window)
+#     + current window's count,
+# so a key costs one small tuple and no per-event timestamps. Views count
+# an attempt before they touch the database or hash a password, with the
+# check and the count in one atomic step of the store (a burst of parallel
+# requests cannot all pass the check before any of them is counted), and
+# hand the count back when the attempt turns out to be legitimate.
+# Stores: "memory" (per worker; a client spread over N workers gets up to N
+# times the limit) or "sqlite" (a host-local file shared by all workers).
+
+DEFAULT_MAX_KEYS = 100000
+# How often the SQLite store deletes counters for windows that are over
+PRUNE_SECONDS = 60
+
+DEFAULT_RULES = {
+    "login_ip": (20, 60),
+    "login_email": (5, 300),
+    "register_ip": (5, 3600),
+}
+
+
+class MemoryCounterStore:
+    """
+    key -> (window number, its count, previous window's count) in a dict.
+    Past max_keys, the least recently hit quarter of the keys is dropped.
+    """
+
+    def __init__(self, max_keys=DEFAULT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def counts(self, key, window):
+        with self._lock:
+            entry = self._counters.get(key)
+        return _shift(entry, window)
+
+    def hit(self, key, window, expires_at, amount=1):
+        with self._lock:
+            self._add(key, window, amount)
+
+    def hit_if(self, key, window, expires_at, allowed):
+        """
+        Count one event if allowed(current, previous) holds for the counts
+        before it, atomically. Returns those counts.
+        """
+        with self._lock:
+            counts = _shift(self._counters.get(key), window)
+            if allowed(*counts):
+                self._add(key, window, 1)
+            return counts
+
+    def _add(self, key, window, amount):
+        current, previous = _shift(self._counters.pop(key, None), window)
+        self._counters[key] = (window, max(current + amount, 0), previous)
+        if len(self._counters) > self.max_keys:
+            self._evict()
+
+    def reset(self, key):
+        with self._lock:
+            self._counters.pop(key, None)
+
+    def _evict(self):
+        # Insertion order is last-hit order: the front holds the stalest keys
+        for key in list(self._counters)[: len(self._counters) - self.max_keys * 3 // 4]:
+            del self._counters[key]
+
+
+def _shift(entry, window):
+    # (current, previous) counts as seen from `window`
+    if entry is None:
+        return 0, 0
+    entry_window, current, previous = entry
+    if entry_window == window:
+        return current, previous
+    if entry_window == window - 1:
+        return 0, current
+    return 0, 0
+
+
+class SQLiteCounterStore:
+    """
+    Counters in a SQLite file (WAL mode) shared by the workers on one host.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._next_prune = 0.0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit_counters ("
+                " key TEXT NOT NULL,"
+                " window INTEGER NOT NULL,"
+                " count INTEGER NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " PRIMARY KEY (key, window))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_rate_limit_counters_expires_at ON rate_limit_counters (expires_at)"
+            )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def counts(self, key, window, conn=None):
+        rows = dict((conn or self._conn()).execute(
+            "SELECT window, count FROM rate_limit_counters WHERE key = ? AND window >= ?",
+            (key, window - 1),
+        ).fetchall())
+        return rows.get(window, 0), rows.get(window - 1, 0)
+
+    def hit(self, key, window, expires_at, amount=1):
+        with self._conn() as conn:
+            self._add(conn, key, window, expires_at, amount)
+
+    def hit_if(self, key, window, expires_at, allowed):
+        """
+        Count one event if allowed(current, previous) holds for the counts
+        before it. BEGIN IMMEDIATE takes the write lock before the read, so
+        workers on the host check and count one at a time.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            counts = self.counts(key, window, conn)
+            if allowed(*counts):
+                self._add(conn, key, window, expires_at, 1)
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        return counts
+
+    def _add(self, conn, key, window, expires_at, amount):
+        conn.execute(
+            "INSERT INTO rate_limit_counters (key, window, count, expires_at) VALUES (?, ?, MAX(?, 0), ?)"
+            " ON CONFLICT (key, window) DO UPDATE SET count = MAX(count + excluded.count, 0)",
+            (key, window, amount, expires_at),
+        )
+        now = time.time()
+        if now >= self._next_prune:
+            self._next_prune = now + PRUNE_SECONDS
+            conn.execute("DELETE FROM rate_limit_counters WHERE expires_at < ?", (now,))
+
+    def reset(self, key):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM rate_limit_counters WHERE key = ?", (key,))
+
+
+class RateLimiter:
+    def __init__(self, store, rules):
+        self.store = store
+        self.rules = rules  # name -> (limit, seconds)
+
+    def retry_after(self, rule, value, now=None):
+        """
+        Seconds until another event is allowed, or None if it is allowed now.
+        """
+        limit, seconds = self.rules[rule]
+        now = time.time() if now is None else now
+        window, offset = divmod(now, seconds)
+        current, previous = self.store.counts(f"{rule}:{value}", int(window))
+        return _wait(limit, seconds, offset, current, previous)
+
+    def acquire(self, rule, value, now=None):
+        """
+        Count an event if it is allowed now and return None, else return the
+        seconds until it would be (nothing counted). Check and count are one
+        atomic step in the store.
+        """
+        limit, seconds = self.rules[rule]
+        now = time.time() if now is None else now
+        window, offset = divmod(now, seconds)
+        window = int(window)
+
+        def allowed(current, previous):
+            return _wait(limit, seconds, offset, current, previous) is None
+
+        counts = self.store.hit_if(f"{rule}:{value}", window, (window + 2) * seconds, allowed)
+        return _wait(limit, seconds, offset, *counts)
+
+    def hit(self, rule, value, now=None, amount=1):
+        seconds = self.rules[rule][1]
+        now = time.time() if now is None else now
+        window = int(now // seconds)
+        self.store.hit(f"{rule}:{value}", window, (window + 2) * seconds, amount)
+
+    def reset(self, rule, value):
+        self.store.reset(f"{rule}:{value}")
+
+
+def _wait(limit, seconds, offset, current, previous):
+    # Retry-After for these window counts, or None if an event is allowed
+    if previous * (1 - offset / seconds) + current < limit:
+        return None
+    if current >= limit:
+        # Blocked until this window is over and then until the carried-over
+        # share of it falls below the limit
+        return math.ceil(seconds - offset + seconds * (1 - limit / current))
+    # Blocked until enough of the previous window has slid out
+    return max(1, math.ceil(seconds * (1 - (limit - current) / previous) - offset))
+
+
+def init_rate_limiter(app):
+    """
+    RATE_LIMIT_STORE: "memory" (default) or "sqlite".
+    """
+    backend = app.config.get("RATE_LIMIT_STORE", "memory")
+    if backend == "sqlite":
+        path = app.config.get("RATE_LIMIT_SQLITE_PATH") or os.path.join(app.instance_path, "rate_limits.sqlite")
+        store = SQLiteCounterStore(path)
+    elif backend == "memory":
+        store = MemoryCounterStore(app.config.get("RATE_LIMIT_MAX_KEYS", DEFAULT_MAX_KEYS))
+    else:
+        raise ValueError(f"Unknown RATE_LIMIT_STORE: {backend}")
+    app.extensions["rate_limiter"] = RateLimiter(store, {**DEFAULT_RULES, **app.config.get("RATE_LIMITS", {})})
+
+
+def _limiter():
+    return current_app.extensions["rate_limiter"]
+
+
+def acquire(*checks):
+    """
+    Count an attempt against every [(rule, value)] if all of them allow it
+    (None), else the longest Retry-After (seconds), with nothing counted.
+    Empty values are skipped.
+    """
+    acquired, waits = [], []
+    for rule, value in checks:
+        if not value:
+            continue
+        wait = _limiter().acquire(rule, value)
+        if wait is None:
+            acquired.append((rule, value))
+        else:
+            waits.append(wait)
+    if not waits:
+        return None
+    release(*acquired)
+    return max(waits)
+
+
+def release(*events):
+    """
+    Take back attempts counted by acquire(), e.g. a successful login.
+    """
+    for rule, value in events:
+        if value:
+            _limiter().hit(rule, value, amount=-1)
+
+
+def reset(rule, value):
+    _limiter().reset(rule, value)
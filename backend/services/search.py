@@ -0,0 +1,278 @@
+import re
+from html import escape
+from sqlalchemy import DDL, bindparam, event, inspect, text
+from sqlalchemy.orm import Session
+from extensions import db
+from models.kb_article import KBArticle, KB_SEARCH_VECTOR
+from models.ticket import Ticket, Comment, TICKET_SEARCH_VECTOR, COMMENT_SEARCH_VECTOR
+from models.user import RoleEnum
+
+# Full-text search over tickets, comments and KB articles.
+#
+# SQLite: one FTS5 table (search_index) holding a document per ticket,
+# comment and article, kept current by the after_flush hook below in the
+# same transaction as the change. Ranked with bm25, highlighted with
+# snippet().
+# Postgres: GIN indexes on to_tsvector expressions (declared on the models),
+# maintained by Postgres itself; ranked with ts_rank, highlighted with
+# ts_headline.
+# Access rules match the ticket lists: customers see their own tickets,
+# agents their department's and their own assignments, admins their
+# department's, superadmins everything; unpublished articles are staff-only.
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+KINDS = ("ticket", "comment", "kb")
+
+# rowid = ref id * 4 + kind code, so a document is replaced by rowid
+_KIND_CODES = {"ticket": 1, "comment": 2, "kb": 3}
+_INDEXED = {
+    Ticket: ("ticket", ("title", "description")),
+    Comment: ("comment", ("body",)),
+    KBArticle: ("kb", ("title", "body", "tags")),
+}
+
+# Highlight markers: control characters cannot occur in the escaped text,
+# so they are swapped for <mark> after HTML-escaping
+_START, _END = "\x02", "\x03"
+
+FTS_TABLE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+    "kind UNINDEXED, ref_id UNINDEXED, ticket_id UNINDEXED, title, body, tags, "
+    "tokenize='porter unicode61 remove_diacritics 2')"
+)
+
+# Also create the FTS table when the schema is built with create_all()
+event.listen(db.metadata, "after_create", DDL(FTS_TABLE_DDL).execute_if(dialect="sqlite"))
+
+
+def _document(obj):
+    if isinstance(obj, Ticket):
+        return {"ticket_id": obj.id, "title": obj.title, "body": obj.description or "", "tags": ""}
+    if isinstance(obj, Comment):
+        return {"ticket_id": obj.ticket_id, "title": "", "body": obj.body or "", "tags": ""}
+    return {"ticket_id": None, "title": obj.title, "body": obj.body or "", "tags": obj.tags or ""}
+
+
+def _rowid(kind, ref_id):
+    return ref_id * 4 + _KIND_CODES[kind]
+
+
+def _index(conn, obj):
+    kind = _INDEXED[type(obj)][0]
+    rowid = _rowid(kind, obj.id)
+    conn.execute(text("DELETE FROM search_index WHERE rowid = :rowid"), {"rowid": rowid})
+    conn.execute(
+        text(
+            "INSERT INTO search_index (rowid, kind, ref_id, ticket_id, title, body, tags)"
+            " VALUES (:rowid, :kind, :ref_id, :ticket_id, :title, :body, :tags)"
+        ),
+        {"rowid": rowid, "kind": kind, "ref_id": obj.id, **_document(obj)},
+    )
+
+
+def _unindex(conn, obj):
+    kind = _INDEXED[type(obj)][0]
+    conn.execute(text("DELETE FROM search_index WHERE rowid = :rowid"), {"rowid": _rowid(kind, obj.id)})
+
+
+def _text_changed(obj):
+    state = inspect(obj)
+    return any(state.attrs[attr].history.has_changes() for attr in _INDEXED[type(obj)][1])
+
+
+@event.listens_for(Session, "after_flush")
+def _update_search_index(session, flush_context):
+    new = [o for o in session.new if type(o) in _INDEXED]
+    dirty = [o for o in session.dirty if type(o) in _INDEXED and _text_changed(o)]
+    deleted = [o for o in session.deleted if type(o) in _INDEXED]
+    if not (new or dirty or deleted):
+        return
+
+    conn = session.connection()
+    if conn.dialect.name != "sqlite":
+        return  # Postgres keeps its GIN indexes current itself
+    for obj in new + dirty:
+        _index(conn, obj)
+    for obj in deleted:
+        _unindex(conn, obj)
+
+
+def rebuild_search_index():
+    """
+    Re-index every ticket, comment and article (SQLite only; a no-op on
+    Postgres). Caller commits.
+    """
+    conn = db.session.connection()
+    if conn.dialect.name != "sqlite":
+        return
+    conn.execute(text(FTS_TABLE_DDL))
+    conn.execute(text("DELETE FROM search_index"))
+    conn.execute(text(
+        "INSERT INTO search_index (rowid, kind, ref_id, ticket_id, title, body, tags)"
+        " SELECT id * 4 + 1, 'ticket', id, id, title, coalesce(description, ''), '' FROM tickets"
+    ))
+    conn.execute(text(
+        "INSERT INTO search_index (rowid, kind, ref_id, ticket_id, title, body, tags)"
+        " SELECT id * 4 + 2, 'comment', id, ticket_id, '', body, '' FROM comments"
+    ))
+    conn.execute(text(
+        "INSERT INTO search_index (rowid, kind, ref_id, ticket_id, title, body, tags)"
+        " SELECT id * 4 + 3, 'kb', id, NULL, title, body, coalesce(tags, '') FROM kb_articles"
+    ))
+
+
+# -------------------------------
+# Queries
+# -------------------------------
+
+def parse_search_args(args):
+    """
+    (query, kinds, limit, offset) from the query string.
+    Raises ValueError for a missing query or bad paging/type values.
+    """
+    query = (args.get("q") or "").strip()
+    if not re.search(r"\w", query):
+        raise ValueError("q must contain at least one word")
+
+    kinds = tuple(k.strip() for k in args.get("type", ",".join(KINDS)).split(",") if k.strip())
+    unknown = set(kinds) - set(KINDS)
+    if unknown or not kinds:
+        raise ValueError(f"type must be a comma-separated subset of {list(KINDS)}")
+
+    limit = int(args.get("limit", DEFAULT_LIMIT))
+    offset = int(args.get("offset", 0))
+    if limit < 1 or offset < 0:
+        raise ValueError("limit must be positive and offset non-negative")
+    return query, kinds, min(limit, MAX_LIMIT), offset
+
+
+def _fts_match(query):
+    # Quote every word so user input is never parsed as FTS5 syntax; the
+    # last word is a prefix so results show up while typing
+    words = re.findall(r"\w+", query)
+    return " ".join(f'"{w}"' for w in words[:-1]) + f' "{words[-1]}"*'
+
+
+def _access_clause(user, ticket_alias):
+    """
+    SQL condition (and params) limiting ticket rows to what `user` may see.
+    """
+    t = ticket_alias
+    if user.role == RoleEnum.super_admin:
+        return "1 = 1", {}
+    if user.role == RoleEnum.admin:
+        return f"{t}.department_id = :dept_id", {"dept_id": user.department_id}
+    if user.role == RoleEnum.agent:
+        return (f"({t}.assigned_to_id = :user_id OR {t}.department_id = :dept_id)",
+                {"user_id": user.id, "dept_id": user.department_id})
+    return f"{t}.created_by_id = :user_id", {"user_id": user.id}
+
+
+def _kb_clause(user, kb_alias):
+    if user.role == RoleEnum.customer:
+        return f"{kb_alias}.is_published = :published", {"published": True}
+    return "1 = 1", {}
+
+
+def _search_sqlite(user, query, kinds, limit, offset):
+    access, params = _access_clause(user, "t")
+    kb_access, kb_params = _kb_clause(user, "k")
+    sql = text(
+        "SELECT s.kind, s.ref_id, s.ticket_id,"
+        " coalesce(t.title, k.title) AS display_title,"
+        f" snippet(search_index, 3, '{_START}', '{_END}', '…', 12) AS title_hl,"
+        f" snippet(search_index, 4, '{_START}', '{_END}', '…', 24) AS body_hl,"
+        # Title matches weigh most, then tags, then body text
+        " bm25(search_index, 0, 0, 0, 10.0, 1.0, 5.0) AS rank"
+        " FROM search_index s"
+        " LEFT JOIN tickets t ON s.kind != 'kb' AND t.id = s.ticket_id"
+        " LEFT JOIN kb_articles k ON s.kind = 'kb' AND k.id = s.ref_id"
+        " WHERE s.search_index MATCH :match AND s.kind IN :kinds"
+        f" AND ((s.kind != 'kb' AND t.id IS NOT NULL AND {access})"
+        f" OR (s.kind = 'kb' AND k.id IS NOT NULL AND {kb_access}))"
+        " ORDER BY rank, s.rowid"
+        " LIMIT :limit OFFSET :offset"
+    ).bindparams(bindparam("kinds", expanding=True))
+    rows = db.session.execute(sql, {
+        **params, **kb_params,
+        "match": _fts_match(query), "kinds": list(kinds), "limit": limit, "offset": offset,
+    }).all()
+    # bm25 is lower-is-better; report higher-is-better scores
+    return [(r.kind, r.ref_id, r.ticket_id, r.display_title, r.title_hl, r.body_hl, -r.rank) for r in rows]
+
+
+def _search_postgres(user, query, kinds, limit, offset):
+    access, params = _access_clause(user, "t")
+    kb_access, kb_params = _kb_clause(user, "k")
+    # Bare column names keep each branch's expression identical to the
+    # indexed one; none of them is ambiguous within its branch
+    branches = {
+        "ticket": (
+            "SELECT 'ticket' AS kind, t.id AS ref_id, t.id AS ticket_id, t.title AS title,"
+            f" coalesce(t.description, '') AS body, ts_rank({TICKET_SEARCH_VECTOR}, q.query) AS rank"
+            f" FROM tickets t, q WHERE {TICKET_SEARCH_VECTOR} @@ q.query AND {access}"
+        ),
+        "comment": (
+            "SELECT 'comment' AS kind, c.id AS ref_id, c.ticket_id AS ticket_id, t.title AS title,"
+            f" c.body AS body, ts_rank({COMMENT_SEARCH_VECTOR}, q.query) AS rank"
+            " FROM comments c JOIN tickets t ON t.id = c.ticket_id, q"
+            f" WHERE {COMMENT_SEARCH_VECTOR} @@ q.query AND {access}"
+        ),
+        "kb": (
+            "SELECT 'kb' AS kind, k.id AS ref_id, NULL AS ticket_id, k.title AS title,"
+            f" k.body AS body, ts_rank({KB_SEARCH_VECTOR}, q.query) AS rank"
+            f" FROM kb_articles k, q WHERE {KB_SEARCH_VECTOR} @@ q.query AND {kb_access}"
+        ),
+    }
+    union = " UNION ALL ".join(branches[k] for k in KINDS if k in kinds)
+    options = f"StartSel={_START}, StopSel={_END}, MaxWords=24, MinWords=8"
+    sql = text(
+        "WITH q AS (SELECT websearch_to_tsquery('english', :query) AS query)"
+        " SELECT hits.kind, hits.ref_id, hits.ticket_id, hits.title AS display_title,"
+        " ts_headline('english', hits.title, q.query, :options) AS title_hl,"
+        " ts_headline('english', hits.body, q.query, :options) AS body_hl,"
+        " hits.rank"
+        f" FROM ({union} ORDER BY rank DESC, kind, ref_id LIMIT :limit OFFSET :offset) hits, q"
+        " ORDER BY hits.rank DESC, hits.kind, hits.ref_id"
+    )
+    rows = db.session.execute(sql, {
+        **params, **kb_params,
+        "query": query, "options": options, "limit": limit, "offset": offset,
+    }).all()
+    return [(r.kind, r.ref_id, r.ticket_id, r.display_title, r.title_hl, r.body_hl, r.rank) for r in rows]
+
+
+def _highlight(fragment):
+    if not fragment:
+        return ""
+    return escape(fragment).replace(_START, "<mark>").replace(_END, "</mark>")
+
+
+def search(user, query, kinds=KINDS, limit=DEFAULT_LIMIT, offset=0):
+    """
+    Ranked, access-filtered hits for `query`, best first.
+    Highlights are HTML-escaped with matches wrapped in <mark>.
+    Returns (hits, next_offset); next_offset is None on the last page.
+    """
+    dialect = db.session.get_bind().dialect.name
+    runner = _search_postgres if dialect == "postgresql" else _search_sqlite
+    rows = runner(user, query, kinds, limit + 1, offset)
+
+    next_offset = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_offset = offset + limit
+
+    hits = [
+        {
+            "type": kind,
+            "id": ref_id,
+            "ticket_id": ticket_id,
+            "title": display_title,
+            "highlight": {"title": _highlight(title_hl), "body": _highlight(body_hl)},
+            "score": score,
+        }
+        for kind, ref_id, ticket_id, display_title, title_hl, body_hl, score in rows
+    ]
+    return hits, next_offset
@@ -0,0 +1,256 @@
+import json
+import logging
+import threading
+import time
+from types import MappingProxyType
+from flask import current_app
+from sqlalchemy import Integer, String, cast, select, update
+from extensions import db
+from models.settings import Setting
+from models.ticket import PriorityEnum
+from services.jobs import call_after_commit
+from utils.upsert import insert_ignore
+
+# Runtime settings backed by the `settings` table.
+#
+# Each worker holds an immutable snapshot of every known setting, parsed and
+# with defaults filled in, so reads are dict lookups. At most once per
+# SETTINGS_SYNC_SECONDS a worker compares the table's version stamp with its
+# snapshot's and reloads if another worker changed something; writes made
+# through this module reload the writing worker as soon as they commit.
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SYNC_SECONDS = 5.0
+# Bumped on every write; its value is the version stamp workers compare
+VERSION_KEY = "_version"
+
+PRIORITIES = frozenset(p.value for p in PriorityEnum)
+
+
+def _extensions(raw):
+    # Only types the upload pipeline can sniff (services/uploads.py)
+    from services.uploads import MIME_TYPES
+    values = frozenset(v.strip().lower().lstrip(".") for v in raw.split(",") if v.strip())
+    if not values:
+        raise ValueError("at least one extension is required")
+    unsupported = values - set(MIME_TYPES)
+    if unsupported:
+        raise ValueError(f"unsupported types {sorted(unsupported)}; choose from {sorted(MIME_TYPES)}")
+    return values
+
+
+def _positive_int(raw):
+    value = int(raw)
+    if value < 1:
+        raise ValueError("must be a positive integer")
+    return value
+
+
+def _bool(raw):
+    value = raw.strip().lower()
+    if value not in ("true", "false", "1", "0"):
+        raise ValueError("must be true or false")
+    return value in ("true", "1")
+
+
+def _department_hours(raw):
+    # {"<department_id>": {"<priority>": hours}}, overriding sla.hours.*
+    try:
+        data = json.loads(raw or "{}")
+    except json.JSONDecodeError as e:
+        raise ValueError(f"not valid JSON ({e.msg})")
+    if not isinstance(data, dict):
+        raise ValueError("must be an object keyed by department id")
+    overrides = {}
+    for dept_id, hours in data.items():
+        if not str(dept_id).isdigit() or not isinstance(hours, dict):
+            raise ValueError("must map department ids to {priority: hours}")
+        for priority, value in hours.items():
+            if priority not in PRIORITIES or not isinstance(value, int) or value < 1:
+                raise ValueError(f"department {dept_id}: {priority} must be a priority with positive integer hours")
+        overrides[int(dept_id)] = MappingProxyType(dict(hours))
+    return MappingProxyType(overrides)
+
+
+def _format_department_hours(overrides):
+    return json.dumps({str(k): dict(v) for k, v in sorted(overrides.items())}, sort_keys=True)
+
+
+def _format_extensions(values):
+    return ",".join(sorted(values))
+
+
+class SettingDef:
+    def __init__(self, default, parse, format=str, description=""):
+        self.default = default
+        self.parse = parse
+        self.format = format
+        self.description = description
+
+
+# Every setting the app knows about; rows for unknown keys are ignored
+DEFINITIONS = {
+    "uploads.allowed_extensions": SettingDef(
+        frozenset({"png", "jpg", "jpeg", "gif", "mp4", "mov", "avi", "pdf"}),
+        _extensions, _format_extensions, "Comma-separated file extensions accepted for attachments",
+    ),
+    "auth.access_token_minutes": SettingDef(15, _positive_int, description="Access token lifetime"),
+    "sla.hours.low": SettingDef(72, _positive_int, description="Resolution target for low priority tickets"),
+    "sla.hours.medium": SettingDef(24, _positive_int, description="Resolution target for medium priority tickets"),
+    "sla.hours.high": SettingDef(8, _positive_int, description="Resolution target for high priority tickets"),
+    "sla.hours.urgent": SettingDef(4, _positive_int, description="Resolution target for urgent tickets"),
+    "sla.department_hours": SettingDef(
+        MappingProxyType({}), _department_hours, _format_department_hours,
+        'Per-department overrides, e.g. {"3": {"urgent": 2}}',
+    ),
+    "sla.escalate_on_breach": SettingDef(
+        True, _bool, lambda v: "true" if v else "false", "Raise a ticket's priority one step when it breaches its SLA",
+    ),
+}
+
+
+class SettingsSnapshot:
+    """
+    Parsed settings at one version. Read-only; replaced wholesale on reload.
+    """
+
+    def __init__(self, values, version):
+        self.values = MappingProxyType(values)
+        self.version = version
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+
+def _defaults():
+    return {key: d.default for key, d in DEFINITIONS.items()}
+
+
+class SettingsCache:
+    def __init__(self, engine_getter, sync_interval=DEFAULT_SYNC_SECONDS):
+        self._engine = engine_getter
+        self.sync_interval = sync_interval
+        self._snapshot = None
+        self._next_sync = 0.0
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        now = time.monotonic()
+        if self._snapshot is None or now >= self._next_sync:
+            self._sync(now)
+        return self._snapshot
+
+    def _sync(self, now, force=False):
+        with self._lock:
+            if not force and self._snapshot is not None and now < self._next_sync:
+                return  # another thread just synced
+            self._next_sync = now + self.sync_interval
+            try:
+                # Own connection: never touches the request's transaction
+                with self._engine().connect() as conn:
+                    version = self._version(conn)
+                    if force or self._snapshot is None or version != self._snapshot.version:
+                        self._snapshot = self._load(conn, version)
+            except Exception:
+                log.exception("Loading settings failed")
+                if self._snapshot is None:
+                    self._snapshot = SettingsSnapshot(_defaults(), None)
+
+    def reload(self):
+        self._sync(time.monotonic(), force=True)
+
+    @staticmethod
+    def _version(conn):
+        t = Setting.__table__
+        return conn.execute(select(t.c.value).where(t.c.key == VERSION_KEY)).scalar()
+
+    @staticmethod
+    def _load(conn, version):
+        t = Setting.__table__
+        values = _defaults()
+        for key, raw in conn.execute(select(t.c.key, t.c.value)):
+            definition = DEFINITIONS.get(key)
+            if definition is None or raw is None:
+                continue
+            try:
+                values[key] = definition.parse(raw)
+            except ValueError:
+                log.error("Ignoring invalid value %r for setting %s", raw, key)
+        return SettingsSnapshot(values, version)
+
+
+def init_settings(app):
+    app.extensions["settings"] = SettingsCache(
+        lambda: db.engine, sync_interval=app.config.get("SETTINGS_SYNC_SECONDS", DEFAULT_SYNC_SECONDS)
+    )
+
+
+def _cache():
+    return current_app.extensions["settings"]
+
+
+def get_settings():
+    """
+    The current snapshot. Read several settings from one snapshot when
+    they must be consistent with each other.
+    """
+    return _cache().snapshot()
+
+
+def get_setting(key):
+    return _cache().snapshot()[key]
+
+
+def update_settings(changes):
+    """
+    Validate and stage new raw values ({key: string}); caller commits.
+    Every worker sees them after the commit, this one immediately.
+    Raises ValueError naming the first unknown key or invalid value.
+    """
+    parsed = {}
+    for key, raw in changes.items():
+        definition = DEFINITIONS.get(key)
+        if definition is None:
+            raise ValueError(f"Unknown setting: {key}")
+        try:
+            parsed[key] = definition.parse(str(raw))
+        except ValueError as e:
+            raise ValueError(f"Invalid value for {key}: {e}")
+
+    existing = {s.key: s for s in Setting.query.filter(Setting.key.in_(list(parsed)))}
+    for key, value in parsed.items():
+        formatted = DEFINITIONS[key].format(value)
+        if key in existing:
+            existing[key].value = formatted
+        else:
+            db.session.add(Setting(key=key, value=formatted))
+    db.session.flush()
+
+    # Bump the version counter in SQL so concurrent writers never hand
+    # out the same stamp
+    t = Setting.__table__
+    conn = db.session.connection()
+    insert_ignore(conn, t, {"key": VERSION_KEY, "value": "0"}, ["key"])
+    conn.execute(
+        update(t).where(t.c.key == VERSION_KEY)
+        .values(value=cast(cast(t.c.value, Integer) + 1, String))
+    )
+
+    call_after_commit(_cache().reload)
+
+
+def describe_settings():
+    """
+    Every known setting with its current and default values, for the admin UI.
+    """
+    snapshot = get_settings()
+    return [
+        {
+            "key": key,
+            "value": d.format(snapshot[key]),
+            "default": d.format(d.default),
+            "description": d.description,
+        }
+        for key, d in DEFINITIONS.items()
+    ]
@@ -0,0 +1,264 @@
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import Session
+from extensions import db
+from models.ticket import Ticket, TicketStatusEnum, PriorityEnum
+from schemas import format_datetime
+from services.audit import audit
+from services.settings import get_settings
+from services.ticket_chat import publish_ticket_state
+
+# SLA engine.
+#
+# sla_due is computed from the priority/department policy (runtime settings
+# sla.hours.* and sla.department_hours) whenever a ticket is created or its
+# priority or department changes. Each worker keeps a min-heap of pending
+# deadlines, loaded once from the ix_tickets_sla_pending index and then fed
+# by commits, and a timer thread that sleeps until the earliest one. Nothing
+# polls the tickets table.
+# A deadline fires with a conditional UPDATE (still open, same sla_due, not
+# yet breached), so when several workers hold the same deadline exactly one
+# records the breach; stale heap entries simply match nothing.
+
+log = logging.getLogger(__name__)
+
+OPEN_STATUSES = (TicketStatusEnum.open, TicketStatusEnum.in_progress)
+ESCALATION = {
+    PriorityEnum.low: PriorityEnum.medium,
+    PriorityEnum.medium: PriorityEnum.high,
+    PriorityEnum.high: PriorityEnum.urgent,
+}
+# Upper bound on one sleep, so clock adjustments are picked up
+MAX_WAIT_SECONDS = 60
+RETRY_SECONDS = 30
+
+
+def sla_hours(priority, department_id, settings=None):
+    settings = settings or get_settings()
+    override = settings["sla.department_hours"].get(department_id, {}) if department_id else {}
+    return override.get(priority.value) or settings[f"sla.hours.{priority.value}"]
+
+
+def compute_sla_due(created_at, priority, department_id, settings=None):
+    """
+    Resolution deadline for a ticket created at `created_at`.
+    """
+    priority = priority or PriorityEnum.medium
+    return created_at + timedelta(hours=sla_hours(priority, department_id, settings))
+
+
+class DeadlineScheduler:
+    """
+    Min-heap of (sla_due, ticket_id) with a timer thread. Entries are never
+    removed in place: rescheduling pushes a new entry and the old one is
+    skipped when it surfaces.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._heap = []
+        self._due = {}  # ticket_id -> the deadline currently scheduled
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sla-scheduler", daemon=True)
+                self._thread.start()
+
+    def schedule(self, ticket_id, due):
+        with self._cond:
+            self._due[ticket_id] = due
+            heapq.heappush(self._heap, (due, ticket_id))
+            if self._heap[0] == (due, ticket_id):
+                self._cond.notify()
+
+    def pending(self):
+        with self._cond:
+            return len(self._due)
+
+    def _load(self):
+        # Range scan on the partial index; only still-watchable tickets
+        with self.app.app_context():
+            rows = db.session.execute(
+                select(Ticket.id, Ticket.sla_due).where(
+                    Ticket.sla_breached_at.is_(None),
+                    Ticket.sla_due.isnot(None),
+                    Ticket.status.in_(OPEN_STATUSES),
+                )
+            ).all()
+            db.session.remove()
+        with self._cond:
+            for ticket_id, due in rows:
+                if ticket_id not in self._due:  # a commit may have scheduled it already
+                    self._due[ticket_id] = due
+                    self._heap.append((due, ticket_id))
+            heapq.heapify(self._heap)
+        log.info("SLA scheduler watching %d deadlines", len(rows))
+
+    def _next_due(self):
+        """
+        Block until a deadline has passed; return (due, ticket_id).
+        """
+        with self._cond:
+            while True:
+                while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+                    heapq.heappop(self._heap)  # superseded entry
+                if self._heap:
+                    due, ticket_id = self._heap[0]
+                    wait = (due - datetime.utcnow()).total_seconds()
+                    if wait <= 0:
+                        heapq.heappop(self._heap)
+                        del self._due[ticket_id]
+                        return due, ticket_id
+                    self._cond.wait(min(wait, MAX_WAIT_SECONDS))
+                else:
+                    self._cond.wait(MAX_WAIT_SECONDS)
+
+    def _run(self):
+        while True:
+            try:
+                self._load()
+                break
+            except Exception:
+                log.exception("Loading SLA deadlines failed; retrying")
+                time.sleep(RETRY_SECONDS)
+        while True:
+            due, ticket_id = self._next_due()
+            with self.app.app_context():
+                try:
+                    record_breach(ticket_id, due)
+                except Exception:
+                    log.exception("Recording SLA breach for ticket %s failed", ticket_id)
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+
+
+def record_breach(ticket_id, due):
+    """
+    Mark the ticket breached if it is still open with this deadline, then
+    escalate its priority (sla.escalate_on_breach), audit and push the new
+    state. Returns False if another worker got there first or the deadline
+    no longer applies.
+    """
+    now = datetime.utcnow()
+    claimed = db.session.execute(
+        update(Ticket)
+        .where(
+            Ticket.id == ticket_id,
+            Ticket.sla_due == due,
+            Ticket.sla_breached_at.is_(None),
+            Ticket.status.in_(OPEN_STATUSES),
+        )
+        .values(sla_breached_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if claimed != 1:
+        db.session.rollback()
+        return False
+
+    ticket = db.session.get(Ticket, ticket_id)
+    details = {"ticket_id": ticket_id, "sla_due": format_datetime(due), "priority": ticket.priority.value}
+    if get_settings()["sla.escalate_on_breach"] and ticket.priority in ESCALATION:
+        # Through the ORM so the analytics rollups see the priority change
+        ticket.priority = ESCALATION[ticket.priority]
+        details["escalated_to"] = ticket.priority.value
+    audit(None, "ticket.sla_breach", details)
+
+    db.session.commit()
+    publish_ticket_state(ticket)
+    return True
+
+
+def backfill_sla_due():
+    """
+    Compute sla_due for open tickets that have none. Caller commits; the
+    scheduler picks them up as the flush reports them.
+    """
+    count = 0
+    settings = get_settings()
+    query = Ticket.query.filter(Ticket.sla_due.is_(None), Ticket.status.in_(OPEN_STATUSES))
+    for ticket in query.yield_per(1000):
+        ticket.sla_due = compute_sla_due(ticket.created_at, ticket.priority, ticket.department_id, settings)
+        count += 1
+    return count
+
+
+def schedule_after_commit(deadlines):
+    """
+    Watch [(ticket_id, sla_due)] once the current transaction commits; for
+    set-based UPDATEs, which the flush hooks below never see.
+    """
+    if not has_app_context() or "sla" not in current_app.extensions:
+        return
+    scheduler = current_app.extensions["sla"]
+    pending = db.session().info.setdefault("after_commit", [])
+    for ticket_id, due in deadlines:
+        pending.append((scheduler.schedule, (ticket_id, due)))
+
+
+# -------------------------------
+# Keeping sla_due and the schedule current
+# -------------------------------
+
+_POLICY_ATTRS = ("priority", "department_id")
+
+
+def _policy_changed(ticket):
+    state = inspect(ticket)
+    return any(state.attrs[attr].history.has_changes() for attr in _POLICY_ATTRS)
+
+
+@event.listens_for(Session, "before_flush")
+def _compute_sla_due(session, flush_context, instances):
+    if not has_app_context():
+        return  # policies are runtime settings
+    settings = None
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Ticket) or obj.sla_breached_at is not None:
+            continue  # a breached ticket keeps the deadline it missed
+        if obj in session.new:
+            if obj.created_at is None:
+                obj.created_at = datetime.utcnow()
+        elif not _policy_changed(obj):
+            continue
+        settings = settings or get_settings()
+        obj.sla_due = compute_sla_due(obj.created_at, obj.priority, obj.department_id, settings)
+
+
+@event.listens_for(Session, "after_flush")
+def _schedule_deadlines(session, flush_context):
+    if not has_app_context() or "sla" not in current_app.extensions:
+        return
+    scheduler = current_app.extensions["sla"]
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Ticket) or obj.sla_due is None or obj.sla_breached_at is not None:
+            continue
+        if obj.status not in OPEN_STATUSES:
+            continue
+        state = inspect(obj)
+        if obj in session.new or any(
+            state.attrs[attr].history.has_changes() for attr in ("sla_due", "status")
+        ):
+            # Reopened tickets are watched again; an overdue one breaches at once
+            session.info.setdefault("after_commit", []).append((scheduler.schedule, (obj.id, obj.sla_due)))
+
+
+def init_sla(app):
+    """
+    Attach the deadline scheduler. Its thread starts with the first request,
+    so CLI commands such as migrations never touch it.
+    """
+    scheduler = DeadlineScheduler(app)
+    app.extensions["sla"] = scheduler
+
+    @app.before_request
+    def _start_sla_scheduler():
+        scheduler.start()
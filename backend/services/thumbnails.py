@@ -0,0 +1,57 @@
+import os
+import tempfile
+from services.blob_store import THUMBNAIL_TYPES, blob_path
+from services.jobs import job
+from services.uploads import publish_file, upload_root
+
+# Pillow is optional; without it no thumbnails are made and the UI falls
+# back to the full image.
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+THUMBNAIL_SIZE = (320, 320)
+
+
+def has_thumbnail(attachment):
+    """
+    Whether the attachment's thumbnail has been made (the job runs after
+    the upload commits, so not yet on the first load of a new image).
+    """
+    return (
+        Image is not None and bool(attachment.blob_sha256) and attachment.content_type in THUMBNAIL_TYPES
+        and thumbnail_ready(attachment.blob_sha256)
+    )
+
+
+def thumbnail_ready(sha256):
+    return os.path.exists(thumbnail_path(sha256))
+
+
+def thumbnail_path(sha256):
+    return os.path.join(upload_root(), "thumbs", sha256[:2], f"{sha256}.png")
+
+
+@job("attachments.thumbnail")
+def make_thumbnail(sha256):
+    if Image is None:
+        return
+    dest = thumbnail_path(sha256)
+    if os.path.exists(dest):
+        return  # same content, already done
+
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    with Image.open(blob_path(sha256)) as image:
+        image.thumbnail(THUMBNAIL_SIZE)
+        if image.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+            image = image.convert("RGB")  # e.g. CMYK JPEGs; PNG cannot hold them
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dest), suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                image.save(out, format="PNG")
+            publish_file(tmp)
+            os.replace(tmp, dest)
+        except Exception:
+            os.remove(tmp)
+            raise
@@ -0,0 +1,197 @@
+from datetime import datetime
+from sqlalchemy import select, update
+from extensions import db
+from models.analytics import TRACKED, record_bulk_changes
+from models.ticket import Ticket, TicketStatusEnum, PriorityEnum
+from models.user import User, RoleEnum
+from services.assignment import pick_agent, record_bulk_loads
+from services.audit import audit
+from services.settings import get_settings
+from services.sla import OPEN_STATUSES, compute_sla_due, schedule_after_commit
+from services.ticket_chat import publish_ticket_state
+
+# Bulk ticket operations.
+#
+# The caller, agent and department are validated once; the tickets are read
+# in one SELECT (row-locked where the backend supports it) and written with
+# one executemany UPDATE by primary key, all in a single transaction.
+# Set-based writes skip the ORM flush hooks, so everything those hooks
+# maintain is done here explicitly from the before/after values:
+#   analytics rollups  - summed per bucket, one upsert each
+#   agent load counts  - services/assignment.py
+#   SLA deadlines      - recomputed on priority/department change, rescheduled
+# Titles and bodies are never touched, so the search index and blob
+# references need nothing.
+
+MAX_BULK_TICKETS = 500
+
+_COLUMNS = ("id", "created_at", "status", "priority", "department_id", "assigned_to_id",
+            "resolved_at", "rating", "sla_due", "sla_breached_at")
+
+
+def parse_ticket_ids(data):
+    """
+    The request's ticket_ids, de-duplicated in order.
+    Raises ValueError if missing, malformed or too many.
+    """
+    ids = data.get("ticket_ids")
+    if not isinstance(ids, list) or not ids:
+        raise ValueError("ticket_ids must be a non-empty list")
+    if not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        raise ValueError("ticket_ids must be integers")
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_BULK_TICKETS:
+        raise ValueError(f"At most {MAX_BULK_TICKETS} tickets per request")
+    return ids
+
+
+def _load(ticket_ids):
+    rows = db.session.execute(
+        select(*(getattr(Ticket, c) for c in _COLUMNS))
+        .where(Ticket.id.in_(ticket_ids))
+        .with_for_update()
+    ).all()
+    return {row.id: row._asdict() for row in rows}
+
+
+def _scope_error(actor, row):
+    if row is None:
+        return "Ticket not found"
+    if actor.role == RoleEnum.admin and row["department_id"] not in (None, actor.department_id):
+        return "You can only change tickets in your department"
+    return None
+
+
+def _apply(actor, changes, action):
+    """
+    Write [(old_row, new_values)] and everything derived from it.
+    """
+    settings = get_settings()
+    params, rollups, loads, deadlines = [], [], [], []
+    for old, new in changes:
+        merged = {**old, **new}
+        if not old["sla_breached_at"] and (
+            merged["priority"] != old["priority"] or merged["department_id"] != old["department_id"]
+        ):
+            merged["sla_due"] = new["sla_due"] = compute_sla_due(
+                old["created_at"], merged["priority"], merged["department_id"], settings
+            )
+        params.append({"id": old["id"], **new})
+        rollups.append((old["created_at"], {a: old[a] for a in TRACKED}, {a: merged[a] for a in TRACKED}))
+        loads.append((old["assigned_to_id"], old["status"], merged["assigned_to_id"], merged["status"]))
+        if (not merged["sla_breached_at"] and merged["sla_due"] and merged["status"] in OPEN_STATUSES
+                and (merged["sla_due"] != old["sla_due"] or old["status"] not in OPEN_STATUSES)):
+            deadlines.append((old["id"], merged["sla_due"]))
+        audit(actor.id, action, {"ticket_id": old["id"], "bulk": True, **{
+            k: (v.value if hasattr(v, "value") else v) for k, v in new.items() if k != "sla_due"
+        }})
+
+    if params:
+        db.session.execute(update(Ticket), params)
+        record_bulk_changes(db.session.connection(), rollups)
+        record_bulk_loads(loads)
+        schedule_after_commit(deadlines)
+
+
+def bulk_assign(actor, ticket_ids, department_id, agent_id=None):
+    """
+    Route tickets to `department_id` and an agent: `agent_id`, else the
+    least-loaded agent per ticket, else (superadmins only) the department
+    admin. Returns (results, error); error is a whole-request problem.
+    """
+    agent = None
+    if agent_id:
+        agent = db.session.get(User, agent_id)
+        if (not agent or agent.role != RoleEnum.agent or not agent.is_active
+                or agent.department_id != department_id):
+            return None, "Invalid agent"
+
+    fallback_id = None
+    if actor.role == RoleEnum.super_admin:
+        admin = User.query.filter_by(role=RoleEnum.admin, department_id=department_id).first()
+        fallback_id = admin.id if admin else None
+
+    rows = _load(ticket_ids)
+    results, changes = [], []
+    for ticket_id in ticket_ids:
+        row = rows.get(ticket_id)
+        error = _scope_error(actor, row)
+        if error is None and row["status"] == TicketStatusEnum.closed:
+            error = "Ticket is closed"
+        if error is None:
+            assignee = agent.id if agent else (pick_agent(department_id) or fallback_id)
+            if assignee is None:
+                error = "No active agents in the department"
+        if error:
+            results.append({"ticket_id": ticket_id, "ok": False, "error": error})
+            continue
+        changes.append((row, {"department_id": department_id, "assigned_to_id": assignee}))
+        results.append({"ticket_id": ticket_id, "ok": True, "assigned_to_id": assignee})
+
+    _apply(actor, changes, "ticket.assign")
+    return results, None
+
+
+def bulk_update(actor, ticket_ids, status=None, priority=None):
+    """
+    Set status and/or priority on many tickets. Moving to resolved/closed
+    stamps resolved_at; moving back to open/in_progress clears it and the
+    rating, like a reopen. Returns per-ticket results.
+    """
+    now = datetime.utcnow()
+    rows = _load(ticket_ids)
+    results, changes = [], []
+    for ticket_id in ticket_ids:
+        row = rows.get(ticket_id)
+        error = _scope_error(actor, row)
+        if error:
+            results.append({"ticket_id": ticket_id, "ok": False, "error": error})
+            continue
+
+        new = {}
+        if priority is not None and priority != row["priority"]:
+            new["priority"] = priority
+        if status is not None and status != row["status"]:
+            new["status"] = status
+            if status in OPEN_STATUSES:
+                if row["status"] not in OPEN_STATUSES:
+                    new.update(resolved_at=None, rating=None)
+            elif row["resolved_at"] is None:
+                new["resolved_at"] = now
+        if new:
+            changes.append((row, new))
+        results.append({"ticket_id": ticket_id, "ok": True, "changed": bool(new)})
+
+    _apply(actor, changes, "ticket.bulk_update")
+    return results
+
+
+def publish_bulk_states(results):
+    """
+    Push the new state of changed tickets to open chat streams (after commit).
+    """
+    changed = [r["ticket_id"] for r in results if r.get("changed")]
+    if changed:
+        for ticket in Ticket.query.filter(Ticket.id.in_(changed)):
+            publish_ticket_state(ticket)
+
+
+def parse_status_and_priority(data):
+    """
+    (status, priority) enums from the request; at least one is required.
+    Raises ValueError with the allowed values.
+    """
+    status = priority = None
+    if data.get("status") is not None:
+        try:
+            status = TicketStatusEnum(data["status"])
+        except ValueError:
+            raise ValueError(f"Invalid status. Allowed values: {[s.value for s in TicketStatusEnum]}")
+    if data.get("priority") is not None:
+        try:
+            priority = PriorityEnum(data["priority"])
+        except ValueError:
+            raise ValueError(f"Invalid priority. Allowed values: {[p.value for p in PriorityEnum]}")
+    if status is None and priority is None:
+        raise ValueError("Provide status and/or priority")
+    return status, priority
@@ -0,0 +1,188 @@
+import hashlib
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+from extensions import db
+from models.ticket import Attachment, Comment, Ticket
+from schemas import format_datetime
+from services.attachment_delivery import attachment_url, link_window, sign_link
+from services.blob_store import THUMBNAIL_TYPES
+from services.chat_events import publish_chat_event
+from services.thumbnails import has_thumbnail, thumbnail_ready
+from services.token_store import is_epoch_revoked
+from services.user_cache import get_user
+
+# Chat payloads for /<ticket_id>/chat.
+#
+# Clients pass the id of the last comment they have (`since`) and get only
+# newer comments, loaded with their authors and attachments in one joined
+# query. The ETag is derived from a couple of aggregate lookups, so an
+# unchanged chat is answered with 304 before any comment row is read.
+
+
+def parse_since(args):
+    """
+    Comment-id cursor from the query string; 0 means "everything".
+    Raises ValueError for anything that is not a non-negative integer.
+    """
+    raw = args.get("since")
+    if raw in (None, ""):
+        return 0
+    since = int(raw)
+    if since < 0:
+        raise ValueError("Invalid cursor")
+    return since
+
+
+def chat_etag(ticket, since, user_id):
+    last_comment, comment_count = (
+        db.session.query(func.max(Comment.id), func.count(Comment.id))
+        .filter(Comment.ticket_id == ticket.id, Comment.id > since)
+        .one()
+    )
+    last_attachment, attachment_count = (
+        db.session.query(func.max(Attachment.id), func.count(Attachment.id))
+        .filter(Attachment.ticket_id == ticket.id)
+        .one()
+    )
+    # thumbnail_url appears once the background job has made the thumbnail
+    thumbnails = sum(
+        thumbnail_ready(sha) for (sha,) in db.session.query(Attachment.blob_sha256).filter(
+            Attachment.ticket_id == ticket.id, Attachment.content_type.in_(THUMBNAIL_TYPES),
+            Attachment.blob_sha256.isnot(None),
+        ).distinct()
+    )
+    # Signed links (attachments, events_url) roll over with their link windows
+    parts = (
+        ticket.id, user_id, ticket.updated_at, since, last_comment, comment_count,
+        last_attachment, attachment_count, thumbnails, link_window(), link_window(_events_ttl()),
+    )
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def _attachment_data(base_url, att):
+    url = attachment_url(base_url, att)
+    return {
+        "id": att.id,
+        "filename": att.filename,
+        "url": url,
+        "thumbnail_url": f"{url}&variant=thumb" if has_thumbnail(att) else None,
+        "content_type": att.content_type,
+        "size": att.size
+    }
+
+
+def ticket_chat_header(base_url, ticket):
+    # Ticket-level attachments only (comment attachments come with comments)
+    attachments = (
+        Attachment.query
+        .filter(Attachment.ticket_id == ticket.id, Attachment.comment_id.is_(None))
+        .order_by(Attachment.id)
+        .all()
+    )
+    return {
+        "id": ticket.id,
+        "title": ticket.title,
+        "description": ticket.description,
+        "priority": ticket.priority.value if ticket.priority else None,
+        "status": ticket.status.value if ticket.status else None,
+        "created_at": format_datetime(ticket.created_at),
+        "attachments": [_attachment_data(base_url, a) for a in attachments]
+    }
+
+
+def message_data(base_url, comment, attachments):
+    return {
+        "id": comment.id,
+        "user": comment.user.name,
+        "body": comment.body,
+        "created_at": format_datetime(comment.created_at),
+        "attachments": [_attachment_data(base_url, a) for a in sorted(attachments, key=lambda a: a.id)]
+    }
+
+
+def chat_messages(base_url, ticket, since=0):
+    """
+    Comments with id > since, oldest first, and the cursor for the next call.
+    """
+    comments = (
+        Comment.query
+        .options(joinedload(Comment.user), joinedload(Comment.attachments))
+        .filter(Comment.ticket_id == ticket.id, Comment.id > since)
+        .order_by(Comment.id.asc())
+        .all()
+    )
+    messages = [message_data(base_url, c, c.attachments) for c in comments]
+    return messages, (comments[-1].id if comments else since)
+
+
+def _events_ttl():
+    return current_app.config.get("CHAT_EVENTS_URL_TTL", 300)
+
+
+def events_link_name(user_id, epoch):
+    return f"events:{user_id}:{epoch}"
+
+
+def events_url(base_url, ticket, user):
+    # EventSource cannot send an Authorization header, so the stream URL is
+    # signed: short-lived (clients fetch a new one from /chat) and bound to
+    # the user's token epoch, so revoking their tokens voids it too
+    name = events_link_name(user.id, user.token_epoch or 0)
+    return f"{base_url}/{ticket.id}/events?user={user.id}&{sign_link(ticket.id, name, _events_ttl())}"
+
+
+def can_stream(user, ticket, epoch):
+    """
+    Whether `user` may (still) follow the ticket's chat with a link or token
+    issued at token epoch `epoch`.
+    """
+    return (
+        user is not None and user.is_active
+        and epoch == (user.token_epoch or 0) and not is_epoch_revoked(user.id, epoch)
+        and user.id in (ticket.created_by_id, ticket.assigned_to_id)
+    )
+
+
+def stream_access_check(ticket_id, user_id, epoch):
+    """
+    Callable for stream_chat_events that re-runs can_stream() in a fresh app
+    context, since the stream outlives the request.
+    """
+    app = current_app._get_current_object()
+
+    def check():
+        with app.app_context():
+            ticket = db.session.get(Ticket, ticket_id)
+            return ticket is not None and can_stream(get_user(user_id), ticket, epoch)
+    return check
+
+
+def ticket_state(ticket):
+    return {
+        "id": ticket.id,
+        "status": ticket.status.value if ticket.status else None,
+        "rating": ticket.rating,
+        "priority": ticket.priority.value if ticket.priority else None,
+        "sla_due": format_datetime(ticket.sla_due),
+        "sla_breached": ticket.sla_breached_at is not None,
+    }
+
+
+# -------------------------------
+# Push events (call after commit)
+# -------------------------------
+
+def publish_message(base_url, comment, attachments):
+    publish_chat_event(comment.ticket_id, {"type": "message", "message": message_data(base_url, comment, attachments)})
+
+
+def publish_attachments(base_url, ticket_id, attachments):
+    publish_chat_event(ticket_id, {
+        "type": "attachments",
+        "attachments": [_attachment_data(base_url, a) for a in attachments],
+    })
+
+
+def publish_ticket_state(ticket):
+    publish_chat_event(ticket.id, {"type": "ticket", "ticket": ticket_state(ticket)})
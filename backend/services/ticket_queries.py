@@ -0,0 +1,156 @@
+from collections import defaultdict
+from sqlalchemy.orm import aliased, joinedload
+from models.ticket import Ticket, Attachment, TicketStatusEnum, PriorityEnum
+from models.user import User, Department
+from utils.pagination import keyset_paginate
+
+# Keep IN (...) lists well under SQLite's bound-parameter limit
+IN_CHUNK_SIZE = 500
+
+_creator = aliased(User, name="creator")
+_assignee = aliased(User, name="assignee")
+
+# List field -> the column it reads (see project_tickets)
+TICKET_COLUMNS = {
+    "id": Ticket.id,
+    "title": Ticket.title,
+    "description": Ticket.description,
+    "priority": Ticket.priority,
+    "status": Ticket.status,
+    "created_by": _creator.name,
+    "assigned_to": _assignee.name,
+    "department": Department.name,
+    "created_at": Ticket.created_at,
+    "sla_due": Ticket.sla_due,
+    "resolved_at": Ticket.resolved_at,
+    "rating": Ticket.rating,
+}
+# Joins for the fields that read another table
+TICKET_JOINS = {
+    "created_by": (_creator, Ticket.created_by_id == _creator.id),
+    "assigned_to": (_assignee, Ticket.assigned_to_id == _assignee.id),
+    "department": (Department, Ticket.department_id == Department.id),
+}
+
+
+def with_ticket_relations(query):
+    """
+    Load created_by, assigned_to and department in the same SELECT as the tickets.
+    """
+    return query.options(
+        joinedload(Ticket.created_by),
+        joinedload(Ticket.assigned_to),
+        joinedload(Ticket.department),
+    )
+
+
+def project_tickets(query, fields):
+    """
+    Select only the columns for `fields` (plus id and created_at, which the
+    keyset cursor needs) as plain rows labelled with the field names, joining
+    users/department only for the names asked for. No Ticket instances are
+    built or kept in the session. Names without a column (e.g. "attachments")
+    are skipped.
+    """
+    names = [n for n in dict.fromkeys(("id", "created_at", *fields)) if n in TICKET_COLUMNS]
+    query = query.with_entities(*(TICKET_COLUMNS[n].label(n) for n in names))
+    for name in names:
+        if name in TICKET_JOINS:
+            query = query.outerjoin(*TICKET_JOINS[name])
+    return query
+
+
+def attachments_by_ticket(ticket_ids):
+    """
+    Fetch the attachments (and their uploaders) for many tickets at once.
+    Returns {ticket_id: [Attachment, ...]} ordered by attachment id.
+    """
+    grouped = defaultdict(list)
+    ticket_ids = list(ticket_ids)
+
+    for start in range(0, len(ticket_ids), IN_CHUNK_SIZE):
+        chunk = ticket_ids[start:start + IN_CHUNK_SIZE]
+        attachments = (
+            Attachment.query
+            .options(joinedload(Attachment.uploaded_by))
+            .filter(Attachment.ticket_id.in_(chunk))
+            .order_by(Attachment.id)
+            .all()
+        )
+        for a in attachments:
+            grouped[a.ticket_id].append(a)
+
+    return grouped
+
+
+def with_attachments(tickets):
+    """
+    Pair each ticket with its attachments, batch-loaded in one extra SELECT.
+    Returns a list of (ticket, attachments) pairs.
+    """
+    attachments = attachments_by_ticket(t.id for t in tickets)
+    return [(t, attachments.get(t.id, [])) for t in tickets]
+
+
+def _parse_enum_list(raw, enum_cls, label):
+    values = [v.strip() for v in raw.split(",") if v.strip()]
+    try:
+        return [enum_cls(v) for v in values]
+    except ValueError:
+        raise ValueError(f"Invalid {label}. Allowed values: {[e.value for e in enum_cls]}")
+
+
+def _parse_id_filter(raw, label):
+    """
+    'none' matches NULL, 'any' matches NOT NULL, anything else must be an id.
+    """
+    if raw in ("none", "any"):
+        return raw
+    try:
+        return int(raw)
+    except ValueError:
+        raise ValueError(f"{label} must be an id, 'none' or 'any'")
+
+
+def _filter_on_id(query, column, value):
+    if value == "none":
+        return query.filter(column.is_(None))
+    if value == "any":
+        return query.filter(column.isnot(None))
+    return query.filter(column == value)
+
+
+def apply_ticket_filters(query, args):
+    """
+    Narrow a ticket query with the list filters from the query string:
+      status=open,in_progress   priority=high,urgent
+      department=<id>|none|any  assignee=<id>|none|any
+    Raises ValueError on malformed values.
+    """
+    if args.get("status"):
+        query = query.filter(Ticket.status.in_(_parse_enum_list(args["status"], TicketStatusEnum, "status")))
+
+    if args.get("priority"):
+        query = query.filter(Ticket.priority.in_(_parse_enum_list(args["priority"], PriorityEnum, "priority")))
+
+    if args.get("department"):
+        query = _filter_on_id(query, Ticket.department_id, _parse_id_filter(args["department"], "department"))
+
+    if args.get("assignee"):
+        query = _filter_on_id(query, Ticket.assigned_to_id, _parse_id_filter(args["assignee"], "assignee"))
+
+    return query
+
+
+def paginate_tickets(query, args, cursor_param="cursor", fields=None):
+    """
+    Apply the list filters and return one keyset page: (tickets, next_cursor).
+    With `fields` the page is projected rows (see project_tickets), otherwise
+    Ticket objects with their users/department eager-loaded.
+    """
+    query = apply_ticket_filters(query, args)
+    if fields is None:
+        query = with_ticket_relations(query)
+    else:
+        query = project_tickets(query, fields)
+    return keyset_paginate(query, Ticket.created_at, Ticket.id, args, cursor_param)
@@ -0,0 +1,258 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from flask import current_app, has_app_context
+from sqlalchemy import delete, event, insert, inspect, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from extensions import db
+from models.revoked_token import RevokedToken
+from models.user import User
+
+# JWT revocation shared by every worker.
+#
+# A backend (DB table or a host-local SQLite file) is the source of truth.
+# Each worker keeps the unexpired revoked jtis in a dict and pulls rows added
+# since its last sync at most once per sync interval, so the
+# per-request check is a dict lookup and the backend sees roughly one small
+# query per worker per interval instead of one per request.
+#
+# Tokens also carry their user's token epoch. Revoking a user's tokens bumps
+# the epoch and revokes the marker "user:<id>:<old epoch>" like a jti, so
+# every token issued before stops working and the check stays a dict lookup.
+
+
+# The DB store re-reads revocations this far back on every sync: revoked_at
+# is taken before the INSERT commits and on different hosts' clocks, so a
+# row can become visible after one with a later revoked_at
+SYNC_OVERLAP = timedelta(seconds=30)
+
+
+def _utcnow():
+    return datetime.utcnow()
+
+
+class DatabaseRevocationStore:
+    """
+    Revocations in the app database (revoked_tokens table).
+    Works across hosts; uses its own connection so it never touches the
+    request's session/transaction.
+    """
+
+    def __init__(self, engine_getter):
+        self._engine = engine_getter
+        self._table = RevokedToken.__table__
+
+    def revoke(self, jti, expires_at):
+        t = self._table
+        engine = self._engine()
+        with engine.begin() as conn:
+            conn.execute(delete(t).where(t.c.expires_at < _utcnow()))
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(t).values(jti=jti, expires_at=expires_at, revoked_at=_utcnow()))
+            return True
+        except IntegrityError:
+            return False  # already revoked
+
+    def revoked_since(self, cursor):
+        """
+        ([(jti, expires_at)], next cursor). The cursor is the latest revoked_at
+        seen; ids are not usable because sequence values are handed out at
+        INSERT time, so a lower id can commit after a higher one.
+        """
+        t = self._table
+        query = select(t.c.jti, t.c.expires_at, t.c.revoked_at).where(t.c.expires_at > _utcnow())
+        if cursor is not None:
+            query = query.where(t.c.revoked_at >= cursor - SYNC_OVERLAP)
+        with self._engine().connect() as conn:
+            rows = conn.execute(query).all()
+        latest = max((r.revoked_at for r in rows), default=cursor)
+        return [(r.jti, r.expires_at) for r in rows], latest
+
+
+class SQLiteRevocationStore:
+    """
+    Revocations in a standalone SQLite file (WAL mode) shared by the workers
+    on one host. Needs no app database access.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS revoked_tokens ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " jti TEXT NOT NULL UNIQUE,"
+                " expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_revoked_tokens_expires_at ON revoked_tokens (expires_at)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def revoke(self, jti, expires_at):
+        expires_ts = expires_at.replace(tzinfo=timezone.utc).timestamp()
+        with self._conn() as conn:
+            conn.execute("DELETE FROM revoked_tokens WHERE expires_at < ?", (time.time(),))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO revoked_tokens (jti, expires_at) VALUES (?, ?)", (jti, expires_ts)
+            )
+            return cursor.rowcount == 1
+
+    def revoked_since(self, cursor):
+        """
+        ([(jti, expires_at)], next cursor). SQLite has one writer at a time
+        and an INSERT holds the write lock until it commits, so ids are
+        commit-ordered and the last id seen is a safe cursor.
+        """
+        rows = self._conn().execute(
+            "SELECT id, jti, expires_at FROM revoked_tokens WHERE id > ? AND expires_at > ? ORDER BY id",
+            (cursor or 0, time.time()),
+        ).fetchall()
+        revoked = [
+            (jti, datetime.fromtimestamp(exp, tz=timezone.utc).replace(tzinfo=None))
+            for _, jti, exp in rows
+        ]
+        return revoked, (rows[-1][0] if rows else cursor)
+
+
+class RevocationCache:
+    """
+    Per-worker view of the revoked tokens, synced from a store.
+    Tokens revoked by this worker are visible immediately; tokens revoked by
+    other workers become visible within `sync_interval` seconds.
+    """
+
+    def __init__(self, store, sync_interval=1.0):
+        self.store = store
+        self.sync_interval = sync_interval
+        self._revoked = {}  # jti -> expires_at (naive UTC)
+        self._cursor = None  # store-specific position of the last sync
+        self._next_sync = 0.0
+        self._lock = threading.Lock()
+
+    def revoke(self, jti, expires_at):
+        """
+        Returns False if it was already revoked (by any worker).
+        """
+        first = self.store.revoke(jti, expires_at)
+        with self._lock:
+            self._revoked[jti] = expires_at
+        return first
+
+    def is_revoked(self, jti):
+        now = time.monotonic()
+        if now >= self._next_sync:
+            self._sync(now)
+        return jti in self._revoked
+
+    def _sync(self, now):
+        with self._lock:
+            if now < self._next_sync:
+                return  # another thread just synced
+            self._next_sync = now + self.sync_interval
+            # Stores may return rows already seen; the dict absorbs them
+            revoked, self._cursor = self.store.revoked_since(self._cursor)
+            for jti, expires_at in revoked:
+                self._revoked[jti] = expires_at
+            # Entries expire with their tokens
+            cutoff = _utcnow()
+            for jti in [j for j, exp in self._revoked.items() if exp <= cutoff]:
+                del self._revoked[jti]
+
+
+def init_token_store(app):
+    """
+    Build the configured revocation store and attach it to the app.
+    JWT_REVOCATION_STORE: "db" (default) or "sqlite".
+    """
+    backend = app.config.get("JWT_REVOCATION_STORE", "db")
+    if backend == "sqlite":
+        path = app.config.get("JWT_REVOCATION_SQLITE_PATH") or os.path.join(app.instance_path, "revoked_tokens.sqlite")
+        store = SQLiteRevocationStore(path)
+    elif backend == "db":
+        store = DatabaseRevocationStore(lambda: db.engine)
+    else:
+        raise ValueError(f"Unknown JWT_REVOCATION_STORE: {backend}")
+
+    app.extensions["token_revocation"] = RevocationCache(
+        store, sync_interval=app.config.get("JWT_REVOCATION_SYNC_SECONDS", 1.0)
+    )
+
+
+def _cache():
+    return current_app.extensions["token_revocation"]
+
+
+def revoke_token(jwt_payload):
+    """
+    Revoke a decoded JWT until its own expiry. Returns False if it already was.
+    """
+    expires_at = datetime.fromtimestamp(jwt_payload["exp"], tz=timezone.utc).replace(tzinfo=None)
+    return _cache().revoke(jwt_payload["jti"], expires_at)
+
+
+def _epoch_marker(user_id, epoch):
+    return f"user:{user_id}:{epoch}"
+
+
+def is_token_revoked(jwt_payload):
+    if _cache().is_revoked(jwt_payload["jti"]):
+        return True
+    epoch = jwt_payload.get("epoch")
+    return epoch is not None and is_epoch_revoked(jwt_payload["sub"], epoch)
+
+
+def is_epoch_revoked(user_id, epoch):
+    """
+    Whether tokens (and signed links) issued to the user at `epoch` were revoked.
+    """
+    return _cache().is_revoked(_epoch_marker(user_id, epoch))
+
+
+def _token_lifetime():
+    # Longest any token can live; an epoch marker is kept that long
+    config = current_app.config
+    return max(config["JWT_REFRESH_TOKEN_EXPIRES"], config["JWT_ACCESS_TOKEN_EXPIRES"], timedelta(days=1))
+
+
+def revoke_user_tokens(user, session=None):
+    """
+    Revoke every token issued to `user` so far by bumping its token epoch.
+    Takes effect when the transaction commits.
+    """
+    session = session or db.session()
+    epoch = user.token_epoch or 0
+    user.token_epoch = epoch + 1
+    marker, expires_at = _epoch_marker(user.id, epoch), _utcnow() + _token_lifetime()
+    session.info.setdefault("after_commit", []).append((_cache().revoke, (marker, expires_at)))
+
+
+# Tokens carry role and department and say whether the account was active:
+# changing any of these, or deleting the user, revokes them
+_CLAIM_ATTRS = ("role", "department_id", "is_active")
+
+
+@event.listens_for(Session, "before_flush")
+def _revoke_stale_claims(session, flush_context, instances):
+    if not has_app_context() or "token_revocation" not in current_app.extensions:
+        return
+    for obj in session.dirty:
+        if isinstance(obj, User) and obj.id is not None:
+            state = inspect(obj)
+            if any(state.attrs[attr].history.has_changes() for attr in _CLAIM_ATTRS):
+                revoke_user_tokens(obj, session)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            revoke_user_tokens(obj, session)
@@ -0,0 +1,238 @@
+import hashlib
+import os
+import tempfile
+import weakref
+from dataclasses import dataclass
+from flask import Request, current_app
+from services.settings import get_setting
+
+# Streaming upload pipeline.
+#
+# Werkzeug normally spools every multipart file into memory/tempfiles before
+# the view runs, and the views then copy it again with file.save(). Here the
+# multipart parser writes each file part straight into a temp file under the
+# upload folder, in the parser's fixed-size chunks, while we hash it, count
+# its size and sniff its first bytes. Saving is then a rename, not a copy.
+
+CHUNK_SIZE = 64 * 1024
+SNIFF_BYTES = 16
+DEFAULT_MAX_FILE_SIZE = 100 * 1024 * 1024
+DEFAULT_FILE_MODE = 0o644
+
+# Read once: os.umask() can only be queried by setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+MIME_TYPES = {
+    'png': 'image/png',
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'gif': 'image/gif',
+    'pdf': 'application/pdf',
+    'mp4': 'video/mp4',
+    'mov': 'video/quicktime',
+    'avi': 'video/x-msvideo',
+}
+
+# ISO-BMFF box types that can open an mp4/mov file
+_MP4_BOXES = (b'ftyp', b'moov', b'mdat', b'wide', b'free', b'skip', b'pnot')
+
+
+def _signature_matches(ext, head):
+    if ext == 'png':
+        return head.startswith(b'\x89PNG\r\n\x1a\n')
+    if ext in ('jpg', 'jpeg'):
+        return head.startswith(b'\xff\xd8\xff')
+    if ext == 'gif':
+        return head.startswith((b'GIF87a', b'GIF89a'))
+    if ext == 'pdf':
+        return head.startswith(b'%PDF-')
+    if ext in ('mp4', 'mov'):
+        return head[4:8] in _MP4_BOXES
+    if ext == 'avi':
+        return head.startswith(b'RIFF') and head[8:12] == b'AVI '
+    return False
+
+
+def file_extension(filename):
+    return filename.rsplit('.', 1)[1].lower() if filename and '.' in filename else ''
+
+
+def allowed_extensions():
+    # Runtime setting (services/settings.py)
+    return get_setting("uploads.allowed_extensions")
+
+
+def allowed_file(filename):
+    return file_extension(filename) in allowed_extensions()
+
+
+def disallowed_message(filename):
+    return f"File type not allowed for {filename}. Allowed types: {sorted(allowed_extensions())}"
+
+
+class UploadRejected(Exception):
+    """
+    Raised while the body is being parsed; views turn it into a JSON error.
+    """
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class StoredUpload:
+    path: str
+    size: int
+    sha256: str
+    content_type: str
+
+
+def _discard(fileobj, path):
+    try:
+        fileobj.close()
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class UploadStream:
+    """
+    Writable temp file used by the multipart parser for one file part.
+    Tracks size and SHA-256 as chunks arrive and rejects the part as soon as
+    it is too large or its first bytes do not match its extension. The temp
+    file is removed when the stream is dropped without being committed.
+    """
+
+    def __init__(self, filename, incoming_dir, max_size):
+        self.filename = filename
+        self.ext = file_extension(filename)
+        self.max_size = max_size
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._head = b''
+        self._sniffed = False
+
+        fd, self.path = tempfile.mkstemp(dir=incoming_dir, suffix='.part')
+        self._file = os.fdopen(fd, 'w+b')
+        self._finalizer = weakref.finalize(self, _discard, self._file, self.path)
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise UploadRejected(
+                f"{self.filename} exceeds the {self.max_size // (1024 * 1024)} MB per-file limit", 413
+            )
+        if not self._sniffed:
+            self._head += data[:SNIFF_BYTES]
+            if len(self._head) >= SNIFF_BYTES:
+                self._sniff()
+        self._hash.update(data)
+        return self._file.write(data)
+
+    def _sniff(self):
+        self._sniffed = True
+        if not _signature_matches(self.ext, self._head[:SNIFF_BYTES]):
+            raise UploadRejected(f"Content of {self.filename} does not match its file type", 415)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        # The parser seeks back to 0 once the part is complete
+        if not self._sniffed:
+            self._sniff()
+        return self._file.seek(offset, whence)
+
+    @property
+    def sha256(self):
+        return self._hash.hexdigest()
+
+    @property
+    def content_type(self):
+        return MIME_TYPES.get(self.ext)
+
+    def commit(self, dest_path):
+        """
+        Move the finished temp file into place (same filesystem, no copy).
+        """
+        self._file.close()
+        publish_file(self.path)
+        os.replace(self.path, dest_path)
+        self._finalizer.detach()
+
+    def discard(self):
+        """
+        Drop the temp file (e.g. its content is already stored).
+        """
+        self._finalizer()
+
+    def __getattr__(self, name):
+        if name == '_file':
+            raise AttributeError(name)
+        return getattr(self._file, name)
+
+
+def publish_file(path):
+    """
+    Give a temp file (mkstemp makes them 0600) the mode of stored files,
+    UPLOAD_FILE_MODE less the umask, before it is moved into place: with
+    ATTACHMENT_DELIVERY=x-accel/x-sendfile the front proxy reads it, often
+    as another user.
+    """
+    os.chmod(path, current_app.config.get("UPLOAD_FILE_MODE", DEFAULT_FILE_MODE) & ~_UMASK)
+
+
+def incoming_dir():
+    path = os.path.join(upload_root(), '.incoming')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def upload_root():
+    return current_app.config.get("UPLOAD_FOLDER", os.path.join(os.getcwd(), "uploads"))
+
+
+class StreamingUploadRequest(Request):
+    """
+    Request class that streams multipart file parts through UploadStream.
+    Disallowed extensions are refused before a single byte is written.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if not filename:
+            # Empty file input; the views skip these
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        if not allowed_file(filename):
+            raise UploadRejected(disallowed_message(filename))
+        max_size = current_app.config.get("MAX_UPLOAD_FILE_SIZE", DEFAULT_MAX_FILE_SIZE)
+        if content_length and content_length > max_size:
+            raise UploadRejected(f"{filename} exceeds the per-file size limit", 413)
+        return UploadStream(filename, incoming_dir(), max_size)
+
+
+def save_upload(file, dest_dir, dest_name):
+    """
+    Persist an uploaded FileStorage as dest_dir/dest_name.
+    Returns a StoredUpload with the final path, size, SHA-256 and a
+    content type derived from the verified file signature.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    dest_path = os.path.join(dest_dir, dest_name)
+    stream = file.stream
+
+    if isinstance(stream, UploadStream):
+        stream.commit(dest_path)
+        return StoredUpload(dest_path, stream.size, stream.sha256, stream.content_type or file.content_type)
+
+    # Not parsed by StreamingUploadRequest (e.g. constructed FileStorage):
+    # copy in chunks, hashing on the way
+    digest = hashlib.sha256()
+    size = 0
+    with open(dest_path, 'wb') as out:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+            out.write(chunk)
+    return StoredUpload(dest_path, size, digest.hexdigest(), file.content_type)
@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy.orm import make_transient_to_detached
+from extensions import db
+from models.user import User
+
+# Short-TTL, per-process cache of user rows for the auth layer.
+# Enabled by setting USER_CACHE_TTL (seconds) > 0. Writes that change a user
+# call invalidate_user(); other workers see the change once the TTL runs out.
+
+MAX_ENTRIES = 2048
+
+_entries = OrderedDict()  # user_id -> (expires_at, column values)
+_lock = threading.Lock()
+
+
+def _ttl():
+    return current_app.config.get("USER_CACHE_TTL", 0)
+
+
+def _snapshot(user):
+    return {c.key: getattr(user, c.key) for c in User.__table__.columns}
+
+
+def _attach(values):
+    # Rebuild a persistent User in this request's session without a SELECT
+    user = User(**values)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+
+def get_user(user_id):
+    """
+    User by id, served from the cache while fresh, else from the DB.
+    Returns None if the user does not exist.
+    """
+    user_id = int(user_id)
+    ttl = _ttl()
+    if ttl <= 0:
+        return db.session.get(User, user_id)
+
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry and entry[0] > now:
+            _entries.move_to_end(user_id)
+            values = entry[1]
+        else:
+            values = None
+
+    if values is not None:
+        return _attach(values)
+
+    user = db.session.get(User, user_id)
+    if user is not None:
+        with _lock:
+            _entries[user_id] = (now + ttl, _snapshot(user))
+            _entries.move_to_end(user_id)
+            while len(_entries) > MAX_ENTRIES:
+                _entries.popitem(last=False)
+    return user
+
+
+def invalidate_user(user_id):
+    with _lock:
+        _entries.pop(int(user_id), None)
+
+
+def clear_user_cache():
+    with _lock:
+        _entries.clear()
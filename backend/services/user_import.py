@@ -0,0 +1,238 @@
+import csv
+import io
+import json
+from flask import current_app
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models.user import User, Department, RoleEnum
+from services.assignment import record_new_agents
+from services.audit import audit
+from services.passwords import hash_passwords
+
+# Bulk user provisioning.
+#
+# Rows are read lazily from CSV or JSON Lines and handled in batches of
+# USER_IMPORT_BATCH_SIZE: validated, checked against existing emails with one
+# SELECT .. IN, hashed on the password pool (services/passwords.py),
+# inserted with one multi-row INSERT and committed. A bad row never stops
+# the import; it is reported with its line number. Departments are looked
+# up once, by id or name, before the first row.
+
+DEFAULT_BATCH_SIZE = 500
+# Rows accepted per HTTP request; the CLI has no limit
+MAX_IMPORT_ROWS = 10000
+
+FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+}
+
+
+def read_rows(stream, fmt):
+    """
+    Yield (line number, row) from a text stream. A row that cannot be
+    parsed is yielded as a ValueError.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, {k.strip().lower(): v for k, v in row.items() if k}
+    elif fmt == "jsonl":
+        for line_no, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                row = ValueError(f"Invalid JSON ({e.msg})")
+            yield line_no, row
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def request_rows(req):
+    """
+    Rows from the request body: CSV or JSON Lines (streamed, by Content-Type)
+    or a JSON object {"users": [...]}. Raises ValueError for anything else.
+    """
+    fmt = FORMATS.get(req.mimetype)
+    if fmt:
+        stream = io.TextIOWrapper(io.BufferedReader(req.stream), encoding="utf-8-sig", newline="")
+        return read_rows(stream, fmt)
+    data = req.get_json(silent=True)
+    if isinstance(data, dict) and isinstance(data.get("users"), list):
+        return enumerate(data["users"], 1)
+    raise ValueError(f"Send CSV or JSON Lines ({', '.join(FORMATS)}) or a JSON body with a 'users' list")
+
+
+def _text(row, key):
+    value = row.get(key)
+    return value.strip() if isinstance(value, str) else ("" if value is None else str(value).strip())
+
+
+class UserImporter:
+    """
+    Creates users from rows with name, email, password and optionally role
+    and department (id or name). An admin may only import agents into their
+    own department; a superadmin (or the CLI, actor None) may import admins,
+    agents and customers.
+    """
+
+    def __init__(self, actor=None, default_role=RoleEnum.agent, batch_size=None, max_rows=None):
+        # Plain values: the per-batch commits expire the actor's attributes
+        self.actor_id = actor.id if actor is not None else None
+        self.admin_scoped = actor is not None and actor.role == RoleEnum.admin
+        self.actor_department_id = actor.department_id if actor is not None else None
+        self.default_role = default_role
+        self.batch_size = batch_size or current_app.config.get("USER_IMPORT_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+        self.max_rows = max_rows
+        if self.admin_scoped:
+            self.roles = {RoleEnum.agent}
+        else:
+            self.roles = {RoleEnum.admin, RoleEnum.agent, RoleEnum.customer}
+
+        departments = db.session.execute(select(Department.id, Department.name)).all()
+        self.department_names = {dept_id: name for dept_id, name in departments}
+        self.department_ids = {name: dept_id for dept_id, name in departments}
+        # One admin per department, as with /superadmin/create-admin
+        self.admin_departments = set(db.session.execute(
+            select(User.department_id).where(User.role == RoleEnum.admin, User.department_id.isnot(None))
+        ).scalars())
+        self.seen = set()
+        self.created = []
+        self.errors = []
+
+    def run(self, rows):
+        """
+        Import every row; returns the report.
+        """
+        batch, count = [], 0
+        for line, row in rows:
+            count += 1
+            if self.max_rows is not None and count > self.max_rows:
+                self._fail(line, None, f"Row limit of {self.max_rows} reached; later rows were not imported")
+                break
+            try:
+                batch.append((line, self._validate(row)))
+            except ValueError as e:
+                self._fail(line, row.get("email") if isinstance(row, dict) else None, str(e))
+            if len(batch) >= self.batch_size:
+                self._insert(batch)
+                batch = []
+        if batch:
+            self._insert(batch)
+        return self.report()
+
+    def report(self):
+        return {
+            "created": len(self.created),
+            "failed": len(self.errors),
+            "users": self.created,
+            "errors": sorted(self.errors, key=lambda e: e["line"]),
+        }
+
+    def _fail(self, line, email, error):
+        self.errors.append({"line": line, "email": email, "error": error})
+
+    def _validate(self, row):
+        if isinstance(row, ValueError):
+            raise row
+        if not isinstance(row, dict):
+            raise ValueError("Expected an object")
+        values = {key: _text(row, key) for key in ("name", "email", "password")}
+        for key, value in values.items():
+            if not value:
+                raise ValueError(f"'{key}' is required")
+        if "@" not in values["email"]:
+            raise ValueError("Invalid email")
+        values["password"] = row.get("password")  # as given, not stripped
+
+        role_name = _text(row, "role")
+        try:
+            role = RoleEnum(role_name) if role_name else self.default_role
+        except ValueError:
+            role = None
+        if role not in self.roles:
+            raise ValueError(f"Role must be one of {sorted(r.value for r in self.roles)}")
+
+        values["role"] = role
+        values["department_id"] = self._department(role, _text(row, "department"))
+        return values
+
+    def _department(self, role, given):
+        if role == RoleEnum.customer:
+            if given:
+                raise ValueError("Customers cannot be assigned to a department")
+            return None
+        if self.admin_scoped:
+            own = self.actor_department_id
+            if not own:
+                raise ValueError("Admin is not assigned to any department")
+            if given and given not in (str(own), self.department_names.get(own)):
+                raise ValueError("You can only add agents to your own department")
+            return own
+        if not given:
+            raise ValueError("'department' is required")
+        if given.isdigit() and int(given) in self.department_names:
+            return int(given)
+        if given in self.department_ids:
+            return self.department_ids[given]
+        raise ValueError(f"Invalid department: '{given}'")
+
+    def _insert(self, batch, retry=True):
+        emails = [values["email"] for _, values in batch]
+        existing = set(db.session.execute(select(User.email).where(User.email.in_(emails))).scalars())
+
+        accepted, seen, admin_departments = [], set(), set()
+        for line, values in batch:
+            email, department_id = values["email"], values["department_id"]
+            if email in existing:
+                self._fail(line, email, "Email already exists")
+            elif email in self.seen or email in seen:
+                self._fail(line, email, "Duplicate email in this import")
+            elif values["role"] == RoleEnum.admin and (
+                department_id in self.admin_departments or department_id in admin_departments
+            ):
+                self._fail(line, email, f"An admin already exists for '{self.department_names[department_id]}'")
+            else:
+                seen.add(email)
+                if values["role"] == RoleEnum.admin:
+                    admin_departments.add(department_id)
+                accepted.append((line, values))
+        if not accepted:
+            return
+
+        hashes = hash_passwords(values["password"] for _, values in accepted)
+        params = [
+            {
+                "name": values["name"],
+                "email": values["email"],
+                "password_hash": password_hash,
+                "role": values["role"],
+                "department_id": values["department_id"],
+                "is_active": True,
+                "created_by": self.actor_id,
+            }
+            for (_, values), password_hash in zip(accepted, hashes)
+        ]
+        try:
+            # Order-free RETURNING keeps this one multi-row statement
+            ids = dict(db.session.execute(insert(User).returning(User.email, User.id), params).all())
+        except IntegrityError:
+            # Someone else took an email since the check: check again, once
+            db.session.rollback()
+            if not retry:
+                raise
+            return self._insert(accepted, retry=False)
+
+        for line, values in accepted:
+            user_id = ids[values["email"]]
+            audit(self.actor_id, "user.create", {"user_id": user_id, "role": values["role"].value, "bulk": True})
+            self.created.append({"line": line, "id": user_id, "email": values["email"], "role": values["role"].value})
+        # Bulk INSERTs skip the flush hooks that put new agents into rotation
+        record_new_agents(values["department_id"] for _, values in accepted if values["role"] == RoleEnum.agent)
+        db.session.commit()
+        self.seen |= seen
+        self.admin_departments |= admin_departments
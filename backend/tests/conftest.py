@@ -0,0 +1,92 @@
+import os
+import sys
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+
+import pytest
+
+# Throwaway database and upload folder, set before the config is imported
+_tmp = tempfile.mkdtemp(prefix="ticket-system-tests-")
+os.environ["TEST_DATABASE_URI"] = "sqlite:///" + os.path.join(_tmp, "test.db")
+os.environ["UPLOAD_FOLDER"] = os.path.join(_tmp, "uploads")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event  # noqa: E402
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models.user import Department, User  # noqa: E402
+from services.passwords import hash_password  # noqa: E402
+
+PASSWORD = "password"
+
+
+@pytest.fixture(scope="session")
+def app():
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def department(app):
+    dept = Department(name=f"dept-{uuid.uuid4().hex[:8]}")
+    db.session.add(dept)
+    db.session.commit()
+    return dept
+
+
+@pytest.fixture
+def make_user(app):
+    def make(role, department=None, name=None):
+        name = name or f"{role.value}-{uuid.uuid4().hex[:8]}"
+        user = User(
+            name=name,
+            email=f"{name}@example.com",
+            password_hash=hash_password(PASSWORD),
+            role=role,
+            department_id=department.id if department is not None else None,
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return make
+
+
+@pytest.fixture
+def auth_headers(client):
+    def headers(user):
+        response = client.post("/auth/login", json={"email": user.email, "password": PASSWORD})
+        assert response.status_code == 200, response.get_json()
+        return {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+    return headers
+
+
+@pytest.fixture
+def capture_queries(app):
+    """
+    Record the statements (and their parameters) run on this thread, so the
+    SLA/audit worker threads do not show up in the counts.
+    """
+    @contextmanager
+    def capture():
+        thread, queries = threading.get_ident(), []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if threading.get_ident() == thread:
+                queries.append((statement, parameters))
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            yield queries
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+    return capture
+
@@ -0,0 +1,45 @@
+from extensions import db
+from models.ticket import Ticket
+from models.user import RoleEnum
+from services.assignment import pick_agent
+
+
+def _engine(app):
+    return app.extensions["assignment"]
+
+
+def test_pick_is_released_when_session_closes_without_commit(app, department, make_user):
+    agent = make_user(RoleEnum.agent, department)
+    assert _engine(app).loads(department.id) == {agent.id: 0}
+
+    assert pick_agent(department.id) == agent.id
+    assert _engine(app).loads(department.id) == {agent.id: 1}
+
+    # e.g. a view that returns an error after picking: teardown only closes
+    db.session.close()
+    assert _engine(app).loads(department.id) == {agent.id: 0}
+
+
+def test_pick_is_released_on_rollback(app, department, make_user):
+    agent = make_user(RoleEnum.agent, department)
+    pick_agent(department.id)
+    db.session.rollback()
+    assert _engine(app).loads(department.id) == {agent.id: 0}
+
+
+def test_reservation_survives_reload_and_commit(app, department, make_user):
+    agent = make_user(RoleEnum.agent, department)
+    customer = make_user(RoleEnum.customer)
+
+    assert pick_agent(department.id) == agent.id
+    _engine(app).forget(department.id)  # a resync before the commit
+    assert _engine(app).loads(department.id) == {agent.id: 1}
+
+    db.session.add(Ticket(
+        title="assigned", created_by_id=customer.id, department_id=department.id, assigned_to_id=agent.id,
+    ))
+    db.session.commit()
+    assert _engine(app).loads(department.id) == {agent.id: 1}
+
+    _engine(app).forget(department.id)
+    assert _engine(app).loads(department.id) == {agent.id: 1}
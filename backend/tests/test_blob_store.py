@@ -0,0 +1,77 @@
+import hashlib
+import io
+import os
+import stat
+from datetime import datetime, timedelta
+
+from werkzeug.datastructures import FileStorage
+
+from extensions import db
+from models.blob import Blob
+from models.ticket import Ticket
+from models.user import RoleEnum
+from services.blob_store import blob_path, gc_blobs, store_blob
+from services.uploads import DEFAULT_FILE_MODE, _UMASK
+
+
+def _store(content):
+    stored = store_blob(FileStorage(io.BytesIO(content), "notes.txt", content_type="text/plain"))
+    db.session.commit()
+    return stored.sha256
+
+
+def _age(sha256, hours=2):
+    db.session.get(Blob, sha256).last_used_at = datetime.utcnow() - timedelta(hours=hours)
+    db.session.commit()
+
+
+def test_gc_removes_unreferenced_blob_and_file(app):
+    sha256 = _store(b"gc me")
+    _age(sha256)
+
+    assert gc_blobs(grace=timedelta(hours=1)) == 1
+    assert db.session.get(Blob, sha256) is None
+    assert not os.path.exists(blob_path(sha256))
+    assert not [n for n in os.listdir(os.path.dirname(blob_path(sha256))) if n.startswith(sha256)]
+
+
+def test_storing_again_keeps_blob_from_gc(app):
+    sha256 = _store(b"uploaded twice")
+    _age(sha256)
+
+    # The second upload dedups onto the stale row and refreshes it
+    assert _store(b"uploaded twice") == sha256
+    assert gc_blobs(grace=timedelta(hours=1)) == 0
+    assert os.path.exists(blob_path(sha256))
+
+
+def test_store_after_gc_puts_the_file_back(app):
+    sha256 = _store(b"collected then uploaded again")
+    _age(sha256)
+    assert gc_blobs(grace=timedelta(hours=1)) == 1
+
+    assert _store(b"collected then uploaded again") == sha256
+    assert db.session.get(Blob, sha256) is not None
+    with open(blob_path(sha256), "rb") as fh:
+        assert fh.read() == b"collected then uploaded again"
+
+
+def test_stored_files_are_readable_by_the_proxy(client, auth_headers, department, make_user):
+    # mkstemp makes 0600 temp files; the stored copy must not keep that mode
+    customer = make_user(RoleEnum.customer)
+    ticket = Ticket(title="scan", created_by_id=customer.id, department_id=department.id)
+    db.session.add(ticket)
+    db.session.commit()
+    content = b"\x89PNG\r\n\x1a\n" + os.urandom(64)
+
+    response = client.post(
+        f"/{ticket.id}/messages", headers=auth_headers(customer),
+        data={"text": "see scan", "files": (io.BytesIO(content), "scan.png")},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code in (200, 201), response.get_json()
+    streamed = blob_path(hashlib.sha256(content).hexdigest())
+    spooled = blob_path(_store(b"stored outside a request"))
+
+    for path in (streamed, spooled):
+        assert stat.S_IMODE(os.stat(path).st_mode) == DEFAULT_FILE_MODE & ~_UMASK
@@ -0,0 +1,94 @@
+import os
+import uuid
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import pytest
+
+from extensions import db
+from models.ticket import Attachment, Comment, Ticket
+from models.user import RoleEnum
+from services.thumbnails import thumbnail_path
+
+
+@pytest.fixture
+def chat(client, auth_headers, department, make_user):
+    customer = make_user(RoleEnum.customer)
+    ticket = Ticket(title="vpn", created_by_id=customer.id, department_id=department.id)
+    db.session.add(ticket)
+    db.session.commit()
+
+    response = client.get(f"/{ticket.id}/chat", headers=auth_headers(customer))
+    assert response.status_code == 200
+    url = urlsplit(response.get_json()["events_url"])
+    return customer, f"{url.path}?{url.query}"
+
+
+def _open(client, url):
+    response = client.get(url)
+    return response, iter(response.response)
+
+
+def test_signed_events_link_is_void_after_deactivation(client, chat):
+    customer, url = chat
+    response, _ = _open(client, url)
+    assert response.status_code == 200
+    response.close()
+
+    customer.is_active = False
+    db.session.commit()
+    assert client.get(url).status_code == 401
+
+
+def test_open_stream_ends_when_access_is_lost(app, client, chat, monkeypatch):
+    customer, url = chat
+    monkeypatch.setitem(app.config, "CHAT_EVENTS_RECHECK_SECONDS", 0.05)
+    response, body = _open(client, url)
+    assert response.status_code == 200
+    assert next(body).startswith(b"retry:")
+    assert b"event: ticket" in next(body)
+
+    customer.is_active = False
+    db.session.commit()
+    with pytest.raises(StopIteration):
+        next(body)
+    response.close()
+
+
+def test_chat_timestamps_are_iso_to_the_second(client, auth_headers, department, make_user):
+    customer = make_user(RoleEnum.customer)
+    created = datetime(2025, 1, 31, 9, 30, 0, 123456)
+    ticket = Ticket(title="mail", created_by_id=customer.id, department_id=department.id, created_at=created)
+    db.session.add(ticket)
+    db.session.flush()
+    db.session.add(Comment(ticket_id=ticket.id, user_id=customer.id, body="hi", created_at=created))
+    db.session.commit()
+
+    data = client.get(f"/{ticket.id}/chat", headers=auth_headers(customer)).get_json()
+    assert data["ticket"]["created_at"] == "2025-01-31T09:30:00"
+    assert [m["created_at"] for m in data["messages"]] == ["2025-01-31T09:30:00"]
+
+
+def test_chat_etag_changes_when_thumbnail_is_ready(client, auth_headers, department, make_user):
+    pytest.importorskip("PIL")
+    customer = make_user(RoleEnum.customer)
+    ticket = Ticket(title="screen", created_by_id=customer.id, department_id=department.id)
+    db.session.add(ticket)
+    db.session.flush()
+    sha256 = uuid.uuid4().hex * 2
+    db.session.add(Attachment(
+        ticket_id=ticket.id, filename="shot.png", file_path="shot.png",
+        blob_sha256=sha256, content_type="image/png",
+    ))
+    db.session.commit()
+    headers = auth_headers(customer)
+
+    first = client.get(f"/{ticket.id}/chat", headers=headers)
+    assert first.get_json()["ticket"]["attachments"][0]["thumbnail_url"] is None
+
+    path = thumbnail_path(sha256)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
+    second = client.get(f"/{ticket.id}/chat", headers={**headers, "If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.get_json()["ticket"]["attachments"][0]["thumbnail_url"].endswith("variant=thumb")
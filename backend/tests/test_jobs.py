@@ -0,0 +1,19 @@
+from extensions import db
+from models.user import Department
+from services.jobs import call_after_commit
+
+
+def test_failing_after_commit_callback_does_not_break_commit(app, caplog):
+    calls = []
+
+    def fail():
+        raise RuntimeError("boom")
+
+    db.session.add(Department(name="after-commit"))
+    call_after_commit(fail)
+    call_after_commit(calls.append, "ran")
+    db.session.commit()
+
+    assert calls == ["ran"]
+    assert "After-commit callback" in caplog.text
+    assert Department.query.filter_by(name="after-commit").count() == 1
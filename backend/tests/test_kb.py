@@ -0,0 +1,20 @@
+from services.kb import render_body
+
+
+def test_headings_map_to_h1_through_h3():
+    html = render_body("# Setup\n\n## VPN\n\n### <Windows>\n\nRun the **installer**.")
+    assert html.split("\n") == [
+        "<h1>Setup</h1>",
+        "<h2>VPN</h2>",
+        "<h3>&lt;Windows&gt;</h3>",
+        "<p>Run the <strong>installer</strong>.</p>",
+    ]
+
+
+def test_heading_without_blank_line_splits_the_block():
+    html = render_body("## Steps\n- open settings\n- sign in")
+    assert html.split("\n") == ["<h2>Steps</h2>", "<ul><li>open settings</li><li>sign in</li></ul>"]
+
+
+def test_deeper_headings_stay_text():
+    assert render_body("#### Notes") == "<p>#### Notes</p>"
@@ -0,0 +1,64 @@
+import threading
+import uuid
+
+import pytest
+
+from models.user import RoleEnum
+from services.rate_limit import MemoryCounterStore, RateLimiter, SQLiteCounterStore
+
+BURST = 30
+
+
+def _burst(fn):
+    # Start BURST calls at once and collect their results
+    barrier = threading.Barrier(BURST)
+    results = []
+
+    def run(i):
+        barrier.wait()
+        results.append(fn(i))
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(BURST)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+@pytest.mark.parametrize("store", ["memory", "sqlite"])
+def test_parallel_acquire_never_exceeds_limit(store, tmp_path):
+    store = MemoryCounterStore() if store == "memory" else SQLiteCounterStore(str(tmp_path / "limits.sqlite"))
+    limiter = RateLimiter(store, {"login_email": (5, 300)})
+
+    results = _burst(lambda i: limiter.acquire("login_email", "a@example.com"))
+    assert results.count(None) == 5
+
+
+def test_parallel_bad_logins_are_cut_off_before_hashing(app, make_user, monkeypatch):
+    monkeypatch.setitem(app.extensions["rate_limiter"].rules, "login_email", (5, 300))
+    email = make_user(RoleEnum.customer).email
+    subnet = uuid.uuid4().int % 200
+
+    def login(i):
+        # One client address each, so only the per-account limit applies
+        return app.test_client().post(
+            "/auth/login", json={"email": email, "password": "wrong"},
+            environ_base={"REMOTE_ADDR": f"10.{subnet}.0.{i + 1}"},
+        ).status_code
+
+    statuses = _burst(login)
+    assert statuses.count(401) == 5
+    assert statuses.count(429) == BURST - 5
+
+
+def test_successful_login_gives_its_attempt_back(app, client, make_user, monkeypatch):
+    monkeypatch.setitem(app.extensions["rate_limiter"].rules, "login_ip", (2, 60))
+    user = make_user(RoleEnum.customer)
+    environ = {"REMOTE_ADDR": f"10.250.0.{uuid.uuid4().int % 250 + 1}"}
+
+    for _ in range(3):
+        response = client.post(
+            "/auth/login", json={"email": user.email, "password": "password"}, environ_base=environ,
+        )
+        assert response.status_code == 200
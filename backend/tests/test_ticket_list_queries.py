@@ -0,0 +1,65 @@
+import pytest
+
+from extensions import db
+from models.ticket import Attachment, Comment, Ticket
+from models.user import RoleEnum
+
+# /agent/tickets and /customer/tickets load the page, its users and its
+# attachments in a fixed number of SELECTs (services/ticket_queries.py),
+# however many tickets, comments and attachments there are.
+
+
+def _select_count(queries):
+    return sum(1 for statement, _ in queries if statement.lstrip().upper().startswith("SELECT"))
+
+
+def _seed(customer, agent, department, count):
+    for i in range(count):
+        ticket = Ticket(
+            title=f"ticket {i}", description="details", created_by_id=customer.id,
+            assigned_to_id=agent.id, department_id=department.id,
+        )
+        db.session.add(ticket)
+        db.session.flush()
+        for author in (customer, agent):
+            comment = Comment(ticket_id=ticket.id, user_id=author.id, body="note")
+            db.session.add(comment)
+            db.session.flush()
+            db.session.add(Attachment(
+                ticket_id=ticket.id, comment_id=comment.id, filename="log.txt",
+                file_path="log.txt", uploaded_by_id=author.id,
+            ))
+        db.session.add(Attachment(
+            ticket_id=ticket.id, filename="screen.png", file_path="screen.png", uploaded_by_id=customer.id,
+        ))
+    db.session.commit()
+
+
+def _list_selects(client, capture_queries, url, headers):
+    db.session.expire_all()
+    with capture_queries() as queries:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return response.get_json()["tickets"], _select_count(queries)
+
+
+@pytest.mark.parametrize("url, role", [("/agent/tickets", "agent"), ("/customer/tickets", "customer")])
+def test_list_query_count_does_not_grow_with_tickets(
+    client, department, make_user, auth_headers, capture_queries, url, role
+):
+    agent = make_user(RoleEnum.agent, department)
+    customer = make_user(RoleEnum.customer)
+    headers = auth_headers(agent if role == "agent" else customer)
+
+    _seed(customer, agent, department, 3)
+    tickets, small = _list_selects(client, capture_queries, url, headers)
+    assert len(tickets) == 3
+    assert all(len(t["attachments"]) == 3 for t in tickets)
+
+    _seed(customer, agent, department, 27)
+    tickets, large = _list_selects(client, capture_queries, url, headers)
+    assert len(tickets) == 30
+    assert all(len(t["attachments"]) == 3 for t in tickets)
+    assert all(a["uploaded_by"] for t in tickets for a in t["attachments"])
+
+    assert large == small
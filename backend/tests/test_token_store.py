@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from sqlalchemy import insert
+
+from extensions import db
+from models.revoked_token import RevokedToken
+from services.token_store import DatabaseRevocationStore, RevocationCache, _utcnow
+
+
+def test_revocation_committed_late_with_lower_id_is_synced(app):
+    cache = RevocationCache(DatabaseRevocationStore(lambda: db.engine), sync_interval=0)
+    now = _utcnow()
+    expires_at = now + timedelta(hours=1)
+    table = RevokedToken.__table__
+
+    with db.engine.begin() as conn:
+        conn.execute(insert(table).values(id=1000, jti="seen-first", expires_at=expires_at, revoked_at=now))
+    assert cache.is_revoked("seen-first")
+
+    # Another worker took a lower id and its revoked_at before the row above,
+    # but committed after this worker's sync
+    with db.engine.begin() as conn:
+        conn.execute(insert(table).values(
+            id=999, jti="committed-late", expires_at=expires_at, revoked_at=now - timedelta(seconds=5),
+        ))
+    assert cache.is_revoked("committed-late")
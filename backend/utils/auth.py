@@ -0,0 +1,83 @@
+from functools import wraps
+from flask import current_app, g, jsonify
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt
+from models.user import RoleEnum
+from services.user_cache import get_user
+
+
+def get_current_user():
+    """
+    The user behind the request's JWT, loaded at most once per request.
+    Returns None if the account no longer exists.
+    """
+    # Keyed on the token id so an app context shared by several requests
+    # (tests, CLI) never hands one request another request's user
+    jti = get_jwt().get("jti")
+    cached = g.get("current_user")
+    if cached is None or cached[0] != jti:
+        identity = get_jwt_identity()
+        cached = (jti, get_user(identity) if identity is not None else None)
+        g.current_user = cached
+    return cached[1]
+
+
+def role_required(*roles, error="Access denied"):
+    """
+    jwt_required() plus a role check against the current user.
+    With no roles, any existing user passes. Failing requests get
+    {"error": error} with 403, same as the inline checks it replaces.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            verify_jwt_in_request()
+            user = get_current_user()
+            if not user or (roles and user.role not in roles):
+                return jsonify({"error": error}), 403
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TokenPrincipal:
+    """
+    The caller as its access token describes it: id, role and department,
+    with no users row behind it. Tokens are revoked whenever any of these
+    change (services/token_store.py), so a valid token's claims are current.
+    """
+
+    __slots__ = ("id", "role", "department_id")
+
+    def __init__(self, id, role, department_id):
+        self.id = id
+        self.role = role
+        self.department_id = department_id
+
+
+def get_current_principal():
+    """
+    The caller for authorization: built from the token's claims when
+    AUTH_TRUST_TOKEN_CLAIMS is on and the token carries them, else the
+    user row (tokens issued before the claims existed).
+    """
+    claims = get_jwt()
+    if current_app.config.get("AUTH_TRUST_TOKEN_CLAIMS", True) and "epoch" in claims:
+        return TokenPrincipal(int(claims["sub"]), RoleEnum(claims["role"]), claims.get("dept"))
+    return get_current_user()
+
+
+def claims_required(*roles, error="Access denied"):
+    """
+    role_required() for views that only need the caller's id, role and
+    department: checked against the token, without reading the users table.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            verify_jwt_in_request()
+            principal = get_current_principal()
+            if not principal or (roles and principal.role not in roles):
+                return jsonify({"error": error}), 403
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
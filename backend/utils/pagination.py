@@ -0,0 +1,67 @@
+import base64
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(created_at, row_id):
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Turn an opaque cursor back into (created_at, id).
+    Raises ValueError if the cursor was not produced by encode_cursor.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+def parse_limit(args):
+    raw = args.get("limit")
+    if raw is None or raw == "":
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def keyset_paginate(query, created_col, id_col, args, cursor_param="cursor"):
+    """
+    Newest-first keyset pagination on (created_at, id).
+
+    Each page is a range scan starting after the last row of the previous
+    page, so deep pages cost the same as the first one (unlike OFFSET).
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    limit = parse_limit(args)
+
+    cursor = args.get(cursor_param)
+    if cursor:
+        after_created, after_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            created_col < after_created,
+            and_(created_col == after_created, id_col < after_id),
+        ))
+
+    # Fetch one extra row to find out whether another page exists
+    rows = query.order_by(created_col.desc(), id_col.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, created_col.key), getattr(last, id_col.key))
+
+    return rows, next_cursor
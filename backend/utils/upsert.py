@@ -0,0 +1,63 @@
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+
+def _dialect_insert(conn):
+    return {"sqlite": sqlite_insert, "postgresql": pg_insert}.get(conn.dialect.name)
+
+
+def increment(conn, table, keys, amounts):
+    """
+    Add `amounts` to the row identified by `keys`, creating it if needed.
+    Uses INSERT .. ON CONFLICT on SQLite/Postgres, UPDATE-then-INSERT elsewhere.
+    """
+    amounts = {k: v for k, v in amounts.items() if v}
+    if not amounts:
+        return
+
+    insert = _dialect_insert(conn)
+    if insert is not None:
+        stmt = insert(table).values(**keys, **amounts)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={col: table.c[col] + stmt.excluded[col] for col in amounts},
+        )
+        conn.execute(stmt)
+        return
+
+    where = [table.c[k] == v for k, v in keys.items()]
+    result = conn.execute(
+        table.update().where(*where).values({col: table.c[col] + v for col, v in amounts.items()})
+    )
+    if result.rowcount == 0:
+        conn.execute(table.insert().values(**keys, **amounts))
+
+
+def insert_ignore(conn, table, values, key_columns):
+    """
+    INSERT a row unless one with the same key already exists.
+    """
+    insert = _dialect_insert(conn)
+    if insert is not None:
+        conn.execute(insert(table).values(**values).on_conflict_do_nothing(index_elements=key_columns))
+        return
+
+    where = [table.c[k] == values[k] for k in key_columns]
+    if conn.execute(table.select().where(*where)).first() is None:
+        conn.execute(table.insert().values(**values))
+
+
+def upsert(conn, table, values, key_columns, update):
+    """
+    INSERT a row, or SET `update` on the existing one with the same key.
+    A single statement on SQLite/Postgres, so it also waits for a concurrent
+    delete of that row and inserts afresh once it commits.
+    """
+    insert = _dialect_insert(conn)
+    if insert is not None:
+        conn.execute(insert(table).values(**values).on_conflict_do_update(index_elements=key_columns, set_=update))
+        return
+
+    where = [table.c[k] == values[k] for k in key_columns]
+    if conn.execute(table.update().where(*where).values(**update)).rowcount == 0:
+        conn.execute(table.insert().values(**values))
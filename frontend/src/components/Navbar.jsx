@@ -38,6 +38,7 @@ export default function Navbar() {
       console.error("Logout failed:", err);
     } finally {
       localStorage.removeItem("access_token");
+      localStorage.removeItem("refresh_token");
       setToken(null);
       navigate("/");
     }
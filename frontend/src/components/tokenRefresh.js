@@ -0,0 +1,53 @@
+// components/tokenRefresh.js
+// When an API call fails with 401, trade the stored refresh token for a new
+// pair once (the server rotates it) and replay the call. Concurrent 401s
+// share one refresh.
+import axios from "axios";
+
+const REFRESH_URL = "http://localhost:5000/auth/refresh";
+
+let pending = null;
+
+function refreshTokens() {
+  const refreshToken = localStorage.getItem("refresh_token");
+  if (!refreshToken) return Promise.reject(new Error("No refresh token"));
+  if (!pending) {
+    pending = axios
+      .post(REFRESH_URL, null, {
+        headers: { Authorization: `Bearer ${refreshToken}` },
+        _skipRefresh: true,
+      })
+      .then((res) => {
+        localStorage.setItem("access_token", res.data.access_token);
+        localStorage.setItem("refresh_token", res.data.refresh_token);
+        return res.data.access_token;
+      })
+      .catch((err) => {
+        localStorage.removeItem("refresh_token");
+        throw err;
+      })
+      .finally(() => {
+        pending = null;
+      });
+  }
+  return pending;
+}
+
+axios.interceptors.response.use(undefined, async (error) => {
+  const config = error.config;
+  if (
+    error.response?.status !== 401 ||
+    !config ||
+    config._skipRefresh ||
+    config._retried ||
+    config.url?.includes("/auth/") // bad password, logout: nothing to refresh
+  ) {
+    throw error;
+  }
+  const accessToken = await refreshTokens().catch(() => {
+    throw error;
+  });
+  config._retried = true;
+  config.headers = { ...config.headers, Authorization: `Bearer ${accessToken}` };
+  return axios(config);
+});
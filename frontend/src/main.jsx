@@ -3,6 +3,7 @@ import React from "react";
 import ReactDOM from "react-dom/client";
 import { BrowserRouter } from "react-router-dom";
 import App from "./App.jsx";
+import "./components/tokenRefresh.js";
 
 ReactDOM.createRoot(document.getElementById("root")).render(
   <React.StrictMode>
@@ -21,6 +21,7 @@ export default function Login() {
 
       // ✅ FIX: use res, not response
       localStorage.setItem("access_token", res.data.access_token);
+      localStorage.setItem("refresh_token", res.data.refresh_token);
       localStorage.setItem("role", res.data.role);
 
       // Normalize role to lowercase
@@ -88,7 +88,7 @@ const GetAgents = () => {
                 <td>{agent.email}</td>
                 <td>{agent.department || "N/A"}</td>
                 <td>{agent.is_active ? "Active" : "Inactive"}</td>
-                <td>{agent.created_at || "N/A"}</td>
+                <td>{agent.created_at ? agent.created_at.replace("T", " ") : "N/A"}</td>
                 <td>{agent.created_by || "N/A"}</td>
               </tr>
             ))
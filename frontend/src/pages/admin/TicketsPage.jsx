@@ -10,6 +10,10 @@ export default function AllTickets() {
   const [assignedTickets, setAssignedTickets] = useState([]);
   const [agents, setAgents] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [unassignedCursor, setUnassignedCursor] = useState(null);
+  const [assignedCursor, setAssignedCursor] = useState(null);
+  const [selected, setSelected] = useState([]);
+  const [bulkAgent, setBulkAgent] = useState("");
 
   // Fetch tickets
   const fetchTickets = async () => {
@@ -20,6 +24,8 @@ export default function AllTickets() {
       });
       setUnassignedTickets(res.data.unassigned_tickets);
       setAssignedTickets(res.data.assigned_tickets);
+      setUnassignedCursor(res.data.unassigned_next_cursor || null);
+      setAssignedCursor(res.data.assigned_next_cursor || null);
     } catch (err) {
       console.error("Error fetching tickets", err);
     } finally {
@@ -27,6 +33,28 @@ export default function AllTickets() {
     }
   };
 
+  // Each list is paged separately; only the requested list gets appended
+  const loadMore = async (which) => {
+    const cursorParam = `${which}_cursor`;
+    const cursor = which === "unassigned" ? unassignedCursor : assignedCursor;
+    try {
+      const token = localStorage.getItem("access_token");
+      const res = await axios.get(`${BASE_URL}/admin/tickets`, {
+        headers: { Authorization: `Bearer ${token}` },
+        params: { [cursorParam]: cursor },
+      });
+      if (which === "unassigned") {
+        setUnassignedTickets((prev) => [...prev, ...res.data.unassigned_tickets]);
+        setUnassignedCursor(res.data.unassigned_next_cursor || null);
+      } else {
+        setAssignedTickets((prev) => [...prev, ...res.data.assigned_tickets]);
+        setAssignedCursor(res.data.assigned_next_cursor || null);
+      }
+    } catch (err) {
+      console.error("Error fetching tickets", err);
+    }
+  };
+
   // Fetch agents for dropdown
   const fetchAgents = async () => {
     try {
@@ -58,6 +86,39 @@ export default function AllTickets() {
     }
   };
 
+  const toggleSelected = (ticketId) => {
+    setSelected((prev) =>
+      prev.includes(ticketId)
+        ? prev.filter((id) => id !== ticketId)
+        : [...prev, ticketId]
+    );
+  };
+
+  // Assign every selected ticket in one request; no agent = least loaded
+  const handleBulkAssign = async () => {
+    if (selected.length === 0) return alert("Select tickets first");
+    try {
+      const token = localStorage.getItem("access_token");
+      const res = await axios.post(
+        `${BASE_URL}/admin/tickets/bulk-assign`,
+        { ticket_ids: selected, agent_id: bulkAgent ? Number(bulkAgent) : null },
+        { headers: { Authorization: `Bearer ${token}` } }
+      );
+      const failed = res.data.results.filter((r) => !r.ok);
+      alert(
+        failed.length === 0
+          ? `${res.data.updated} tickets assigned`
+          : `${res.data.updated} assigned, ${failed.length} failed: ` +
+              failed.map((r) => `#${r.ticket_id} ${r.error}`).join(", ")
+      );
+      setSelected([]);
+      fetchTickets();
+    } catch (err) {
+      console.error("Error assigning tickets", err);
+      alert(err.response?.data?.error || "Failed to assign tickets");
+    }
+  };
+
   useEffect(() => {
     fetchTickets();
     fetchAgents();
@@ -71,9 +132,24 @@ export default function AllTickets() {
       {unassignedTickets.length === 0 ? (
         <p>No unassigned tickets</p>
       ) : (
+        <>
+        <div className="bulk-actions">
+          <select value={bulkAgent} onChange={(e) => setBulkAgent(e.target.value)}>
+            <option value="">Least loaded agent</option>
+            {agents.map((agent) => (
+              <option key={agent.id} value={agent.id}>
+                {agent.name}
+              </option>
+            ))}
+          </select>
+          <button onClick={handleBulkAssign} disabled={selected.length === 0}>
+            Assign selected ({selected.length})
+          </button>
+        </div>
         <table>
           <thead>
             <tr>
+              <th></th>
               <th>ID</th>
               <th>Title</th>
               <th>Description</th>
@@ -85,6 +161,13 @@ export default function AllTickets() {
           <tbody>
             {unassignedTickets.map((ticket) => (
               <tr key={ticket.id}>
+                <td>
+                  <input
+                    type="checkbox"
+                    checked={selected.includes(ticket.id)}
+                    onChange={() => toggleSelected(ticket.id)}
+                  />
+                </td>
                 <td>{ticket.id}</td>
                 <td>{ticket.title}</td>
                 <td>{ticket.description}</td>
@@ -117,6 +200,10 @@ export default function AllTickets() {
             ))}
           </tbody>
         </table>
+        </>
+      )}
+      {unassignedCursor && (
+        <button onClick={() => loadMore("unassigned")}>Load more</button>
       )}
 
       <h3>Assigned Tickets</h3>
@@ -148,6 +235,9 @@ export default function AllTickets() {
           </tbody>
         </table>
       )}
+      {assignedCursor && (
+        <button onClick={() => loadMore("assigned")}>Load more</button>
+      )}
     </div>
   );
 }
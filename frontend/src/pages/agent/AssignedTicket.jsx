@@ -8,6 +8,7 @@ function AssignedTicket() {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
   const [filter, setFilter] = useState("all");
+  const [nextCursor, setNextCursor] = useState(null);
   const navigate = useNavigate();
  
   useEffect(() => {
@@ -25,6 +26,7 @@ function AssignedTicket() {
         });
  
         setTickets(res.data.tickets || []);
+        setNextCursor(res.data.next_cursor || null);
       } catch (err) {
         console.error("Error fetching assigned tickets:", err);
         setError("Failed to fetch assigned tickets.");
@@ -36,6 +38,21 @@ function AssignedTicket() {
     fetchTickets();
   }, []);
  
+  // Tickets come back one page at a time; append the next page on demand
+  const loadMore = async () => {
+    try {
+      const token = localStorage.getItem("access_token");
+      const res = await axios.get("http://127.0.0.1:5000/agent/tickets", {
+        headers: { Authorization: `Bearer ${token}` },
+        params: { cursor: nextCursor },
+      });
+      setTickets((prev) => [...prev, ...(res.data.tickets || [])]);
+      setNextCursor(res.data.next_cursor || null);
+    } catch (err) {
+      console.error("Error fetching assigned tickets:", err);
+    }
+  };
+ 
   // Filtering
   const filteredTickets = tickets.filter((t) => {
     if (filter === "open") return t.status === "open";
@@ -110,6 +127,15 @@ function AssignedTicket() {
           </table>
         </div>
       )}
+ 
+      {nextCursor && (
+        <button
+          onClick={loadMore}
+          className="mt-4 px-4 py-2 bg-gray-200 rounded"
+        >
+          Load more
+        </button>
+      )}
     </div>
   );
 }
@@ -19,14 +19,23 @@ export default function ChatPage() {
   const role = localStorage.getItem("role");
   const currentUserName = localStorage.getItem("name") || "Me";
 
-  // Fetch ticket chat
-  const fetchChat = async () => {
-    setLoading(true);
+  // Fetch ticket chat; with `since`, only comments newer than the cursor
+  // are returned and appended (the browser revalidates with the ETag)
+  const fetchChat = async (since = null) => {
+    if (since === null) setLoading(true);
     try {
       const res = await axios.get(`${BASE_URL}/${ticketId}/chat`, {
         headers: { Authorization: `Bearer ${token}` },
+        params: since === null ? {} : { since },
       });
-      setData(res.data);
+      setData((prev) =>
+        since === null || !prev
+          ? res.data
+          : {
+              ...res.data,
+              messages: [...prev.messages, ...res.data.messages],
+            }
+      );
       setError(null);
     } catch (err) {
       console.error("Fetch chat error:", err.response?.data || err.message);
@@ -41,6 +50,53 @@ export default function ChatPage() {
     fetchChat();
   }, [ticketId]);
 
+  // Live updates pushed by the server (new messages, attachments, status)
+  const eventsUrl = data?.events_url;
+  const cursorRef = useRef(0);
+  cursorRef.current = data?.cursor ?? 0;
+  useEffect(() => {
+    if (!eventsUrl) return;
+    const source = new EventSource(`${eventsUrl}&since=${data.cursor}`);
+
+    source.addEventListener("message", (e) => {
+      const { message } = JSON.parse(e.data);
+      setData((prev) =>
+        prev.messages.some((m) => m.id === message.id)
+          ? prev
+          : {
+              ...prev,
+              messages: [...prev.messages, message],
+              cursor: Math.max(prev.cursor, message.id),
+            }
+      );
+    });
+    source.addEventListener("attachments", (e) => {
+      const { attachments } = JSON.parse(e.data);
+      setData((prev) => ({
+        ...prev,
+        ticket: {
+          ...prev.ticket,
+          attachments: [...prev.ticket.attachments, ...attachments],
+        },
+      }));
+    });
+    source.addEventListener("ticket", (e) => {
+      const { ticket } = JSON.parse(e.data);
+      setData((prev) => ({
+        ...prev,
+        ticket: { ...prev.ticket, status: ticket.status },
+      }));
+    });
+
+    // Stream links are short-lived and the server ends streams when access
+    // is lost: once the browser gives up reconnecting, fetch a fresh link
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) fetchChat(cursorRef.current);
+    };
+
+    return () => source.close();
+  }, [eventsUrl]);
+
   useEffect(() => {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
   }, [data]);
@@ -61,7 +117,6 @@ export default function ChatPage() {
       });
       setNewMessage("");
       setFile(null);
-      await fetchChat();
       messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
     } catch (err) {
       console.error("Send message error:", err.response?.data || err.message);
@@ -78,7 +133,6 @@ export default function ChatPage() {
         { headers: { Authorization: `Bearer ${token}` } }
       );
       alert(res.data.message);
-      fetchChat();
     } catch (err) {
       console.error(err.response?.data || err.message);
       alert(err.response?.data?.error || "Failed to resolve ticket");
@@ -93,7 +147,6 @@ export default function ChatPage() {
         { headers: { Authorization: `Bearer ${token}` } }
       );
       alert(res.data.message);
-      fetchChat();
     } catch (err) {
       console.error(err.response?.data || err.message);
       alert(err.response?.data?.error || "Failed to confirm ticket");
@@ -108,7 +161,6 @@ export default function ChatPage() {
         { headers: { Authorization: `Bearer ${token}` } }
       );
       alert(res.data.message);
-      fetchChat();
     } catch (err) {
       console.error(err.response?.data || err.message);
       alert(err.response?.data?.error || "Failed to reopen ticket");
@@ -142,7 +194,7 @@ export default function ChatPage() {
               .map((att) => (
                 <img
                   key={att.id}
-                  src={att.url}
+                  src={att.thumbnail_url || att.url}
                   alt={att.filename}
                   className="grid-image"
                   onClick={() => setLightbox({ open: true, url: att.url })}
@@ -203,7 +255,7 @@ export default function ChatPage() {
                     .map((a) => (
                       <img
                         key={a.id}
-                        src={a.url}
+                        src={a.thumbnail_url || a.url}
                         alt={a.filename}
                         className="grid-image"
                         onClick={() => setLightbox({ open: true, url: a.url })}
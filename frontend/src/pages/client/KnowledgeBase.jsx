@@ -1,12 +1,58 @@
 // src/components/KnowledgeBase.jsx
-import React from "react";
+import React, { useEffect, useState } from "react";
+import axios from "axios";
+import { useSearchParams } from "react-router-dom";
 import "./KnowledgeBase.css";
 
+const API = "http://127.0.0.1:5000/api/kb";
+
 function KnowledgeBase() {
+  const [articles, setArticles] = useState([]);
+  const [article, setArticle] = useState(null);
+  const [searchParams, setSearchParams] = useSearchParams();
+  const articleId = searchParams.get("article");
+  const headers = { Authorization: `Bearer ${localStorage.getItem("access_token")}` };
+
+  useEffect(() => {
+    axios
+      .get(API, { headers })
+      .then((res) => setArticles(res.data.articles))
+      .catch((err) => console.error(err));
+  }, []);
+
+  useEffect(() => {
+    if (!articleId) {
+      setArticle(null);
+      return;
+    }
+    axios
+      .get(`${API}/${articleId}`, { headers })
+      .then((res) => setArticle(res.data))
+      .catch(() => setArticle(null));
+  }, [articleId]);
+
+  if (article) {
+    return (
+      <div className="knowledge-base-container">
+        <button className="kb-back" onClick={() => setSearchParams({})}>← All articles</button>
+        <h2>{article.title}</h2>
+        {/* html is rendered and escaped server-side */}
+        <div className="kb-article" dangerouslySetInnerHTML={{ __html: article.html }} />
+      </div>
+    );
+  }
+
   return (
     <div className="knowledge-base-container">
       <h2>Knowledge Base</h2>
       <p>Here you can search and read solutions to common problems.</p>
+      <ul className="kb-list">
+        {articles.map((a) => (
+          <li key={a.id}>
+            <a onClick={() => setSearchParams({ article: a.id })}>{a.title}</a>
+          </li>
+        ))}
+      </ul>
     </div>
   );
 }
@@ -8,6 +8,7 @@ function TicketList() {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
   const [filter, setFilter] = useState("all");
+  const [nextCursor, setNextCursor] = useState(null);
   const navigate = useNavigate();
  
   useEffect(() => {
@@ -25,6 +26,7 @@ function TicketList() {
         });
  
         setTickets(res.data.tickets || []);
+        setNextCursor(res.data.next_cursor || null);
       } catch (err) {
         console.error("Error fetching tickets:", err);
         setError("Failed to fetch tickets.");
@@ -36,6 +38,21 @@ function TicketList() {
     fetchTickets();
   }, []);
  
+  // Tickets come back one page at a time; append the next page on demand
+  const loadMore = async () => {
+    try {
+      const token = localStorage.getItem("access_token");
+      const res = await axios.get("http://127.0.0.1:5000/customer/tickets", {
+        headers: { Authorization: `Bearer ${token}` },
+        params: { cursor: nextCursor },
+      });
+      setTickets((prev) => [...prev, ...(res.data.tickets || [])]);
+      setNextCursor(res.data.next_cursor || null);
+    } catch (err) {
+      console.error("Error fetching tickets:", err);
+    }
+  };
+ 
   const filteredTickets = tickets.filter((t) => {
     if (filter === "assigned") return t.assigned_to !== null;
     if (filter === "unassigned") return t.assigned_to === null;
@@ -111,6 +128,15 @@ function TicketList() {
           </table>
         </div>
       )}
+ 
+      {nextCursor && (
+        <button
+          onClick={loadMore}
+          className="mt-4 px-4 py-2 bg-gray-200 rounded"
+        >
+          Load more
+        </button>
+      )}
     </div>
   );
 }
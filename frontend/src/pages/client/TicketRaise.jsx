@@ -1,4 +1,4 @@
-import React, { useState } from "react";
+import React, { useEffect, useState } from "react";
 import axios from "axios";
 import "./TicketRaise.css";
  
@@ -8,6 +8,28 @@ export default function TicketRaise() {
   const [priority, setPriority] = useState("medium");
   const [files, setFiles] = useState([]);
   const [message, setMessage] = useState("");
+  const [suggestions, setSuggestions] = useState([]);
+ 
+  // Suggest KB articles while the customer describes the problem
+  useEffect(() => {
+    if (!title.trim() && !description.trim()) {
+      setSuggestions([]);
+      return;
+    }
+    const timer = setTimeout(async () => {
+      try {
+        const token = localStorage.getItem("access_token");
+        const res = await axios.get("http://127.0.0.1:5000/api/kb/suggest", {
+          params: { title, description, limit: 3 },
+          headers: { Authorization: `Bearer ${token}` },
+        });
+        setSuggestions(res.data.suggestions);
+      } catch (err) {
+        setSuggestions([]);
+      }
+    }, 400);
+    return () => clearTimeout(timer);
+  }, [title, description]);
  
   const handleFileChange = (e) => {
     setFiles(e.target.files);
@@ -84,6 +106,21 @@ export default function TicketRaise() {
           required
         />
  
+        {suggestions.length > 0 && (
+          <div className="kb-suggestions">
+            <p>These articles may solve your problem:</p>
+            <ul>
+              {suggestions.map((s) => (
+                <li key={s.id}>
+                  <a href={`/customer-dashboard/knowledge-base?article=${s.id}`} target="_blank" rel="noreferrer">
+                    {s.title}
+                  </a>
+                </li>
+              ))}
+            </ul>
+          </div>
+        )}
+ 
         <label>Priority</label>
         <select
           value={priority}
@@ -9,6 +9,8 @@ export default function SuperAdminTickets() {
   const [agents, setagents] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   const [search, setSearch] = useState("");
   const [statusFilter, setStatusFilter] = useState("all");
@@ -53,7 +55,27 @@ export default function SuperAdminTickets() {
     }
   };
 
-  // ✅ Fetch tickets
+  // ✅ Fetch tickets (status/priority/assignment filters and paging run on the server)
+  const buildTicketParams = (cursor) => {
+    const params = {};
+    if (statusFilter !== "all") params.status = statusFilter;
+    if (priorityFilter !== "all") params.priority = priorityFilter;
+    if (assignmentFilter === "assigned") params.assignee = "any";
+    if (assignmentFilter === "unassigned") params.assignee = "none";
+    if (cursor) params.cursor = cursor;
+    return params;
+  };
+
+  const fetchTickets = async (cursor = null) => {
+    const res = await axios.get(`${BASE_URL}/tickets`, {
+      headers: authHeaders(),
+      params: buildTicketParams(cursor),
+    });
+    const page = res.data?.tickets || [];
+    setTickets((prev) => (cursor ? [...prev, ...page] : page));
+    setNextCursor(res.data?.next_cursor || null);
+  };
+
   useEffect(() => {
     const load = async () => {
       try {
@@ -64,11 +86,7 @@ export default function SuperAdminTickets() {
           return;
         }
 
-        const res = await axios.get(`${BASE_URL}/tickets`, {
-          headers: authHeaders(),
-        });
-
-        setTickets(res.data?.tickets || []);
+        await fetchTickets();
       } catch (err) {
         console.error(err);
         setError("Failed to fetch tickets.");
@@ -78,7 +96,20 @@ export default function SuperAdminTickets() {
     };
 
     load();
-  }, []);
+  }, [statusFilter, priorityFilter, assignmentFilter]);
+
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      await fetchTickets(nextCursor);
+    } catch (err) {
+      console.error(err);
+      alert("Failed to load more tickets.");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
   // ✅ Fetch departments & agents
   useEffect(() => {
@@ -148,34 +179,16 @@ export default function SuperAdminTickets() {
     }
   };
 
-  // ✅ Apply search + filters
+  // ✅ Apply search (status/priority/assignment are already filtered server-side)
   const filteredTickets = tickets.filter((t) => {
     const s = (search || "").toLowerCase();
-    const matchSearch =
+    return (
       (t.title && t.title.toLowerCase().includes(s)) ||
       (t.created_by && t.created_by.toLowerCase().includes(s)) ||
       (t.assigned_to && t.assigned_to.toLowerCase().includes(s)) ||
       (t.department && t.department.toLowerCase().includes(s)) ||
-      String(t.id).includes(s);
-
-    const matchStatus =
-      statusFilter === "all"
-        ? true
-        : String(t.status || "").toLowerCase() === statusFilter;
-
-    const matchPriority =
-      priorityFilter === "all"
-        ? true
-        : String(t.priority || "").toLowerCase() === priorityFilter;
-
-    const matchAssignment =
-      assignmentFilter === "all"
-        ? true
-        : assignmentFilter === "assigned"
-        ? !!t.assigned_to
-        : !t.assigned_to;
-
-    return matchSearch && matchStatus && matchPriority && matchAssignment;
+      String(t.id).includes(s)
+    );
   });
 
   if (loading) return <p className="p-4 text-gray-600">Loading tickets...</p>;
@@ -267,7 +280,7 @@ export default function SuperAdminTickets() {
                     <td className="px-4 py-2 border">{t.created_by || "-"}</td>
                     <td className="px-4 py-2 border">{t.assigned_to || "-"}</td>
                     <td className="px-4 py-2 border">{t.department || "-"}</td>
-                    <td className="px-4 py-2 border">{t.created_at}</td>
+                    <td className="px-4 py-2 border">{t.created_at?.replace("T", " ")}</td>
                     <td className="px-4 py-2 border text-center">
                       {!t.assigned_to ? (
                         <div className="flex gap-2 items-center">
@@ -340,6 +353,18 @@ export default function SuperAdminTickets() {
           </tbody>
         </table>
       </div>
+
+      {nextCursor && (
+        <div className="text-center mt-4">
+          <button
+            onClick={loadMore}
+            className="bg-gray-200 px-4 py-2 rounded hover:bg-gray-300 disabled:opacity-50"
+            disabled={loadingMore}
+          >
+            {loadingMore ? "Loading..." : "Load more"}
+          </button>
+        </div>
+      )}
     </div>
   );
 }
@@ -9,7 +9,10 @@ export default function AnalysisReport() {
 
   const fetchStats = async () => {
     try {
-      const res = await axios.get(`${BASE_URL}/api/tickets/stats`);
+      const token = localStorage.getItem("access_token");
+      const res = await axios.get(`${BASE_URL}/api/tickets/stats`, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
       setStats(res.data);
     } catch (err) {
       console.error("Error fetching stats", err);
@@ -28,6 +31,10 @@ export default function AnalysisReport() {
         <div className="stat-box">Total Tickets: {stats.total}</div>
         <div className="stat-box">Open: {stats.open}</div>
         <div className="stat-box">Closed: {stats.closed}</div>
+        <div className="stat-box">
+          Avg. Resolution: {stats.mean_time_to_resolve_hours ?? "-"} h
+        </div>
+        <div className="stat-box">Avg. Rating: {stats.average_rating ?? "-"}</div>
       </div>
 
       {/* Chart Section */}